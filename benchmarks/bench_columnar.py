@@ -0,0 +1,79 @@
+"""
+Time to open a stored corpus and select from it, pickled and columnar.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_columnar.py [size]
+
+Builds a synthetic corpus of ``size`` papers (default 100,000), stores it with
+:mod:`pickle` and with :func:`.write_columnar`\, and reports the CPU time to
+open each copy, to select the papers from one year, and to count the papers
+in each year with :meth:`.Corpus.distribution`\.
+"""
+
+import os
+import pickle
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne import Corpus, Paper
+from tethne.classes.columnar import ColumnarCorpus, write_columnar
+
+
+def make_papers(size, seed=1):
+    rng = random.Random(seed)
+    papers = []
+    for i in range(size):
+        paper = Paper()
+        paper['doi'] = '10.1000/%i' % i
+        paper['title'] = 'Title of paper %i' % i
+        paper['date'] = rng.randint(1950, 2015)
+        paper['authors_full'] = [('AUTHOR%i' % rng.randint(0, size // 10),
+                                  'A')
+                                 for _ in range(rng.randint(1, 4))]
+        paper['citedReferences'] = ['REF %i' % rng.randint(0, size)
+                                    for _ in range(rng.randint(0, 20))]
+        papers.append(paper)
+    return papers
+
+
+def _time(label, func):
+    start = time.process_time()
+    value = func()
+    print('{0}: {1:.2f}s'.format(label, time.process_time() - start))
+    return value
+
+
+def run(size=100000):
+    corpus = Corpus(make_papers(size), index_by='doi')
+    tmp = tempfile.mkdtemp()
+    try:
+        pickle_path = os.path.join(tmp, 'corpus.pickle')
+        columnar_path = os.path.join(tmp, 'corpus')
+        with open(pickle_path, 'wb') as f:
+            _time('pickle: write', lambda: pickle.dump(corpus, f))
+        _time('columnar: write', lambda: write_columnar(corpus, columnar_path))
+        del corpus
+
+        with open(pickle_path, 'rb') as f:
+            pickled = _time('pickle: open', lambda: pickle.load(f))
+        _time('pickle: select', lambda: pickled[('date', 1995)])
+        _time('pickle: distribution', pickled.distribution)
+        del pickled
+
+        columnar = _time('columnar: open',
+                         lambda: ColumnarCorpus(columnar_path))
+        _time('columnar: select', lambda: columnar[('date', 1995)])
+        _time('columnar: distribution', columnar.distribution)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:2]])
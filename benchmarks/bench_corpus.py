@@ -0,0 +1,67 @@
+"""
+Time to build a :class:`.Corpus` from :class:`.Paper`\s.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_corpus.py [size ...]
+
+For each ``size`` (default 10,000, 100,000 and 1,000,000), builds that many
+synthetic WoS-like papers, each with a few authors and 40 cited references,
+and reports the CPU time for ``Corpus(papers)`` with the default indices
+(authors, citations, ayjid, date) and featuresets (authors, citations).
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne import Corpus, Paper
+
+
+def make_papers(size, references=40, seed=1):
+    rng = random.Random(seed)
+    journals = ['JOURNAL %i' % i for i in range(max(1, size // 1000))]
+    authors = max(1, size // 5)
+    cited = []
+    for i in range(max(1, size // 2)):
+        reference = Paper()
+        reference['authors_init'] = [('AUTHOR%i' % rng.randrange(authors),
+                                      'A')]
+        reference['date'] = rng.randint(1900, 2015)
+        reference['journal'] = rng.choice(journals)
+        cited.append(reference)
+
+    papers = []
+    for i in range(size):
+        paper = Paper()
+        paper['wosid'] = 'WOS:%012i' % i
+        paper['title'] = 'Title of paper %i' % i
+        paper['date'] = rng.randint(1950, 2015)
+        paper['journal'] = rng.choice(journals)
+        paper['authors_full'] = [('AUTHOR%i' % rng.randrange(authors),
+                                  'ANNE')
+                                 for _ in range(rng.randint(1, 4))]
+        paper['citedReferences'] = [rng.choice(cited)
+                                    for _ in range(references)]
+        papers.append(paper)
+    return papers
+
+
+def run(*sizes):
+    for size in sizes or (10000, 100000, 1000000):
+        papers = make_papers(size)
+        gc.collect()
+        start = time.process_time()
+        corpus = Corpus(papers, index_by='wosid')
+        print('{0} papers: {1:.2f}s'.format(size,
+                                             time.process_time() - start))
+        del corpus, papers
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
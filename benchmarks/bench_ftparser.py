@@ -0,0 +1,62 @@
+"""
+Throughput of the field-tagged parser on the WoS test data.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_ftparser.py [repeats]
+
+Reports lines per second over the WoS files in ``tethne/tests/data`` for the
+generic :class:`.FTParser` (tokenizing and storing every line, no field
+handlers) and for :class:`.WoSParser` (which also parses author names, cited
+references, etc). Timings are CPU time, best of ``repeats``.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne.readers.base import FTParser
+from tethne.readers.wos import WoSParser
+
+DATAPATH = os.path.join(os.path.dirname(__file__), '..', 'tethne', 'tests',
+                        'data')
+DATAFILES = ['wos.txt', 'wos2.txt', 'wos3.txt', 'valentin.txt']
+
+
+def count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(1 for line in f)
+
+
+class WoSTokenizer(FTParser):
+    """Field-tagged parser with WoS record delimiters, but no handlers."""
+    start_tag = 'PT'
+    end_tag = 'ER'
+
+
+def time_parser(parser_class, paths, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.process_time()
+        for path in paths:
+            parser_class(path).parse()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeats=5):
+    paths = [os.path.join(DATAPATH, fname) for fname in DATAFILES]
+    lines = sum(count_lines(path) for path in paths)
+
+    for parser_class in [WoSTokenizer, WoSParser]:
+        best = time_parser(parser_class, paths, repeats)
+        print('{0:>14}: {1} lines in {2:.3f}s: {3:,.0f} lines/s'.format(
+              parser_class.__name__, lines, best, lines / best))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
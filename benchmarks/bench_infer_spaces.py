@@ -0,0 +1,55 @@
+"""
+Throughput of word segmentation for run-together PDF tokens.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_infer_spaces.py [repeats]
+
+Reports characters per second (CPU time, best of ``repeats``) for
+:func:`.zotero._infer_spaces` on a fixed set of strings made by concatenating
+common words without spaces, and the one-off cost of loading the word-cost
+table.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne.readers import zotero
+
+COMMON = ['the', 'of', 'and', 'evolutionary', 'diversity', 'chromosomal',
+          'instability', 'present', 'ancestral', 'karyotype', 'salts',
+          'reptiles', 'fragile', 'sites', 'in', 'with', 'genome', 'species',
+          'analysis', 'conserved', 'between', 'mammals', 'is', 'a']
+
+
+def make_samples(n=500, seed=1):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(COMMON) for _ in range(rng.randint(2, 12)))
+            for _ in range(n)]
+
+
+def run(repeats=5):
+    start = time.process_time()
+    zotero._load_wordcost()
+    print('load word costs: {0:.3f}s'.format(time.process_time() - start))
+
+    samples = make_samples()
+    chars = sum(len(s) for s in samples)
+    best = None
+    for _ in range(repeats):
+        start = time.process_time()
+        for s in samples:
+            zotero._infer_spaces(s)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('{0} chars in {1:.3f}s: {2:,.0f} chars/s'.format(chars, best,
+                                                          chars / best))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,58 @@
+"""
+Time to merge two synthetic corpora with :func:`tethne.readers.merge`\.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_merge.py [size_1] [size_2]
+
+Builds corpora of ``size_1`` and ``size_2`` papers (default 300,000 and
+100,000), a third of which are in both, and reports the CPU time to merge
+them by DOI, and (with a callable comparator) by sorted-neighborhood blocking
+on the title.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne import Corpus, Paper
+from tethne.readers import merge
+
+
+def make_papers(start, stop, seed):
+    rng = random.Random(seed)
+    papers = []
+    for i in range(start, stop):
+        paper = Paper()
+        paper['doi'] = '10.1000/%i' % i
+        paper['title'] = 'Title of paper %i' % i
+        paper['date'] = rng.randint(1950, 2015)
+        papers.append(paper)
+    return papers
+
+
+def run(size_1=300000, size_2=100000):
+    overlap = size_2 // 3
+    corpus_1 = Corpus(make_papers(0, size_1, 1), index_by='doi')
+    corpus_2 = Corpus(make_papers(size_1 - overlap, size_1 - overlap + size_2,
+                                  2), index_by='doi')
+
+    start = time.process_time()
+    combined = merge(corpus_1, corpus_2, match_by=['doi'], index_by='doi')
+    print('by field: {0} papers in {1:.2f}s'.format(
+          len(combined), time.process_time() - start))
+
+    start = time.process_time()
+    combined = merge(corpus_1, corpus_2, index_by='doi',
+                     match_by=lambda p1, p2: p1.doi == p2.doi,
+                     block_by=lambda paper: paper.title, window=2)
+    print('sorted neighborhood: {0} papers in {1:.2f}s'.format(
+          len(combined), time.process_time() - start))
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:3]])
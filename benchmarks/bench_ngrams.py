@@ -0,0 +1,74 @@
+"""
+Loading time for DfR N-grams.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_ngrams.py [scale] [workers]
+
+Builds a temporary dataset with ``scale`` copies of the wordcounts files in
+``tethne/tests/data/dfr`` (each copy with its own DOIs), and reports the
+wall-clock time to load it with :func:`.dfr.ngrams` serially, with a pool of
+``workers`` processes, and lazily (both the up-front cost, and the cost of
+then building the aggregate counts).
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne.readers.dfr import ngrams
+
+DATAPATH = os.path.join(os.path.dirname(__file__), '..', 'tethne', 'tests',
+                        'data', 'dfr', 'wordcounts')
+
+
+def make_dataset(scale):
+    path = tempfile.mkdtemp()
+    os.mkdir(os.path.join(path, 'wordcounts'))
+    for fname in os.listdir(DATAPATH):
+        with open(os.path.join(DATAPATH, fname)) as f:
+            contents = f.read()
+        for i in range(scale):
+            copy = re.sub('id="([^"]+)"', 'id="\\1.{0}"'.format(i), contents,
+                          count=1)
+            target = os.path.join(path, 'wordcounts',
+                                  '{0}.{1}.XML'.format(fname[:-4], i))
+            with open(target, 'w') as f:
+                f.write(copy)
+    return path
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(scale=10, workers=4):
+    path = make_dataset(scale)
+    try:
+        grams, elapsed = timed(lambda: ngrams(path, 'wordcounts'))
+        print('{0} documents'.format(len(grams)))
+        print('serial:     {0:.2f}s'.format(elapsed))
+
+        grams, elapsed = timed(lambda: ngrams(path, 'wordcounts',
+                                              workers=workers))
+        print('{0} workers:  {1:.2f}s'.format(workers, elapsed))
+
+        grams, elapsed = timed(lambda: ngrams(path, 'wordcounts', lazy=True))
+        print('lazy:       {0:.2f}s'.format(elapsed))
+        _, elapsed = timed(lambda: grams.counts)
+        print('  + counts: {0:.2f}s'.format(elapsed))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
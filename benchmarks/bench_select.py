@@ -0,0 +1,60 @@
+"""
+Time to select :class:`.Paper`\s from a :class:`.Corpus` by indexed fields.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_select.py [size ...]
+
+For each ``size`` (default 10,000 and 100,000), builds a :class:`.Corpus`
+of that many synthetic WoS-like papers (see ``bench_corpus.py``\), and
+reports the CPU time for:
+
+* a date range (21 years);
+* a date range AND the most-cited reference;
+* a few thousand positional (integer) selectors, together and (the
+  first 1,000) one at a time;
+* :meth:`.Corpus.distribution` (one count per year).
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne import Corpus
+
+from bench_corpus import make_papers
+
+
+def timed(label, f, repeat=10):
+    f()     # Warm up (e.g. import numpy).
+    start = time.process_time()
+    for _ in range(repeat):
+        result = f()
+    print('  {0}: {1:.2f}ms'.format(label, (time.process_time() - start)
+                                    * 1000. / repeat))
+    return result
+
+
+def run(*sizes):
+    for size in sizes or (10000, 100000):
+        corpus = Corpus(make_papers(size), index_by='wosid')
+        citation = max(corpus.indices['citations'].items(),
+                       key=lambda item: len(item[1]))[0]
+        dates = list(range(1990, 2011))
+        positions = list(range(0, size, max(1, size // 5000)))
+
+        print('{0} papers:'.format(size))
+        timed('date range', lambda: corpus[('date', dates)])
+        timed('date range AND citation',
+              lambda: corpus[('date', dates), ('citations', citation)])
+        timed('positions', lambda: corpus[positions])
+        timed('positions, one at a time',
+              lambda: [corpus[i] for i in positions[:1000]])
+        timed('distribution', lambda: corpus.distribution())
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,86 @@
+"""
+Time to build, reopen, and read from a :class:`.StreamingCorpus`\.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_streaming.py [size] [cache_size] [workers]
+
+Builds a streaming corpus of ``size`` synthetic papers (default 100,000),
+reopens it, and then reads papers by position: one full pass, and repeated
+passes over a working set of ``cache_size`` papers (default 1,000). Then
+builds three indices: one at a time, in a single scan, and in a single scan
+with ``workers`` processes (default 4). Reports CPU time (of this process
+only), and the hit rate of the paper cache.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne import Paper, StreamingCorpus
+
+
+def make_papers(size, seed=1):
+    rng = random.Random(seed)
+    for i in range(size):
+        paper = Paper()
+        paper['doi'] = '10.1000/%i' % i
+        paper['title'] = 'Title of paper %i' % i
+        paper['date'] = rng.randint(1950, 2015)
+        paper['citedReferences'] = ['REF %i' % rng.randint(0, size)
+                                    for _ in range(rng.randint(0, 20))]
+        yield paper
+
+
+def _time(label, func):
+    start = time.process_time()
+    value = func()
+    print('{0}: {1:.2f}s'.format(label, time.process_time() - start))
+    return value
+
+
+def run(size=100000, cache_size=1000, workers=4):
+    tmp = tempfile.mkdtemp()
+    try:
+        _time('build', lambda: StreamingCorpus(
+            make_papers(size), index_by='doi', index_fields=['date'],
+            index_features=[], base_path=tmp, name='corpus'))
+        print('files: {0}'.format(len(os.listdir(os.path.join(tmp,
+                                                               'corpus')))))
+
+        corpus = _time('reopen', lambda: StreamingCorpus(
+            base_path=tmp, name='corpus', cache_size=cache_size))
+        papers = corpus.papers
+        _time('full pass', lambda: [papers[i] for i in range(size)])
+
+        corpus.indexed_papers.clear_cache()
+        working_set = random.Random(2).sample(range(size), cache_size)
+        _time('10 passes over working set',
+              lambda: [papers[i] for _ in range(10) for i in working_set])
+        info = corpus.indexed_papers.cache_info()
+        print('cache: {0} hits, {1} misses'.format(info.hits, info.misses))
+
+        def one_at_a_time():
+            for attr in ['title', 'date']:
+                super(StreamingCorpus, corpus).index(attr)
+            super(StreamingCorpus, corpus).index_feature('citedReferences')
+
+        _time('index 3 fields, one at a time', one_at_a_time)
+        _time('index 3 fields, one scan', lambda: corpus.index_batch(
+            attrs=['title', 'date'], features=['citedReferences']))
+        _time('index 3 fields, one scan, {0} workers'.format(workers),
+              lambda: corpus.index_batch(attrs=['title', 'date'],
+                                         features=['citedReferences'],
+                                         workers=workers))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:4]])
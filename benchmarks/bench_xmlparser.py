@@ -0,0 +1,90 @@
+"""
+Throughput and peak memory of the XML parser on the DfR test data.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_xmlparser.py [repeats] [scale]
+
+Reports elements per second (CPU time, best of ``repeats``) for
+:class:`.DfRParser` on ``tethne/tests/data/dfr/citations.XML``, and the peak
+memory allocated while streaming through it with :meth:`.iter_parse`
+(measured separately, with :mod:`tracemalloc`; parsed entries are discarded, so
+this is the parser's own footprint). The same measurements are then repeated on
+a synthetic file with ``scale`` copies of the test records; if the parser runs
+in constant memory, the peak should barely change.
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne.readers.dfr import DfRParser
+
+DATAPATH = os.path.join(os.path.dirname(__file__), '..', 'tethne', 'tests',
+                        'data', 'dfr', 'citations.XML')
+
+
+def count_elements(path):
+    return sum(1 for _ in ET.iterparse(path))
+
+
+def make_scaled(path, scale):
+    """
+    Writes a copy of the citations file at ``path`` with each record repeated
+    ``scale`` times, and returns its path.
+    """
+    with open(path) as f:
+        contents = f.read()
+    start = contents.index('<article ')
+    end = contents.rindex('</article>') + len('</article>')
+    handle, scaled = tempfile.mkstemp(suffix='.xml')
+    with os.fdopen(handle, 'w') as f:
+        f.write(contents[:start])
+        for _ in range(scale):
+            f.write(contents[start:end])
+        f.write(contents[end:])
+    return scaled
+
+
+def measure(path, repeats):
+    elements = count_elements(path)
+
+    best = None
+    for _ in range(repeats):
+        start = time.process_time()
+        DfRParser(path).parse()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    for entry in DfRParser(path).iter_parse():
+        pass
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('{0:>7} KiB, {1} elements in {2:.3f}s: {3:,.0f} elements/s, '
+          'peak memory {4:,.0f} KiB'.format(os.path.getsize(path) // 1024,
+                                            elements, best, elements / best,
+                                            peak / 1024.))
+
+
+def run(repeats=5, scale=20):
+    measure(DATAPATH, repeats)
+
+    scaled = make_scaled(DATAPATH, scale)
+    try:
+        measure(scaled, max(repeats // 2, 1))
+    finally:
+        os.remove(scaled)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,75 @@
+"""
+Time and peak memory for parsing a Zotero RDF export, in memory and streaming.
+
+Run from the repository root::
+
+   $ python benchmarks/bench_zotero_rdf.py [scale]
+
+Builds a synthetic library by repeating the records in the ``zotero2`` test
+export ``scale`` times (with distinct URIs), and then parses it with
+:class:`.ZoteroParser`\, once with the whole file loaded into an
+``rdflib.Graph`` and once with ``streaming=True``. Reports CPU time and peak
+traced memory (``tracemalloc``) for each.
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from tethne.readers.zotero import ZoteroParser
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'tethne', 'tests', 'data',
+                    'zotero2', 'zotero2.rdf')
+
+URI = re.compile('(rdf:(?:about|resource)=")([^"]+)(")')
+
+
+def make_library(path, scale):
+    with open(DATA, 'r') as f:
+        document = f.read()
+    start = document.index('>', document.index('<rdf:RDF')) + 1
+    end = document.rindex('</rdf:RDF>')
+    body = document[start:end]
+
+    with open(path, 'w') as f:
+        f.write(document[:start])
+        for i in range(scale):
+            f.write(URI.sub(lambda m: '%s%s-%i%s' % (m.group(1), m.group(2),
+                                                     i, m.group(3)), body))
+        f.write(document[end:])
+
+
+def measure(path, **kwargs):
+    tracemalloc.start()
+    start = time.process_time()
+    N = sum(1 for _ in ZoteroParser(path, **kwargs).iter_parse())
+    elapsed = time.process_time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return N, elapsed, peak
+
+
+def run(scale=200):
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'library.rdf')
+        make_library(path, scale)
+        print('{0:,} bytes'.format(os.path.getsize(path)))
+        for label, kwargs in [('in memory', {}),
+                              ('streaming', {'streaming': True})]:
+            N, elapsed, peak = measure(path, **kwargs)
+            print('{0}: {1} papers in {2:.2f}s, peak {3:,.0f} KiB'.format(
+                  label, N, elapsed, peak / 1024.))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -29,11 +29,12 @@ setup(
     url=URL,
     version=VERSION,
     packages = PACKAGES,
+    package_data={'tethne.readers': ['_rankedwords.txt.gz']},
     include_package_data=True,
     install_requires=[
         "networkx",
         "iso8601",
-        "rdflib",
+        "rdflib>=6.0,<8",    # The streaming RDF/XML reader uses internals.
         "chardet",
         "html5lib",
         "isodate",
@@ -17,18 +17,57 @@ models, and social influence models.
 
 """
 
-from tethne.classes.paper import Paper
+from tethne.classes.paper import Paper, CompactPaper, Citation
 from tethne.classes.corpus import Corpus
 from tethne.classes.streaming import StreamingCorpus
-from tethne.classes.feature import Feature, FeatureSet, \
+from tethne.classes.feature import Feature, FeatureSet, LazyFeatureSet, \
                                    StructuredFeature, StructuredFeatureSet
-from tethne.classes.graphcollection import GraphCollection
-from tethne.networks.base import *
-from tethne.networks.authors import *
-from tethne.networks.papers import *
-from tethne.networks.features import *
-from tethne.writers.graph import write_graphml, write_csv
 from tethne.writers.corpus import write_documents, write_documents_dtm
-from tethne.model.corpus.mallet import LDAModel
 
 from tethne.utilities import tokenize, normalize
+
+# These depend on networkx (among other things), which is slow to import; they
+#  are imported the first time that they are used. See __getattr__, below.
+_LAZY = {
+    'ColumnarCorpus': 'tethne.classes.columnar',
+    'write_columnar': 'tethne.classes.columnar',
+    'GraphCollection': 'tethne.classes.graphcollection',
+    'cooccurrence': 'tethne.networks.base',
+    'coupling': 'tethne.networks.base',
+    'multipartite': 'tethne.networks.base',
+    'author_papers': 'tethne.networks.authors',
+    'coauthors': 'tethne.networks.authors',
+    'direct_citation': 'tethne.networks.papers',
+    'bibliographic_coupling': 'tethne.networks.papers',
+    'cocitation': 'tethne.networks.papers',
+    'author_coupling': 'tethne.networks.papers',
+    'feature_cooccurrence': 'tethne.networks.features',
+    'mutual_information': 'tethne.networks.features',
+    'keyword_cooccurrence': 'tethne.networks.features',
+    'write_graphml': 'tethne.writers.graph',
+    'write_csv': 'tethne.writers.graph',
+    'LDAModel': 'tethne.model.corpus.mallet',
+}
+
+
+def __getattr__(name):
+    """
+    Imports the members of :data:`._LAZY` (and subpackages, e.g.
+    ``tethne.networks``) on first access.
+    """
+    import importlib
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value     # Don't come back here for this name.
+        return value
+
+    try:
+        return importlib.import_module('tethne.' + name)
+    except ModuleNotFoundError as E:
+        if E.name != 'tethne.' + name:     # A missing dependency.
+            raise
+    raise AttributeError("module 'tethne' has no attribute '%s'" % name)
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY.keys()))
@@ -96,6 +96,12 @@ if __name__ == "__main__":
     readGroup.add_option("-F", "--data-format", dest="dataformat",
                       help="Format of input dataset (WOS, DFR).")
 
+    readGroup.add_option("--columnar", action="store_true", dest="columnar",
+                      default=False,
+                      help="Store the Corpus in the columnar, memory-mapped"+\
+                           " format instead of as a pickle. Later workflow"+\
+                           " steps open it without loading every paper.")
+
     # Options for slice workflow step.
     sliceGroup = OptionGroup(parser, "Options for slice workflow step")
 
@@ -226,6 +232,7 @@ if __name__ == "__main__":
     import tethne.analyze as az
     import tethne.writers as wr
     from tethne.data import Corpus, GraphCollection
+    from tethne.classes.columnar import ColumnarCorpus, write_columnar
     from tethne.builders import authorCollectionBuilder, paperCollectionBuilder
 
     if options.dataset_id is None:
@@ -287,9 +294,14 @@ if __name__ == "__main__":
 
         # Save Corpus for next workflow step.
         savepath = options.temp_dir + "/" + \
-                   options.dataset_id + "_Corpus.pickle"
-        sys.stdout.write("Saving Corpus to {0}...".format(savepath))
-        pickle.dump(D, open(savepath, 'wb'))
+                   options.dataset_id + "_Corpus"
+        if options.columnar:
+            sys.stdout.write("Saving Corpus to {0}...".format(savepath))
+            write_columnar(D, savepath)
+        else:
+            savepath += ".pickle"
+            sys.stdout.write("Saving Corpus to {0}...".format(savepath))
+            pickle.dump(D, open(savepath, 'wb'))
         sys.stdout.write("done.\n")
 
     #############################
@@ -307,11 +319,16 @@ if __name__ == "__main__":
 
         # Load Corpus.
         loadpath = options.temp_dir + "/" + \
-                   options.dataset_id + "_Corpus.pickle"
+                   options.dataset_id + "_Corpus"
+        if not options.columnar:
+            loadpath += ".pickle"
         sys.stdout.write("Loading Corpus from {0}...".format(loadpath))
         sys.stdout.flush()
 
-        D = pickle.load(open(loadpath, 'rb'))
+        if options.columnar:
+            D = ColumnarCorpus(loadpath)
+        else:
+            D = pickle.load(open(loadpath, 'rb'))
         sys.stdout.write("done.\n")
 
         # Slice Corpus
@@ -364,14 +381,16 @@ if __name__ == "__main__":
                         writer.writerow([A_indices[i], dist[i]])
             sys.stdout.write("done.\n")
 
-        # Save sliced Corpus for next workflow step.
-        savepath = options.temp_dir + "/" + \
-                   options.dataset_id + "_Corpus_sliced.pickle"
-        sys.stdout.write("Saving sliced Corpus to {0}..."
+        # Save sliced Corpus for next workflow step. A columnar Corpus is
+        #  read-only; the graph step slices it again from disk.
+        if not options.columnar:
+            savepath = options.temp_dir + "/" + \
+                       options.dataset_id + "_Corpus_sliced.pickle"
+            sys.stdout.write("Saving sliced Corpus to {0}..."
                                                               .format(savepath))
-        sys.stdout.flush()
-        pickle.dump(D, open(savepath, 'wb'))
-        sys.stdout.write("done.\n")
+            sys.stdout.flush()
+            pickle.dump(D, open(savepath, 'wb'))
+            sys.stdout.write("done.\n")
 
     #############################
     #   Workflow step: Graph    #
@@ -390,7 +409,11 @@ if __name__ == "__main__":
         if options.graph_type is None:
             sys.exit('Must specifiy a graph type with --graph-type.')
 
-        if options.merged:
+        if options.columnar:
+            loadpath = options.temp_dir + "/" + \
+                       options.dataset_id + "_Corpus"
+            qualifier = "without" if options.merged else "with"
+        elif options.merged:
             loadpath = options.temp_dir + "/" + \
                        options.dataset_id + "_Corpus.pickle"
             qualifier = "without"
@@ -403,7 +426,10 @@ if __name__ == "__main__":
                                                    .format(qualifier, loadpath))
         sys.stdout.flush()
 
-        D = pickle.load(open(loadpath, 'rb'))
+        if options.columnar:
+            D = ColumnarCorpus(loadpath)
+        else:
+            D = pickle.load(open(loadpath, 'rb'))
         sys.stdout.write("done.\n")
 
         if not options.merged:
@@ -0,0 +1,736 @@
+"""
+A persistent, columnar on-disk format for :class:`.Corpus`\s.
+
+:func:`.write_columnar` stores a :class:`.Corpus` in a directory, and
+:class:`.ColumnarCorpus` opens that directory with every array
+memory-mapped. Selecting, slicing, and building networks from a
+:class:`.ColumnarCorpus` only touches the parts of the files that they need;
+a :class:`.Paper` is only deserialized when it is actually retrieved.
+
+The directory contains:
+
+* ``manifest.json``, which describes the rest of the directory;
+* ``keys.pickle``, the primary keys of the :class:`.Paper`\s, in order;
+* ``columns/``: for each field whose values are all scalars (``str``,
+  ``int``, ``float``), an array of codes (one per :class:`.Paper`\, ``-1``
+  if the field is missing) into a table of unique values;
+* ``records.bin``: the remaining fields of each :class:`.Paper`\, pickled
+  one after another, with their offsets in ``records.offsets.npy``\, and
+  the class of each record (e.g. :class:`.CompactPaper`\) in
+  ``records.classes.npy``\. Cached derived values (e.g. of
+  :attr:`.Paper.authors`\) are not stored;
+* ``indices/``: for each index in :attr:`.Corpus.indices`\, a table of values
+  and the positions of the :class:`.Paper`\s with each value (and vice versa,
+  for :attr:`.Corpus.indices_lookup`\) as CSR arrays;
+* ``features/``: each :class:`.FeatureSet` as a CSR matrix of papers by
+  elements. :class:`.StructuredFeatureSet`\s are pickled whole.
+
+.. code-block:: python
+
+   >>> from tethne.readers.wos import read
+   >>> from tethne.classes.columnar import write_columnar, ColumnarCorpus
+   >>> write_columnar(read('/path/to/wos.txt'), '/path/to/corpus')
+   >>> corpus = ColumnarCorpus('/path/to/corpus')
+   >>> corpus[('date', 1995)]
+   [<tethne.classes.paper.Paper object at 0x10278ea10>, ...]
+
+"""
+
+from collections import Counter, defaultdict
+from itertools import chain
+import importlib
+import json
+import mmap
+import os
+import pickle
+
+import numpy as np
+
+from tethne.classes.corpus import Corpus
+from tethne.classes.paper import Paper, Citation, _fields
+from tethne.classes.feature import Feature, FeatureSet, LazyFeatureSet, \
+                                   StructuredFeatureSet
+from tethne.classes.symbols import SymbolTable, _Indices, _gather, \
+                                   _unique
+
+FORMAT_VERSION = 1
+
+_SCALARS = (str, int, float, type(None))
+
+# Caches of values that are derived from other fields (see
+#  :func:`tethne.classes.paper._cached`), which are rebuilt when needed.
+_DERIVED = frozenset(['_ayjid', '_authors', '_citations'])
+
+
+def _save_pickle(path, obj):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _load_array(path):
+    return np.load(path, mmap_mode='r')
+
+
+def _class_name(cls):
+    return '{0}:{1}'.format(cls.__module__, cls.__qualname__)
+
+
+def _import_class(name):
+    """
+    The record class named ``name`` (``module:qualname``) in a manifest.
+
+    Only subclasses of :class:`.Paper` (or :class:`.Citation`\) are accepted,
+    since their instances are rebuilt from the stored fields.
+    """
+    module, _, qualname = name.partition(':')
+    if not module or not qualname:
+        raise ValueError('{0} is not a record class'.format(name))
+    cls = importlib.import_module(module)
+    for part in qualname.split('.'):
+        cls = getattr(cls, part)
+    if not (isinstance(cls, type) and issubclass(cls, (Paper, Citation))):
+        raise TypeError('{0} is not a Paper class'.format(name))
+    return cls
+
+
+def _stored_fields(paper):
+    """
+    The fields of ``paper`` that are written, without derived caches.
+    """
+    return dict((field, value) for field, value in _fields(paper).items()
+                if field not in _DERIVED)
+
+
+def _csr(rows, dtype):
+    """
+    Flattens ``rows`` (a list of lists) into ``indptr`` and ``data`` arrays.
+    """
+    lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(lengths)
+    data = np.fromiter(chain.from_iterable(rows), dtype=dtype,
+                       count=int(indptr[-1]))
+    return indptr, data
+
+
+class _Codes(object):
+    """
+    Assigns consecutive integer codes to values, in order of appearance.
+
+    ``1``, ``1.0`` and ``True`` are equal (and hash alike), so values are
+    keyed by type as well.
+    """
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __call__(self, value):
+        key = (type(value), value)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def write_columnar(corpus, path):
+    """
+    Writes ``corpus`` to the directory ``path`` in the columnar format.
+
+    Parameters
+    ----------
+    corpus : :class:`.Corpus`
+    path : str
+        Directory in which to store the corpus. Created if it does not exist;
+        files from a previous call are overwritten.
+    """
+    for subdir in ['columns', 'indices', 'features']:
+        if not os.path.exists(os.path.join(path, subdir)):
+            os.makedirs(os.path.join(path, subdir))
+
+    keys = list(corpus.indexed_papers.keys())
+    position = dict((key, i) for i, key in enumerate(keys))
+    _save_pickle(os.path.join(path, 'keys.pickle'), keys)
+
+    # A field is stored as a column if all of its values are scalars.
+    scalar = {}
+    for key in keys:
+        for field, value in _stored_fields(corpus.indexed_papers[key]).items():
+            scalar[field] = scalar.get(field, True) and \
+                            type(value) in _SCALARS
+    columns = dict((field, (np.full(len(keys), -1, dtype=np.int32), _Codes()))
+                   for field, is_scalar in scalar.items() if is_scalar)
+
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    classes = _Codes()
+    class_codes = np.zeros(len(keys), dtype=np.int16)
+    with open(os.path.join(path, 'records.bin'), 'wb') as f:
+        for i, key in enumerate(keys):
+            paper = corpus.indexed_papers[key]
+            class_codes[i] = classes(_class_name(type(paper)))
+            record = {}
+            for field, value in _stored_fields(paper).items():
+                if field in columns:
+                    codes, table = columns[field]
+                    codes[i] = table(value)
+                else:
+                    record[field] = value
+            offsets[i + 1] = offsets[i] + f.write(
+                pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+    np.save(os.path.join(path, 'records.offsets.npy'), offsets)
+    np.save(os.path.join(path, 'records.classes.npy'), class_codes)
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'N': len(keys),
+        'index_by': corpus.index_by,
+        'index_fields': list(corpus.index_fields),
+        'index_features': list(corpus.index_features),
+        'record_classes': classes.values,
+        'columns': {},
+        'indices': {},
+        'features': {},
+    }
+
+    # Field names need not be valid file names.
+    for j, (field, (codes, table)) in enumerate(sorted(columns.items())):
+        stem = os.path.join('columns', 'c%i' % j)
+        np.save(os.path.join(path, stem + '.codes.npy'), codes)
+        _save_pickle(os.path.join(path, stem + '.values.pickle'), table.values)
+        manifest['columns'][field] = stem
+
+    for j, (field, index) in enumerate(corpus.indices.items()):
+        stem = os.path.join('indices', 'i%i' % j)
+        values = list(index.keys())
+        value_ids = dict((value, v) for v, value in enumerate(values))
+        indptr, postings = _csr([[position[key] for key in index[value]
+                                  if key in position] for value in values],
+                                np.int32)
+        lookup = [[value_ids[value] for value in index.values_of(key)
+                   if value in value_ids] for key in keys]
+        lookup_indptr, lookup = _csr(lookup, np.int32)
+
+        _save_pickle(os.path.join(path, stem + '.values.pickle'), values)
+        np.save(os.path.join(path, stem + '.indptr.npy'), indptr)
+        np.save(os.path.join(path, stem + '.postings.npy'), postings)
+        np.save(os.path.join(path, stem + '.lookup_indptr.npy'), lookup_indptr)
+        np.save(os.path.join(path, stem + '.lookup.npy'), lookup)
+        manifest['indices'][field] = stem
+
+    for j, (name, featureset) in enumerate(corpus.features.items()):
+        stem = os.path.join('features', 'f%i' % j)
+        if isinstance(featureset, StructuredFeatureSet):
+            _save_pickle(os.path.join(path, stem + '.pickle'), featureset)
+            manifest['features'][name] = {'stem': stem, 'format': 'pickle'}
+            continue
+
+        fkeys = list(featureset.features.keys())
+        elements, ids, values = _Codes(), [], []
+        for key in fkeys:
+            feature = featureset.features[key]
+            if len(feature) > 0 and type(feature[0]) is not tuple:
+                feature = list(Counter(feature).items())
+            ids.append([elements(elem) for elem, value in feature])
+            values.append([value for elem, value in feature])
+        indptr, ids = _csr(ids, np.int32)
+        _, values = _csr(values, np.float64)
+
+        _save_pickle(os.path.join(path, stem + '.keys.pickle'), fkeys)
+        _save_pickle(os.path.join(path, stem + '.elements.pickle'),
+                     elements.values)
+        np.save(os.path.join(path, stem + '.indptr.npy'), indptr)
+        np.save(os.path.join(path, stem + '.elements.npy'), ids)
+        np.save(os.path.join(path, stem + '.values.npy'), values)
+        manifest['features'][name] = {'stem': stem, 'format': 'csr'}
+
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+class _ColumnarPapers(object):
+    """
+    Read-only, dict-like mapping of primary keys onto :class:`.Paper`\s, which
+    are rebuilt from the columns and records on access.
+    """
+
+    def __init__(self, path, manifest, keys):
+        self.path = path
+        self.keys_ = keys
+        self._positions = None
+        self.columns = [(field, _load_array(os.path.join(path, stem
+                                                         + '.codes.npy')),
+                         os.path.join(path, stem + '.values.pickle'))
+                        for field, stem in manifest['columns'].items()]
+        self._tables = {}
+        self.offsets = _load_array(os.path.join(path, 'records.offsets.npy'))
+        self.classes = [_import_class(name) for name
+                        in manifest.get('record_classes', [])]
+        classes_path = os.path.join(path, 'records.classes.npy')
+        self.class_codes = None     # Written before records had classes.
+        if os.path.exists(classes_path):
+            self.class_codes = _load_array(classes_path)
+        with open(os.path.join(path, 'records.bin'), 'rb') as f:
+            if self.offsets[-1] > 0:
+                self.records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:   # Empty files can't be mapped.
+                self.records = b''
+
+    @property
+    def positions(self):
+        """
+        Maps primary keys onto their positions in :meth:`.keys`\.
+        """
+        if self._positions is None:
+            self._positions = dict((key, i) for i, key
+                                   in enumerate(self.keys_))
+        return self._positions
+
+    def table(self, field, values_path):
+        if field not in self._tables:
+            self._tables[field] = _load_pickle(values_path)
+        return self._tables[field]
+
+    def at(self, i):
+        """
+        Rebuilds the :class:`.Paper` at position ``i``\, as an instance of the
+        class that it was written from.
+        """
+        if self.class_codes is None:
+            paper = Paper()
+        else:
+            paper = self.classes[self.class_codes[i]]()
+        for field, codes, values_path in self.columns:
+            code = codes[i]
+            if code >= 0:
+                setattr(paper, field, self.table(field, values_path)[code])
+        start, end = self.offsets[i], self.offsets[i + 1]
+        for field, value in pickle.loads(self.records[start:end]).items():
+            setattr(paper, field, value)
+        return paper
+
+    def __getitem__(self, key):
+        return self.at(self.positions[key])
+
+    def __contains__(self, key):
+        try:
+            return key in self.positions
+        except TypeError:   # Unhashable.
+            return False
+
+    def __iter__(self):
+        return iter(self.keys_)
+
+    def __len__(self):
+        return len(self.keys_)
+
+    def keys(self):
+        return self.keys_
+
+    def key_at(self, i):
+        return self.keys_[i]
+
+    def values(self):
+        return (self.at(i) for i in range(len(self.keys_)))
+
+    def items(self):
+        return ((key, self.at(i)) for i, key in enumerate(self.keys_))
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+
+class _ColumnarPaperList(object):
+    """
+    Sequence of the :class:`.Paper`\s in a :class:`.ColumnarCorpus`\.
+    """
+
+    def __init__(self, indexed_papers):
+        self.indexed_papers = indexed_papers
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            return [self.indexed_papers.at(j)
+                    for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('list index out of range')
+        return self.indexed_papers.at(i)
+
+    def __iter__(self):
+        return self.indexed_papers.values()
+
+    def __len__(self):
+        return len(self.indexed_papers)
+
+
+class _ColumnarSymbols(SymbolTable):
+    """
+    A :class:`.SymbolTable` whose first IDs are assigned to the primary keys,
+    in order; so the ID of each key is its position. Other values (e.g. in
+    indices that are built after the corpus is opened) are added after them.
+    """
+
+    def __init__(self, indexed_papers):
+        self.indexed_papers = indexed_papers
+        self._ids = None
+        self._values = None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = dict(self.indexed_papers.positions)
+        return self._ids
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = list(self.indexed_papers.keys_)
+        return self._values
+
+
+class _ColumnarIndex(object):
+    """
+    Dict-like mapping of the values of an indexed field onto tuples of primary
+    keys, read from CSR posting arrays.
+
+    Values that are set after the corpus is opened are held in memory.
+    """
+
+    def __init__(self, path, stem, indexed_papers):
+        self.indexed_papers = indexed_papers
+        self.keys_ = indexed_papers.keys_
+        self.values_path = os.path.join(path, stem + '.values.pickle')
+        self.indptr = _load_array(os.path.join(path, stem + '.indptr.npy'))
+        self.postings = _load_array(os.path.join(path, stem + '.postings.npy'))
+        self.lookup_indptr = _load_array(os.path.join(path, stem
+                                                      + '.lookup_indptr.npy'))
+        self.lookup = _load_array(os.path.join(path, stem + '.lookup.npy'))
+        self._values = None
+        self._ids = None
+        self.added = {}
+        self.version = 0
+
+    @property
+    def values_(self):
+        if self._values is None:
+            self._values = _load_pickle(self.values_path)
+        return self._values
+
+    @property
+    def ids(self):
+        """
+        Maps values onto their positions in the table of values.
+        """
+        if self._ids is None:
+            self._ids = dict((value, v) for v, value
+                             in enumerate(self.values_))
+        return self._ids
+
+    def postings_of(self, v):
+        """
+        Positions of the :class:`.Paper`\s with the ``v``th value.
+        """
+        return self.postings[self.indptr[v]:self.indptr[v + 1]]
+
+    def ids_of(self, values):
+        """
+        Positions of the :class:`.Paper`\s with any of ``values``\, as a
+        sorted array. These are also their IDs in :attr:`.Corpus.symbols`
+        (see :class:`._ColumnarSymbols`\).
+        """
+        rows, added = [], []
+        for value in values:
+            if value in self.added:
+                positions = self.indexed_papers.positions
+                added += [positions[key] for key in self.added[value]]
+            elif value in self.ids:
+                rows.append(self.ids[value])
+        rows = np.array(rows, dtype=np.int64)
+        ids = _gather(self.indptr[rows].astype(np.int64),
+                      self.indptr[rows + 1].astype(np.int64), self.postings)
+        if added:
+            ids = _unique(np.concatenate([ids, added]))
+        return ids
+
+    def values_of(self, key):
+        """
+        The values under which ``key`` is indexed, as a tuple.
+        """
+        values = []
+        i = self.indexed_papers.positions.get(key)
+        if i is not None:
+            values = [self.values_[v] for v in
+                      self.lookup[self.lookup_indptr[i]:
+                                  self.lookup_indptr[i + 1]].tolist()]
+        for value, keys in self.added.items():
+            if key in keys and value not in values:
+                values.append(value)
+        return tuple(values)
+
+    def indexed_keys(self):
+        """
+        The keys that are indexed under at least one value.
+        """
+        counts = np.diff(np.asarray(self.lookup_indptr))
+        keys = [self.keys_[i] for i in np.flatnonzero(counts).tolist()]
+        stored = set(keys)
+        for added in self.added.values():
+            for key in added:
+                if key not in stored:
+                    stored.add(key)
+                    keys.append(key)
+        return keys
+
+    def add(self, key, values):
+        """
+        Index ``key`` under each of ``values``\, in memory.
+        """
+        for value in values:
+            if value not in self.added:
+                self.added[value] = list(self[value]) if value in self else []
+            self.added[value].append(key)
+        self.version += 1
+
+    def __getitem__(self, value):
+        if value in self.added:
+            return tuple(self.added[value])
+        return tuple([self.keys_[i] for i in self.postings_of(self.ids[value])])
+
+    def __setitem__(self, value, keys):
+        self.added[value] = list(keys)
+        self.version += 1
+
+    def __contains__(self, value):
+        try:
+            return value in self.added or value in self.ids
+        except TypeError:   # Unhashable.
+            return False
+
+    def __iter__(self):
+        for value in self.values_:
+            yield value
+        for value in self._new_values():
+            yield value
+
+    def _new_values(self):
+        """
+        Values that were set after the corpus was opened, and are not in the
+        table of values.
+        """
+        if not self.added:
+            return []
+        return [value for value in self.added if value not in self.ids]
+
+    def __len__(self):
+        # There is one row in the posting arrays for each value in the table.
+        return len(self.indptr) - 1 + len(self._new_values())
+
+    def keys(self):
+        return list(self.values_) + self._new_values()
+
+    def values(self):
+        return [self[value] for value in self]
+
+    def items(self):
+        return [(value, self[value]) for value in self]
+
+    def get(self, value, default=None):
+        if value in self:
+            return self[value]
+        return default
+
+
+class _CSRFeatureSet(LazyFeatureSet):
+    """
+    A :class:`.FeatureSet` read from a CSR matrix of papers by elements.
+
+    Each :class:`.Feature` is rebuilt from its row the first time that it is
+    accessed; aggregates are computed directly from the arrays.
+    """
+
+    def __init__(self, path, stem):
+        self._keys = _load_pickle(os.path.join(path, stem + '.keys.pickle'))
+        self._elements = _load_pickle(os.path.join(path,
+                                                   stem + '.elements.pickle'))
+        self._indptr = _load_array(os.path.join(path, stem + '.indptr.npy'))
+        self._ids = _load_array(os.path.join(path, stem + '.elements.npy'))
+        self._values = _load_array(os.path.join(path, stem + '.values.npy'))
+        super(_CSRFeatureSet, self).__init__(
+            dict((key, row) for row, key in enumerate(self._keys)),
+            self._load_row)
+
+    def _load_row(self, row):
+        start, end = self._indptr[row], self._indptr[row + 1]
+        return Feature(list(zip([self._elements[i] for i
+                                 in self._ids[start:end].tolist()],
+                                self._values[start:end].tolist())))
+
+    def _materialize(self):
+        N_elements = len(self._elements)
+        ids = np.asarray(self._ids)
+        counts = np.bincount(ids, weights=self._values, minlength=N_elements)
+        documents = np.bincount(ids, minlength=N_elements)
+
+        # Positions of the papers with each element, grouped by element.
+        rows = np.repeat(np.arange(len(self._keys)), np.diff(self._indptr))
+        rows = rows[np.argsort(ids, kind='stable')].tolist()
+        bounds = np.concatenate([[0], np.cumsum(documents)]).tolist()
+
+        self.index = dict(enumerate(self._elements))
+        self.lookup = dict((elem, i) for i, elem in enumerate(self._elements))
+        self.counts = defaultdict(float, enumerate(counts.tolist()))
+        self.documentCounts = Counter(dict(enumerate(
+            documents.astype(float).tolist())))
+        self.with_feature = defaultdict(list)
+        for i in range(N_elements):
+            self.with_feature[i] = [self._keys[row] for row
+                                    in rows[bounds[i]:bounds[i + 1]]]
+
+        # Features that were set after the corpus was opened.
+        for key in self.features.loaded:
+            if key not in self.features.sources:
+                FeatureSet.add(self, key, self.features.loaded[key])
+
+
+class _ColumnarFeatures(dict):
+    """
+    Maps names onto :class:`.FeatureSet`\s, which are opened the first time
+    that they are accessed.
+    """
+
+    def __init__(self, path, manifest):
+        super(_ColumnarFeatures, self).__init__()
+        self.path = path
+        self.stored = manifest
+        for name in manifest:
+            dict.__setitem__(self, name, None)
+
+    def __getitem__(self, name):
+        featureset = dict.__getitem__(self, name)
+        if featureset is None:
+            entry = self.stored[name]
+            if entry['format'] == 'pickle':
+                featureset = _load_pickle(os.path.join(self.path,
+                                                       entry['stem']
+                                                       + '.pickle'))
+            else:
+                featureset = _CSRFeatureSet(self.path, entry['stem'])
+            self[name] = featureset
+        return featureset
+
+    def get(self, name, default=None):
+        if name in self:
+            return self[name]
+        return default
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+
+class ColumnarCorpus(Corpus):
+    """
+    A read-only :class:`.Corpus` backed by a directory written by
+    :func:`.write_columnar`\.
+
+    Supports the same selection, slicing, and feature methods as
+    :class:`.Corpus`\, and can be passed to the network builders in
+    :mod:`tethne.networks`\. New indices (:meth:`.index`\) and featuresets
+    (:meth:`.index_feature`\) can be built, but are held in memory. Papers
+    cannot be added.
+
+    Parameters
+    ----------
+    path : str
+        A directory written by :func:`.write_columnar`\.
+    """
+
+    @property
+    def papers(self):
+        """
+        A sequence of all :class:`.Paper`\s in the :class:`.Corpus`\, which
+        are rebuilt as they are accessed.
+        """
+        return _ColumnarPaperList(self.indexed_papers)
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != FORMAT_VERSION:
+            raise IOError('{0} is not a columnar corpus (version {1})'.format(
+                          path, FORMAT_VERSION))
+
+        self.path = path
+        self.index_by = manifest['index_by']
+        self.index_fields = manifest['index_fields']
+        self.index_features = manifest['index_features']
+        self.slices = []
+        self.duplicate_papers = {}
+        self.ingested = {}
+
+        keys = _load_pickle(os.path.join(path, 'keys.pickle'))
+        self.indexed_papers = _ColumnarPapers(path, manifest, keys)
+        self.symbols = _ColumnarSymbols(self.indexed_papers)
+        self.indices = _Indices(self.symbols)
+        for field, stem in manifest['indices'].items():
+            self.indices[field] = _ColumnarIndex(path, stem,
+                                                 self.indexed_papers)
+        self.features = _ColumnarFeatures(path, manifest['features'])
+
+    def add_papers(self, papers):
+        raise TypeError('Papers cannot be added to a ColumnarCorpus.')
+
+    def _in_order(self, ids):
+        # The ID of each key is its position (see _ColumnarSymbols).
+        return ids
+
+    def column(self, field):
+        """
+        Values of a scalar ``field`` for every :class:`.Paper`\, in the order
+        of :attr:`.indexed_papers`\, without rebuilding the :class:`.Paper`\s.
+
+        Parameters
+        ----------
+        field : str
+
+        Returns
+        -------
+        list
+            ``None`` where a :class:`.Paper` has no value for ``field``.
+        """
+        for name, codes, values_path in self.indexed_papers.columns:
+            if name == field:
+                table = self.indexed_papers.table(field, values_path)
+                values = np.empty(len(table) + 1, dtype=object)
+                values[:-1] = table
+                return values[np.asarray(codes)].tolist()
+        raise KeyError('{0} is not stored as a column'.format(field))
+
+    def subfeatures(self, selector, featureset_name):
+        indices = self.select(selector, index_only=True)
+        featureset = self.features[featureset_name]
+        if isinstance(featureset, StructuredFeatureSet):
+            fclass = StructuredFeatureSet
+        else:
+            fclass = FeatureSet
+        return fclass(dict((k, featureset.features[k]) for k in indices
+                           if k in featureset.features))
+
+    def subcorpus(self, selector):
+        """
+        Generates a new (in-memory) :class:`.Corpus` using the criteria in
+        ``selector``.
+        """
+        return Corpus(self[selector], index_by=self.index_by,
+                      index_fields=list(self.indices.keys()),
+                      index_features=list(self.features.keys()))
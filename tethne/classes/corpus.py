@@ -5,11 +5,13 @@ A :class:`.Corpus` is a container for :class:`.Paper`\s.
 from collections import Counter, defaultdict
 from itertools import chain
 import hashlib
-import copy
 from math import log
+import sys
 
 from tethne.classes.feature import FeatureSet, Feature, \
                                    StructuredFeatureSet, StructuredFeature
+from tethne.classes.symbols import SymbolTable, _Indices, _IndicesLookup, \
+                                   _unique
 from tethne.utilities import _iterable, argsort
 
 import os
@@ -27,6 +29,81 @@ def _filter(s, C, DC):
     return False
 
 
+def _freeze(value):
+    """
+    Immutable version of an index value: lists become tuples, and strings are
+    interned. The value can then be shared by the :class:`.Paper` and the
+    indices, rather than copied.
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    elif type(value) in (list, tuple):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _index_values(paper, attr):
+    """
+    The values of ``attr`` in ``paper``, as they are stored in an index.
+    """
+    values = []
+    value = getattr(paper, attr)
+    for v in _iterable(value):
+        if type(value) is Feature:
+            v_ = v[:-1]
+        else:
+            v_ = v
+
+        if hasattr(v_, '__iter__'):
+            if len(v_) == 1:
+                t = type(v_[0])
+                v_ = t(v_[0])
+        values.append(_freeze(v_))
+    return values
+
+
+def _union(ids):
+    """
+    Sorted IDs in any of the sorted arrays ``ids``\.
+    """
+    import numpy as np    # Imported here; it is slow to import.
+    if len(ids) == 0:
+        return np.empty(0, dtype=np.int64)
+    return _unique(np.concatenate(ids))
+
+
+def _intersection(ids):
+    """
+    Sorted IDs in all of the sorted arrays ``ids``\.
+    """
+    import numpy as np
+    if len(ids) == 0:
+        return np.empty(0, dtype=np.int64)
+    ids = sorted(ids, key=len)      # Smallest first.
+    common = ids[0]
+    for other in ids[1:]:
+        common = np.intersect1d(common, other, assume_unique=True)
+    return common
+
+
+def _feature_of(paper, feature_name, tokenize=None, structured=False):
+    """
+    Builds a :class:`.Feature` (or a :class:`.StructuredFeature`\) from the
+    attribute ``feature_name`` of ``paper``. ``tokenize`` may be None.
+
+    Both classes copy their data into a new list, so the value is not copied
+    here.
+    """
+    if structured:
+        fclass = StructuredFeature
+    else:
+        fclass = Feature
+    value = getattr(paper, feature_name)
+    if tokenize is not None:
+        value = tokenize(value)
+    return fclass(value)
+
+
 class Corpus(object):
     """
     A :class:`.Corpus` represents a collection of :class:`.Paper` instances.
@@ -220,6 +297,63 @@ class Corpus(object):
        <tethne.classes.paper.Paper object at 0x1144ad390>
 
     You can create new indices using :meth:`.index`.
+
+    Each index is a :class:`.SymbolIndex`\, which stores values and
+    identifiers as integer IDs in :attr:`.symbols`\, and decodes them (as a
+    tuple) when they are retrieved. To change an index, use
+    :meth:`.SymbolIndex.add` or assign a new sequence of identifiers to a
+    value.
+
+    .. note::
+
+       This is a backwards-incompatible change. Indices used to be plain dicts
+       of lists, so code that changed a retrieved list in place, e.g.
+       ``corpus.indices['date'][2012].append(key)``\, now raises an
+       ``AttributeError``\. Use ``corpus.indices['date'].add(key, [2012])``
+       instead. Likewise, the mappings in :attr:`.indices_lookup` are
+       read-only.
+    """
+
+    symbols = None
+    """
+    A :class:`.SymbolTable` of the values and identifiers in :attr:`.indices`\,
+    shared by all of the indices in a :class:`.Corpus` instance.
+    """
+
+    @property
+    def indices_lookup(self):
+        """
+        The reverse of :attr:`.indices`\: maps the identifiers of
+        :class:`.Paper`\s onto read-only mappings of their indexed values,
+        keyed by field. Built from :attr:`.indices`\, so changes to an index
+        are reflected here. The mappings are read-only (see the note in
+        :attr:`.indices`\); previously they were plain dicts.
+
+        .. code-block:: python
+
+           >>> corpus.indices_lookup['WOS:000311994600006']['date']
+           (2012,)
+
+        """
+        lookup = self.__dict__.get('_indices_lookup')
+        if lookup is None or lookup.indices is not self.indices:
+            lookup = self._indices_lookup = _IndicesLookup(self.indices)
+        return lookup
+
+    ingested = {}
+    """
+    Data files that have been added with :func:`tethne.readers.ingest`\. Keys
+    are absolute paths, and values are (size, modification time, SHA-1 hash)
+    tuples.
+    """
+
+    feature_settings = {}
+    """
+    How each :class:`.FeatureSet` that was built from the :class:`.Paper`\s
+    (e.g. with :meth:`.index_feature`\) was made. Maps its name onto a
+    ``(structured, tokenized)`` tuple, where ``tokenized`` is True if a
+    ``tokenize`` function was applied. Used by :func:`tethne.readers.ingest`
+    to build features for new papers in the same way.
     """
 
     def __init__(self, papers=[], index_by=None,
@@ -228,7 +362,10 @@ class Corpus(object):
         """
         Parameters
         ----------
-        paper : list
+        papers : iterable
+            :class:`.Paper`\s to add. Can be a generator (e.g. from one of the
+            ``iter_papers`` functions in :mod:`tethne.readers`), in which case
+            papers are indexed one at a time as they are produced.
         index_by : str
         index_fields : str or iterable of strs
         kwargs : kwargs
@@ -237,11 +374,12 @@ class Corpus(object):
 
         self.index_by = index_by
         self.slices = []
-        self.indices = {}
         self.features = {}
         self.duplicate_papers = {}
-        self.indices = defaultdict(dict)
-        self.indices_lookup = defaultdict(dict)
+        self.ingested = {}
+        self.feature_settings = {}
+        self.symbols = SymbolTable()
+        self.indices = _Indices(self.symbols)
         if index_by not in index_fields:
             index_fields.append(index_by)
         self.index_fields = index_fields
@@ -259,6 +397,16 @@ class Corpus(object):
             self._index_paper(paper)
 
     def add_papers(self, papers):
+        """
+        Adds and indexes :class:`.Paper`\s.
+
+        Parameters
+        ----------
+        papers : iterable
+            A list of :class:`.Paper`\s, or a generator (e.g. from one of the
+            ``iter_papers`` functions in :mod:`tethne.readers`). Papers are
+            consumed one at a time, so a generator is never materialized.
+        """
         for paper in papers:
             self._index_paper(paper)
 
@@ -321,31 +469,31 @@ class Corpus(object):
             _, identifier = os.path.split(identifier)
         return identifier    # Identifier is already available.
 
-    def _init_featureset(self, feature_name, structured=False):
+    def _init_featureset(self, feature_name, structured=False,
+                         tokenized=False):
         if structured:
             fsclass = StructuredFeatureSet
         else:
             fsclass = FeatureSet
 
         self.features[feature_name] = fsclass()
+        self.feature_settings[feature_name] = (structured, tokenized)
 
-    def index_paper_by_feature(self, paper, feature_name, tokenize=lambda x: x,
+    def index_paper_by_feature(self, paper, feature_name, tokenize=None,
                                structured=False):
         if not feature_name:
             return
 
-        if structured:
-            fclass = StructuredFeature
-        else:
-            fclass = Feature
-
         if hasattr(paper, feature_name):
             i = self._generate_index(paper)
-            feature = fclass(tokenize(copy.deepcopy(getattr(paper, feature_name))))
+            feature = _feature_of(paper, feature_name, tokenize, structured)
+
+            self._add_feature(i, feature_name, feature)
 
-            self.features[feature_name].add(i, feature)
+    def _add_feature(self, i, feature_name, feature):
+        self.features[feature_name].add(i, feature)
 
-    def index_feature(self, feature_name, tokenize=lambda x: x, structured=False):
+    def index_feature(self, feature_name, tokenize=None, structured=False):
         """
         Creates a new :class:`.FeatureSet` from the attribute ``feature_name``
         in each :class:`.Paper`\.
@@ -356,9 +504,15 @@ class Corpus(object):
         ----------
         feature_name : str
             The name of a :class:`.Paper` attribute.
+        tokenize : callable
+            If given, applied to the value of the attribute in each
+            :class:`.Paper`\.
+        structured : bool
+            If True, builds a :class:`.StructuredFeatureSet`\.
 
         """
-        self._init_featureset(feature_name, structured=structured)
+        self._init_featureset(feature_name, structured=structured,
+                              tokenized=tokenize is not None)
 
         for paper in self.papers:
             self.index_paper_by_feature(paper, feature_name, tokenize, structured)
@@ -369,26 +523,10 @@ class Corpus(object):
             return
 
         if hasattr(paper, attr):
-            value = copy.deepcopy(getattr(paper, attr))
-            for v in _iterable(value):
-                if type(value) is Feature:
-                    v_ = v[:-1]
-                else:
-                    v_ = v
-
-                if hasattr(v_, '__iter__'):
-                    if len(v_) == 1:
-                        t = type(v_[0])
-                        v_ = t(v_[0])
-
-                if v_ not in self.indices[attr]:
-                    self.indices[attr][v_] = []
-                self.indices[attr][v_].append(i)
+            self._add_index_values(i, attr, _index_values(paper, attr))
 
-                # For more efficient lookup later.
-                if attr not in self.indices_lookup[i]:
-                    self.indices_lookup[i][attr] = []
-                self.indices_lookup[i][attr].append(v_)
+    def _add_index_values(self, i, attr, values):
+        self.indices[attr].add(i, values)
 
     def index(self, attr):
         """
@@ -406,15 +544,52 @@ class Corpus(object):
         for i, paper in self.indexed_papers.items():
             self.index_paper_by_attr(paper, attr)
 
+    def index_batch(self, attrs=[], features=[], tokenize=None,
+                    structured=False):
+        """
+        Indexes several attributes, and creates several
+        :class:`.FeatureSet`\s, in a single pass over the :class:`.Paper`\s.
+
+        Equivalent to calling :meth:`.index` for each of ``attrs`` and
+        :meth:`.index_feature` for each of ``features``\, but each
+        :class:`.Paper` is only retrieved once.
+
+        Parameters
+        ----------
+        attrs : list
+            Names of :class:`.Paper` attributes to add to :attr:`.indices`\.
+        features : list
+            Names of :class:`.Paper` attributes from which to build
+            :class:`.FeatureSet`\s.
+        tokenize : callable
+            If given, applied to the value of each attribute in
+            ``features``\.
+        structured : bool
+            If True, ``features`` are built as
+            :class:`.StructuredFeatureSet`\s.
+        """
+        for feature_name in features:
+            self._init_featureset(feature_name, structured=structured,
+                                  tokenized=tokenize is not None)
+
+        for i, paper in self.indexed_papers.items():
+            for attr in attrs:
+                self.index_paper_by_attr(paper, attr)
+            for feature_name in features:
+                self.index_paper_by_feature(paper, feature_name, tokenize,
+                                            structured)
+
 
     def __getitem__(self, selector):
         return self.select(selector)
 
     def __getattr__(self, key):
-        if hasattr(self, key):
-            return getattr(self, key)
-        elif key in self.indices:
-            return self.indices[key]
+        # Only called if ``key`` is not an attribute. Look in ``__dict__`` so
+        #  that a partially-initialized Corpus (e.g. while unpickling) does not
+        #  recurse.
+        indices = self.__dict__.get('indices', {})
+        if key in indices:
+            return indices[key]
         raise AttributeError("Corpus has no such attribute")
 
     def select(self, selector, index_only=False):
@@ -453,6 +628,30 @@ class Corpus(object):
             ...
             <tethne.classes.paper.Paper object at 0x10302f5d0>]
 
+        Selectors on indexed fields can be combined. A tuple of selectors
+        yields the papers that match all of them, and a list of selectors
+        yields the papers that match any of them.
+
+        .. code-block:: python
+
+           >>> corpus[('date', range(1990, 2011)),
+           ...        ('citations', 'DOLE RJ 1952 CELL')]
+           [<tethne.classes.paper.Paper object at 0x103037c10>,
+            ...
+            <tethne.classes.paper.Paper object at 0x10302f5d0>]
+
+           >>> corpus[[('authors', ('DOLE', 'R J')),
+           ...         ('citations', 'DOLE RJ 1952 CELL')]]
+           [<tethne.classes.paper.Paper object at 0x103037c10>,
+            ...
+            <tethne.classes.paper.Paper object at 0x10302f5d0>]
+
+        Papers selected by indexed fields are returned once each (even if
+        they match several values), in the order in which they were added.
+        The posting lists of each index are merged as sorted numpy arrays
+        (see :meth:`.SymbolIndex.ids_of`\), and then put back in that
+        order.
+
         If you prefer to retrieve a :class:`.Corpus` rather than simply a
         list of :class:`.Paper` instances (e.g. to build networks), use
         :meth:`.Corpus.subcorpus`\.
@@ -469,36 +668,35 @@ class Corpus(object):
         """
 
         papers = []
-        if type(selector) is tuple: # Select papers by index.
-            index, value = selector
-            if type(value) is list:  # Set of index values.
-                papers = [p for v in value for p in self.select((index, v), index_only=index_only)]
-            else:
-                if value in self.indices[index]:
-                    if index_only:
-                        papers = self.indices[index][value]
-                    else:
-                        papers = [self.indexed_papers[p] for p  # Single index value.
-                                  in self.indices[index][value]]
-                else:
-                    papers = []
+        if type(selector) is tuple and type(selector[0]) is tuple:
+            # Papers that match every one of several (field, value) selectors.
+            papers = self._decode(_intersection([self._select_ids(s)
+                                                 for s in selector]),
+                                  index_only)
+        elif type(selector) is tuple: # Select papers by index.
+            papers = self._decode(self._select_ids(selector), index_only)
         elif type(selector) is list:
-            if selector[0] in self.indexed_papers:
+            if self._is_key(selector[0]):
                 # Selector is a list of primary indices.
                 if index_only:
                     papers = selector
                 else:
                     papers = [self.indexed_papers[s] for s in selector]
+            elif type(selector[0]) is tuple:
+                # Papers that match any of several (field, value) selectors.
+                papers = self._decode(_union([self._select_ids(s)
+                                              for s in selector]),
+                                      index_only)
             elif type(selector[0]) is int:
+                keys = self._keys_at(selector)
                 if index_only:
-                    papers = [list(self.indexed_papers.keys())[i] for i in selector]
+                    papers = keys
                 else:
-                    papers = [self.papers[i] for i in selector]
+                    papers = [self.indexed_papers[key] for key in keys]
         elif type(selector) is int:
-            if index_only:
-                papers = list(self.indexed_papers.keys())[selector]
-            else:
-                papers = self.papers[selector]
+            papers = self._keys_at([selector])[0]
+            if not index_only:
+                papers = self.indexed_papers[papers]
 
         elif type(selector) in [str, str]:
             if selector in self.indexed_papers:
@@ -508,6 +706,71 @@ class Corpus(object):
                     papers = self.indexed_papers[selector]
         return papers
 
+    def _select_ids(self, selector):
+        """
+        IDs (in :attr:`.symbols`\) of the papers that match a single
+        ``(field, value)`` selector, as a sorted numpy array. ``value`` may be
+        a list, set, or range of values.
+        """
+        index, value = selector
+        if type(value) not in (list, set, range):
+            value = [value]
+        return self.indices[index].ids_of(value)
+
+    def _decode(self, ids, index_only=False):
+        keys = self.symbols.decode(self._in_order(ids).tolist())
+        if index_only:
+            return list(keys)
+        return [self.indexed_papers[key] for key in keys]
+
+    def _is_key(self, key):
+        try:
+            return key in self.indexed_papers
+        except TypeError:   # Unhashable, e.g. a (field, [values]) selector.
+            return False
+
+    def _in_order(self, ids):
+        """
+        Sorts the IDs (in :attr:`.symbols`\) of primary keys into the order
+        in which their :class:`.Paper`\s were added. A key may have been
+        interned earlier as the value of another index (e.g. an ``ayjid``
+        that is also a citation), so the IDs themselves are not in that order.
+        """
+        if len(ids) < 2:
+            return ids
+        import numpy as np
+
+        # Papers are only ever added, so only new keys need positions.
+        positions = self.__dict__.get('_key_positions')
+        if positions is None:
+            positions = self._key_positions = {}
+        N = len(self.indexed_papers)
+        if len(positions) < N:
+            intern = self.symbols.intern
+            for i, key in zip(range(len(positions), N),
+                              self._keys_at(range(len(positions), N))):
+                positions.setdefault(intern(key), i)
+
+        order = np.fromiter((positions[i] for i in ids.tolist()),
+                            dtype=np.int64, count=len(ids))
+        return ids[np.argsort(order, kind='stable')]
+
+    def _keys_at(self, positions):
+        """
+        The primary keys of the :class:`.Paper`\s at ``positions``\, in the
+        order in which they were added.
+        """
+        indexed_papers = self.indexed_papers
+        if hasattr(indexed_papers, 'key_at'):
+            return [indexed_papers.key_at(i) for i in positions]
+
+        # Papers are only ever added, so the list only needs to be rebuilt
+        #  when the number of papers changes.
+        keys = self.__dict__.get('_key_list')
+        if keys is None or len(keys) != len(indexed_papers):
+            keys = self._key_list = list(indexed_papers.keys())
+        return [keys[i] for i in positions]
+
     def slice(self, window_size=1, step_size=1, cumulative=False,
               count_only=False, subcorpus=True, feature_name=None):
         """
@@ -575,7 +838,7 @@ class Corpus(object):
             else:
                 year = start
             if count_only:
-                yield year, len(self.select(selector))
+                yield year, len(self._select_ids(selector))
             elif feature_name:
                 yield year, self.subfeatures(selector, feature_name)
             elif subcorpus:
@@ -708,7 +971,7 @@ class Corpus(object):
         return self.features[featureset_name].top(topn, by=by)
 
     def subfeatures(self, selector, featureset_name):
-        indices = self.select(selector, index_only=True)
+        indices = set(self.select(selector, index_only=True))
         fclass = self.features[featureset_name].__class__
 
         return fclass({k:f for k,f in list(self.features[featureset_name].items())
@@ -6,11 +6,15 @@ Classes in this module provide structures for additional data about
 from collections import Counter, defaultdict
 
 from tethne.utilities import _iterable
-try:    # Might as well use numpy if it is available.
-    import numpy as np
-    argsort = lambda l: list(np.argsort(l))
-except ImportError:
-    from tethne.utilities import argsort
+from tethne.utilities import argsort as _argsort
+
+
+def argsort(l):
+    try:    # Might as well use numpy if it is available.
+        import numpy as np    # Imported here; it is slow to import.
+    except ImportError:
+        return _argsort(l)
+    return list(np.argsort(l))
 
 import logging
 logger = logging.getLogger('feature')
@@ -20,6 +24,54 @@ logger.setLevel('WARNING')
 from itertools import chain
 # import zip
 from collections import Counter, defaultdict
+import sys
+
+_MISSING = object()
+
+
+def _intern(elem):
+    """
+    Interned version of a feature element (see :func:`sys.intern`\): a string,
+    or a tuple of strings (e.g. an author name). Other values are returned
+    unchanged.
+    """
+    if type(elem) is str:
+        return sys.intern(elem)
+    if type(elem) is tuple and all([type(e) is str for e in elem]):
+        return tuple([sys.intern(e) for e in elem])
+    return elem
+
+
+def _share_elements(feature, lookup, index):
+    """
+    Registers the elements of ``feature`` (a list of ``(element, value)``
+    tuples) in ``lookup`` and ``index``\, and replaces each element in
+    ``feature`` with the instance that is stored in ``index``\, so that every
+    :class:`.Feature` in a :class:`.FeatureSet` shares a single copy of each
+    element. Yields ``(i, value)`` for each element.
+    """
+    for k, (elem, value) in enumerate(feature):
+        i = lookup.get(elem)
+        if i is None:
+            i = len(lookup)
+            shared = _intern(elem)
+            lookup[shared] = i
+            index[i] = shared
+        else:
+            shared = index[i]
+        if shared is not elem:
+            feature[k] = (shared, value)
+        yield i, value
+
+
+def _elements(feature):
+    """
+    The (element, value) pairs in ``feature``\, as counted by
+    :meth:`.BaseFeatureSet.add`\.
+    """
+    if len(feature) > 0 and type(feature[0]) is not tuple:
+        return list(Counter(feature).items())
+    return feature
 
 
 
@@ -400,16 +452,120 @@ class BaseFeatureSet(object):
         if type(feature[0]) is not tuple:
             feature = list(Counter(feature).items())
 
-        for elem, value in feature:
-            i = self.lookup.get(elem, len(self.lookup))
-
-            self.lookup[elem] = i
-            self.index[i] = elem
-
+        for i, value in _share_elements(feature, self.lookup, self.index):
             self.counts[i] += value
             self.documentCounts[i] += 1.
             self.with_feature[i].append(paper_id)
 
+    def copy(self, ids=None):
+        """
+        Copy this featureset, optionally giving the papers new IDs.
+
+        A :class:`.LazyFeatureSet` is copied into a :class:`.FeatureSet`\.
+
+        Parameters
+        ----------
+        ids : dict
+            Maps paper IDs in this featureset onto new IDs. IDs that are not in
+            ``ids`` are kept. If several papers get the same ID, the last one
+            is kept.
+
+        Returns
+        -------
+        :class:`.BaseFeatureSet`
+        """
+        cls = FeatureSet if isinstance(self, LazyFeatureSet) else type(self)
+        copied = cls.__new__(cls)
+        copied._setUp()
+        copied._fold(self, ids)
+        return copied
+
+    def merge(self, other, ids=None, other_ids=None, inplace=False):
+        """
+        Combine this featureset with ``other``\.
+
+        Aggregate data (:attr:`.counts`\, :attr:`.lookup`\, etc) are combined
+        directly, rather than rebuilt from each of the features.
+
+        Where both featuresets have a feature for the same paper, the feature
+        from this featureset is kept.
+
+        Parameters
+        ----------
+        other : :class:`.BaseFeatureSet`
+        ids : dict
+            New IDs for the papers in this featureset (see :meth:`.copy`\).
+        other_ids : dict
+            New IDs for the papers in ``other``\.
+        inplace : bool
+            If True, ``other`` is merged into this featureset, which is
+            returned. ``ids`` can't be used.
+
+        Returns
+        -------
+        :class:`.BaseFeatureSet`
+        """
+        if inplace:
+            if ids is not None:
+                raise ValueError('`ids` cannot be used with `inplace`')
+            merged = self
+        else:
+            merged = self.copy(ids)
+        merged._fold(other, other_ids)
+        return merged
+
+    def _fold(self, other, ids=None):
+        """
+        Add the features in ``other`` (with paper IDs mapped through ``ids``)
+        for papers that are not already in this featureset.
+        """
+        if ids is None:
+            rename = lambda paper_id: paper_id
+        else:
+            rename = lambda paper_id: ids.get(paper_id, paper_id)
+
+        kept = {}   # New ID -> paper ID in ``other``.
+        for paper_id in other.features:
+            new_id = rename(paper_id)
+            if new_id not in self.features:
+                kept[new_id] = paper_id
+
+        # Papers in ``other`` that are not kept don't contribute to aggregates.
+        dropped = set()
+        dropped_counts = Counter()
+        dropped_documents = Counter()
+        for paper_id in other.features:
+            if kept.get(rename(paper_id), _MISSING) == paper_id:
+                continue
+            dropped.add(paper_id)
+            for elem, value in _elements(other.features[paper_id]):
+                i = other.lookup[elem]
+                dropped_counts[i] += value
+                dropped_documents[i] += 1.
+
+        lookup = self.lookup
+        index = self.index
+        for i, elem in other.index.items():
+            documents = other.documentCounts.get(i, 0) - dropped_documents[i]
+            if documents <= 0:
+                continue
+            j = lookup.get(elem)
+            if j is None:
+                j = len(lookup)
+                lookup[elem] = j
+                index[j] = elem
+
+            self.counts[j] += other.counts.get(i, 0) - dropped_counts[i]
+            self.documentCounts[j] += documents
+            postings = other.with_feature.get(i, [])
+            if ids is not None or dropped_documents[i]:
+                postings = [rename(paper_id) for paper_id in postings
+                            if paper_id not in dropped]
+            self.with_feature[j].extend(postings)
+
+        for new_id, paper_id in kept.items():
+            self.features[new_id] = other.features[paper_id]
+
 
     def top(self, topn, by='counts'):
         """
@@ -502,34 +658,25 @@ class FeatureSet(BaseFeatureSet):
 
         logger.debug('Initialize FeatureSet with %i features' % len(features))
         self.features = features
-        allfeatures = [v for v in chain(*list(features.values()))]
-        logger.debug('features: {0}; allfeatures: {1}'.format(len(features), len(allfeatures)))
-        if len(features) > 0 and len(allfeatures) > 0:
-            allfeatures_keys = list(zip(*allfeatures))[0]
-
-            for i, elem in enumerate(set(allfeatures_keys)):
-                self.index[i] = elem
-                self.lookup[elem] = i
-                logger.debug('Add feature {0} with index {1}'.format(elem, i))
-
-            self.counts = defaultdict(float)
-            for elem, v in allfeatures:
-                i = self.lookup[elem]
-                self.counts[i] += v
-            self.documentCounts = Counter([self.lookup[elem]
-                                           for elem
-                                           in allfeatures_keys])
-
-            self.with_feature = defaultdict(list)
-            for paper_id, counts in list(features.items()):
-                try:
-                    for elem in list(zip(*counts))[0]:
-                        i = self.lookup[elem]
-                        self.with_feature[i].append(paper_id)
-                except IndexError:    # A Paper may not have any features.
-                    pass
-
 
+        # Build the index and aggregate counts in a single pass.
+        lookup = self.lookup
+        index = self.index
+        counts = defaultdict(float)
+        documentCounts = Counter()
+        with_feature = defaultdict(list)
+        for paper_id, feature in features.items():
+            for i, v in _share_elements(feature, lookup, index):
+                counts[i] += v
+                documentCounts[i] += 1
+                with_feature[i].append(paper_id)
+
+        logger.debug('features: {0}; unique: {1}'.format(len(features),
+                                                         len(lookup)))
+        if len(lookup) > 0:
+            self.counts = counts
+            self.documentCounts = documentCounts
+            self.with_feature = with_feature
 
     def transform(self, func):
         """
@@ -622,6 +769,113 @@ class FeatureSet(BaseFeatureSet):
         return vect
 
 
+class _LazyFeatures(object):
+    """
+    Dict-like mapping of paper IDs onto :class:`.Feature`\s that are only
+    loaded (by ``loader``) the first time that they are accessed.
+    """
+
+    def __init__(self, sources, loader):
+        self.sources = sources
+        self.loader = loader
+        self.loaded = {}
+
+    def __getitem__(self, key):
+        try:
+            return self.loaded[key]
+        except KeyError:
+            feature = self.loader(self.sources[key])
+            self.loaded[key] = feature
+            return feature
+
+    def __setitem__(self, key, feature):
+        self.loaded[key] = feature
+
+    def __contains__(self, key):
+        return key in self.loaded or key in self.sources
+
+    def __iter__(self):
+        for key in self.sources:
+            yield key
+        for key in self.loaded:
+            if key not in self.sources:
+                yield key
+
+    def __len__(self):
+        return len(self.sources) + len([key for key in self.loaded
+                                        if key not in self.sources])
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+
+class LazyFeatureSet(FeatureSet):
+    """
+    A :class:`.FeatureSet` whose :class:`.Feature`\s are loaded on demand.
+
+    Each paper's :class:`.Feature` is loaded the first time that it is
+    accessed. Aggregate data (e.g. :attr:`.counts`, :attr:`.lookup`) require
+    every :class:`.Feature`\, and so are only built the first time that they
+    are needed.
+
+    Parameters
+    ----------
+    sources : dict
+        Maps paper IDs onto whatever ``loader`` needs to load their features
+        (e.g. a file path).
+    loader : callable
+        Takes a value from ``sources``, and returns a :class:`.Feature`\. Must
+        be picklable (e.g. a module-level function) if the
+        :class:`.LazyFeatureSet` is to be pickled.
+    """
+
+    _aggregates = set(['index', 'lookup', 'counts', 'documentCounts',
+                       'with_feature'])
+
+    def __init__(self, sources, loader):
+        self.features = _LazyFeatures(sources, loader)
+
+    def __getattr__(self, name):
+        # Only called if ``name`` has not been set yet.
+        if name in LazyFeatureSet._aggregates and 'features' in self.__dict__:
+            self._materialize()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    @property
+    def loaded(self):
+        """
+        The number of :class:`.Feature`\s that have been loaded so far.
+        """
+        return len(self.features.loaded)
+
+    def add(self, paper_id, feature):
+        self.lookup     # Aggregates must be built before they are updated.
+        super(LazyFeatureSet, self).add(paper_id, feature)
+
+    def _materialize(self):
+        logger.debug('Build aggregates for {0} lazy features'.format(
+                     len(self.features)))
+        self.index = {}
+        self.lookup = {}
+        self.counts = defaultdict(float)
+        self.documentCounts = Counter()
+        self.with_feature = defaultdict(list)
+        for paper_id in self.features:
+            self.add(paper_id, self.features[paper_id])
+
+
 def feature(f):
     """
     Decorator for properties that should be represented as :class:`.Feature`\s.
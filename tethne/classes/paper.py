@@ -2,9 +2,64 @@
 A :class:`.Paper` represents a single bibliographic record.
 """
 
+from collections import namedtuple
+import sys
+
 from tethne.classes.feature import Feature, feature
 
 
+FeatureCacheInfo = namedtuple('FeatureCacheInfo', ['hits', 'misses'])
+
+_FEATURE_CACHE = {'hits': 0, 'misses': 0}
+
+
+def feature_cache_info():
+    """
+    Hits and misses of the cached :class:`.Feature` properties of
+    :class:`.Paper`\s (:attr:`.Paper.authors`\, :attr:`.Paper.citations`\)
+    since the last call to :func:`.reset_feature_cache_info`\.
+
+    Returns
+    -------
+    :class:`.FeatureCacheInfo`
+    """
+    return FeatureCacheInfo(_FEATURE_CACHE['hits'], _FEATURE_CACHE['misses'])
+
+
+def reset_feature_cache_info():
+    _FEATURE_CACHE['hits'] = 0
+    _FEATURE_CACHE['misses'] = 0
+
+
+def _cached(attr, sources):
+    """
+    Decorator for properties that are derived from the fields ``sources``\.
+
+    The value is stored in ``attr``, along with the source values that it was
+    derived from, and is only recomputed if one of those fields is set to a
+    different object (or is set or deleted). Changes made in place (e.g.
+    appending to a list) are not detected, and the cached value is shared, so
+    both should be treated as read-only.
+    """
+    def deco(f):
+        def wrapper(self):
+            current = tuple([getattr(self, source, None) for source in sources])
+            try:
+                derived_from, value = getattr(self, attr)
+            except AttributeError:
+                pass
+            else:
+                if all([a is b for a, b in zip(derived_from, current)]):
+                    _FEATURE_CACHE['hits'] += 1
+                    return value
+            _FEATURE_CACHE['misses'] += 1
+            value = f(self)
+            setattr(self, attr, (current, value))
+            return value
+        return wrapper
+    return deco
+
+
 class Paper(object):
     """
     Tethne's representation of a bibliographic record.
@@ -61,11 +116,13 @@ class Paper(object):
         else:
             journal = ''
 
-        self._ayjid = ' '.join([al, ai.replace(' ', ''), date, journal]).strip().replace(' ', '_').upper()
+        ayjid = ' '.join([al, ai.replace(' ', ''), date, journal]).strip().replace(' ', '_').upper()
+        self._ayjid = sys.intern(ayjid)     # Shared by all citing papers.
         return self._ayjid
 
 
     @property
+    @_cached('_authors', ('authors_full', 'authors_init'))
     @feature
     def authors(self):
         """
@@ -89,6 +146,7 @@ class Paper(object):
 
 
     @property
+    @_cached('_citations', ('citedReferences',))
     @feature
     def citations(self):
         """
@@ -102,3 +160,115 @@ class Paper(object):
         if hasattr(self, 'citedReferences'):
             return [cr.ayjid for cr in self.citedReferences if cr is not None]
         return []
+
+
+_SLOT_NAMES = {}
+
+
+def _slot_names(cls):
+    try:
+        return _SLOT_NAMES[cls]
+    except KeyError:
+        pass
+    names = []
+    for klass in cls.__mro__:
+        for name in klass.__dict__.get('__slots__', ()):
+            if name not in ('__dict__', '__weakref__', '_frozen'):
+                names.append(name)
+    _SLOT_NAMES[cls] = names
+    return names
+
+
+def _fields(paper):
+    """
+    Maps the names of the fields that are set on ``paper`` onto their values,
+    whether they are stored in slots (e.g. :class:`.CompactPaper`\) or in the
+    instance ``__dict__``.
+    """
+    fields = {}
+    for name in _slot_names(type(paper)):
+        try:
+            fields[name] = getattr(paper, name)
+        except AttributeError:  # Not set.
+            pass
+    fields.update(getattr(paper, '__dict__', {}))
+    return fields
+
+
+class CompactPaper(Paper):
+    """
+    A :class:`.Paper` that stores the fields used by the WoS and DfR readers
+    in slots, rather than in a per-instance ``__dict__``\.
+
+    Behaves exactly like a :class:`.Paper`\. Other fields can still be set;
+    the instance ``__dict__`` is only created when they are. Use
+    :func:`._fields` rather than ``__dict__`` to get all of the fields of a
+    :class:`.CompactPaper`\.
+    """
+
+    __slots__ = (
+        # Web of Science.
+        'ISSN', 'abstract', 'authorAddress', 'authorKeywords', 'authors_full',
+        'authors_init', 'bookSeriesSubtitle', 'bookSeriesTitle',
+        'citationCount', 'citedReferences', 'conferenceDate',
+        'conferenceHost', 'conferenceLocation', 'conferenceSponsors',
+        'conferenceTitle', 'date', 'documentType', 'doi', 'editors',
+        'emailAddress', 'funding', 'groupAuthors', 'isoSource', 'issue',
+        'journal', 'keywordsPlus', 'language', 'pageEnd', 'pageStart',
+        'publisher', 'publisherAddress', 'publisherCity', 'reprintAddress',
+        'subject', 'timesCited', 'title', 'volume', 'wosid',
+        # Web of Science tags without a field name.
+        'AR', 'EI', 'FX', 'GA', 'OI', 'PD', 'PG', 'PM', 'PT', 'RI', 'SI', 'SU',
+        'WC',
+        # JSTOR Data-for-Research.
+        'pagerange', 'spage', 'epage', 'sub',
+        # Set by Paper and Corpus.
+        '_ayjid', '_authors', '_citations', 'hashIndex',
+    )
+
+
+_CITATION_FIELDS = ('authors_init', 'authors_full', 'date', 'journal',
+                    'volume', 'pageStart', 'doi', 'title')
+
+
+class Citation(object):
+    """
+    A lightweight, slotted record for a cited reference.
+
+    Supports the same field access (``citation['date']``, ``citation.date``)
+    and derived fields (:attr:`.ayjid`\, :attr:`.authors`\) as a
+    :class:`.Paper`\, but only the fields that are parsed from cited
+    references can be set.
+
+    Parsers share a single :class:`.Citation` among all of the records that
+    cite the same reference, and freeze it first: setting or deleting one of
+    its fields then raises an ``AttributeError``\.
+    """
+
+    __slots__ = _CITATION_FIELDS + ('_ayjid', '_authors', 'hashIndex',
+                                    '_frozen')
+
+    __setitem__ = Paper.__setitem__
+    __getitem__ = Paper.__getitem__
+    ayjid = Paper.ayjid
+    authors = Paper.authors
+
+    def __setattr__(self, name, value):
+        if name in _CITATION_FIELDS and getattr(self, '_frozen', False):
+            raise AttributeError('Citation is read-only: cannot set %s' % name)
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        if name in _CITATION_FIELDS and getattr(self, '_frozen', False):
+            raise AttributeError('Citation is read-only: cannot delete %s'
+                                 % name)
+        object.__delattr__(self, name)
+
+    def __setstate__(self, state):
+        # ``state`` is (None, slots); restore a frozen citation as-is.
+        for name, value in state[1].items():
+            object.__setattr__(self, name, value)
+
+    def _freeze(self):
+        object.__setattr__(self, '_frozen', True)
+
@@ -1,19 +1,151 @@
-from tethne.classes.corpus import Corpus
+from tethne.classes.corpus import Corpus, _index_values, _feature_of
 
+from collections import OrderedDict, namedtuple
+from multiprocessing import Pool
+import importlib
 import pickle
 import os
+import struct
+import tempfile
+import zlib
 
 
-# TODO: persist the index and data.
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_LOG_MAGIC = b'TETHNE-LOG-1\n'
+_RECORD_HEADER = struct.Struct('<II')   # Length and CRC-32 of a record.
+
+
+def _append_log(path, records):
+    """
+    Appends ``records`` (picklable objects) to the log at ``path``\. Each
+    record is prefixed with its length and checksum, so that an interrupted
+    write can be detected by :func:`._read_log`\.
+    """
+    with open(path, 'ab') as f:
+        if f.tell() == 0:
+            f.write(_LOG_MAGIC)
+        for record in records:
+            data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(_RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data)
+
+
+def _read_log(path):
+    """
+    Reads the records in the log at ``path``\.
+
+    Reading stops at the first record that is incomplete or corrupt (e.g. an
+    interrupted write), and the log is truncated there so that records that
+    are appended later can be read.
+
+    Returns
+    -------
+    list
+    """
+    records = []
+    if not os.path.exists(path):
+        return records
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        magic = f.read(len(_LOG_MAGIC))
+        if magic != _LOG_MAGIC:
+            if not _LOG_MAGIC.startswith(magic):
+                raise IOError('%s is not a tethne log' % path)
+            end = 0     # The first write was interrupted.
+        else:
+            while True:
+                end = f.tell()
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                length, checksum = _RECORD_HEADER.unpack(header)
+                if end + _RECORD_HEADER.size + length > size:
+                    break
+                data = f.read(length)
+                if zlib.crc32(data) != checksum:
+                    break
+                try:
+                    records.append(pickle.loads(data))
+                except Exception:
+                    break
+    if end < size:
+        with open(path, 'r+b') as f:
+            f.truncate(end)
+    return records
+
+
+def _read_segment(path, entries, serializer):
+    """
+    Yields ``(key, paper)`` for each of ``entries`` (``(key, offset, length)``
+    tuples, sorted by offset) in the segment file at ``path``.
+    """
+    with open(path, 'rb') as f:
+        for key, offset, length in entries:
+            if f.tell() != offset:      # Skip replaced papers.
+                f.seek(offset)
+            yield key, serializer.loads(f.read(length))
+
+
+def _index_segment(args):
+    """
+    Extracts index values and :class:`.Feature`\s from the papers in a
+    segment. Module-level so that it can be used with
+    :class:`multiprocessing.Pool`\.
+    """
+    path, entries, serializer, attrs, features, tokenize, structured = args
+    serializer = importlib.import_module(serializer)
+    results = []
+    for key, paper in _read_segment(path, entries, serializer):
+        values = dict((attr, _index_values(paper, attr)) for attr in attrs
+                      if attr and hasattr(paper, attr))
+        fvalues = dict((name, _feature_of(paper, name, tokenize, structured))
+                       for name in features if name and hasattr(paper, name))
+        results.append((key, values, fvalues))
+    return results
+
 
 class StreamingIndex(object):
-    def __init__(self, name='index', base_path='.', serializer=pickle):
+    """
+    A persistent, dict-like store of :class:`.Paper`\s on disk.
+
+    Serialized papers are appended to packed segment files
+    (``segment-00000.bin``, ...) in batches of ``batch_size``; the location of
+    each paper is recorded in an append-only manifest (``manifest.log``), in
+    checksummed batches. An interrupted write to the manifest is discarded
+    when the store is reopened. If
+    ``name`` already contains a store, it is reopened: the manifest is only
+    read the first time that it is needed, and papers are only read when they
+    are accessed.
+
+    Papers that have not been written yet are held in memory; call
+    :meth:`.flush` to write them.
+
+    The ``cache_size`` most recently used papers are kept in memory, so
+    repeated access does not read and deserialize them again. Note that
+    cached papers are shared: changes to a :class:`.Paper` that was retrieved
+    are seen by later retrievals (until it is evicted), but are not written
+    to disk. See :meth:`.cache_info` for hit and miss counts.
+    """
+
+    def __init__(self, name='index', base_path='.', serializer=pickle,
+                 batch_size=1000, segment_size=2**26, cache_size=1000):
         """
 
         Parameters
         ----------
-        basepath : str
+        name : str
+            Name of the store, a subdirectory of ``base_path``.
+        base_path : str
             Location of the disk cache.
+        serializer : module
+            Must provide ``dumps`` and ``loads`` (e.g. :mod:`pickle`\).
+        batch_size : int
+            Number of papers to hold in memory before writing them.
+        segment_size : int
+            Approximate maximum size (in bytes) of each segment file.
+        cache_size : int
+            Maximum number of papers to keep in the cache. ``0`` disables the
+            cache.
         """
         if not os.path.exists(base_path):
             raise IOError('No such directory')
@@ -24,41 +156,170 @@ class StreamingIndex(object):
         if not os.path.exists(self.index_path):
             os.mkdir(self.index_path)
 
-        self.key_file_map = {}
-
         self.serializer = serializer
+        self.batch_size = batch_size
+        self.segment_size = segment_size
+        self.cache_size = cache_size
+
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._locations = None
+        self._keys = None       # In order of first addition.
+        self._segment = None    # The segment that is being written.
+        self.pending = {}
+        self._handles = {}
+
+    @property
+    def locations(self):
+        """
+        Maps keys onto ``(segment, offset, length)`` locations, in the order
+        that they were first added.
+        """
+        if self._locations is None:
+            self._locations = self._read_manifest()
+            self._keys = list(self._locations.keys())
+        return self._locations
+
+    def key_at(self, i):
+        """
+        The key at position ``i``, in order of first addition.
+        """
+        self.locations
+        return self._keys[i]
+
+    def cache_info(self):
+        """
+        Returns
+        -------
+        :class:`.CacheInfo`
+            Cache hits, misses, maximum size, and current size.
+        """
+        return CacheInfo(self.hits, self.misses, self.cache_size,
+                         len(self.cache))
+
+    def clear_cache(self):
+        """
+        Empties the cache, and resets the hit and miss counts.
+        """
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _manifest_path(self):
+        return os.path.join(self.index_path, 'manifest.log')
+
+    def _segment_path(self, segment):
+        return os.path.join(self.index_path, 'segment-%05i.bin' % segment)
+
+    def _read_manifest(self):
+        locations = {}
+        for batch in _read_log(self._manifest_path()):
+            for key, location in batch:
+                locations[key] = location
+        return locations
+
+    def flush(self):
+        """
+        Writes any papers that are held in memory to disk.
+        """
+        if not self.pending:
+            return
+
+        # Reading the manifest also discards an interrupted write at its end.
+        locations = self.locations
+        if self._segment is None:
+            self._segment = max([0] + [location[0] for location
+                                       in locations.values()])
+        segment = self._segment
+        while os.path.exists(self._segment_path(segment)) and \
+                os.path.getsize(self._segment_path(segment)) >= self.segment_size:
+            segment += 1
+        self._segment = segment
+
+        batch = []
+        with open(self._segment_path(segment), 'ab') as f:
+            offset = f.tell()
+            for key, data in self.pending.items():
+                f.write(data)
+                batch.append((key, (segment, offset, len(data))))
+                offset += len(data)
+
+        # The data are written before the manifest refers to them.
+        _append_log(self._manifest_path(), [batch])
+
+        for key, location in batch:
+            locations[key] = location
+        self.pending = {}
+
+    def close(self):
+        """
+        Writes any pending papers, and closes open segment files.
+        """
+        self.flush()
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+    def __getstate__(self):
+        self.flush()
+        state = self.__dict__.copy()
+        state['_handles'] = {}
+        state['cache'] = OrderedDict()
+        return state
 
     def __len__(self):
-        return len(self.key_file_map)
+        self.locations
+        return len(self._keys)
 
     def items(self):
-        keys = list(self.key_file_map.keys())
-        while keys:
-            key = keys.pop()
+        for key in self.keys():
             yield key, self[key]
 
     def iteritems(self):
         return list(self.items())
 
-    def _friendly_filename(self, name):
-        return "".join([c for c in name if c.isalnum()])
-
-    def _build_path(self, name):
-        return os.path.join(self.index_path, name)
-
     def __setitem__(self, key, paper):
-        fname = self._friendly_filename(key)
-        fpath = self._build_path(fname)
-        with open(fpath, 'wb') as f:
-            self.serializer.dump(paper, f)
-
-        self.key_file_map[key] = fname
+        if key not in self.pending and key not in self.locations:
+            self._keys.append(key)
+        self.cache.pop(key, None)
+        self.pending[key] = self.serializer.dumps(paper)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
 
     def __contains__(self, key):
-        return key in self.key_file_map
+        return key in self.pending or key in self.locations
+
+    def __iter__(self):
+        return iter(self.keys())
 
     def keys(self):
-        return list(self.key_file_map.keys())
+        self.locations
+        return list(self._keys)
+
+    def segments(self):
+        """
+        Maps segment numbers onto lists of ``(key, offset, length)``\, sorted
+        by offset.
+        """
+        segments = {}
+        for key, (segment, offset, length) in self.locations.items():
+            segments.setdefault(segment, []).append((key, offset, length))
+        for entries in segments.values():
+            entries.sort(key=lambda entry: entry[1])
+        return segments
+
+    def scan(self):
+        """
+        Yields every ``(key, paper)`` in a single sequential read of the
+        segment files, in the order that they are stored. Bypasses the cache.
+        """
+        self.flush()
+        for segment, entries in sorted(self.segments().items()):
+            for key, paper in _read_segment(self._segment_path(segment),
+                                            entries, self.serializer):
+                yield key, paper
 
     def values(self):
         raise NotImplementedError('values() is not available in StreamingIndex')
@@ -67,19 +328,60 @@ class StreamingIndex(object):
         for key, paper in data.items():
             self.__setitem__(key, paper)
 
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def _read(self, location):
+        segment, offset, length = location
+        if segment not in self._handles:
+            self._handles[segment] = open(self._segment_path(segment), 'rb')
+        handle = self._handles[segment]
+        handle.seek(offset)
+        return handle.read(length)
+
     def __getitem__(self, key):
-        if key not in self.key_file_map:
+        try:
+            paper = self.cache[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return paper
+
+        self.misses += 1
+        if key in self.pending:
+            paper = self.serializer.loads(self.pending[key])
+        elif key in self.locations:
+            paper = self.serializer.loads(self._read(self.locations[key]))
+        else:
             raise KeyError('No such key')
 
-        fpath = self._build_path(self.key_file_map[key])
-        with open(fpath, 'rb') as f:
-            paper = self.serializer.load(f)
+        if self.cache_size > 0:
+            self.cache[key] = paper
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)  # Least recently used.
         return paper
 
 
 class StreamingCorpus(Corpus):
     """
     Provides memory-friendly access to large collections of metadata.
+
+    :class:`.Paper`\s are kept in a :class:`.StreamingIndex` on disk, in the
+    directory ``name`` under ``base_path``. If ``name`` is not given, a new
+    directory is created. If ``name`` contains a corpus that was saved
+    earlier, that corpus is reopened (including its indices and features)
+    and ``papers`` are added to it.
+
+    .. code-block:: python
+
+       >>> corpus = StreamingCorpus(papers, index_by='wosid', name='mycorpus')
+       >>> # ...later...
+       >>> corpus = StreamingCorpus(name='mycorpus')
+
     """
 
     index_class = StreamingIndex
@@ -89,27 +391,223 @@ class StreamingCorpus(Corpus):
         class PList(object):
             def __init__(self, parent):
                 self.parent = parent
-                
+
             def __getitem__(self, key):
-                return self.parent.indexed_papers[list(self.parent.indexed_papers.keys())[key]]
+                indexed_papers = self.parent.indexed_papers
+                if type(key) is slice:
+                    return [indexed_papers[indexed_papers.key_at(i)]
+                            for i in range(*key.indices(len(indexed_papers)))]
+                return indexed_papers[indexed_papers.key_at(key)]
 
             def __iter__(self):
-                keys = list(self.parent.indexed_papers.keys())
-                while keys:
-                    key = keys.pop()
+                for key in self.parent.indexed_papers.keys():
                     yield self.parent.indexed_papers[key]
 
-        return PList(self)
+            def __len__(self):
+                return len(self.parent.indexed_papers)
 
-    def __init__(self, *args, **kwargs):
-        base_path = kwargs.get('base_path', '.tethne')
-        serializer = kwargs.get('serializer', pickle)
-        self.index_kwargs.update({
-            'base_path': base_path,
-            'serializer':serializer
-        })
+        return PList(self)
 
+    def __init__(self, papers=[], *args, **kwargs):
+        base_path = kwargs.pop('base_path', '.tethne')
+        serializer = kwargs.pop('serializer', pickle)
+        name = kwargs.pop('name', None)
+        cache_size = kwargs.pop('cache_size', 1000)
         if not os.path.exists(base_path):
             os.mkdir(base_path)
+        if name is None:
+            name = os.path.basename(tempfile.mkdtemp(prefix='index-',
+                                                     dir=base_path))
+        self.index_kwargs = {
+            'name': name,
+            'base_path': base_path,
+            'serializer': serializer,
+            'cache_size': cache_size,
+        }
+
+        self._journal = []
+        super(StreamingCorpus, self).__init__([], *args, **kwargs)
+
+        self._generation = 0
+        state_path = self._state_path()
+        if os.path.exists(state_path):  # Reopen an existing corpus.
+            with open(state_path, 'rb') as f:
+                self.__dict__.update(pickle.load(f))
+            self._journal = None        # Replay without journaling.
+            for generation, entries in _read_log(self._log_path()):
+                if generation == self._generation:
+                    self._replay(entries)
+        self._journal = []
+        self._saved = self._settings()
+        self.add_papers(papers)
+
+    _state = ['index_by', 'index_fields', 'index_features', 'symbols',
+              'indices', 'features', 'duplicate_papers', 'ingested',
+              'feature_settings', '_generation']
+
+    # Settings that are small enough to be written to the log in full.
+    _settings_state = ['index_by', 'index_fields', 'index_features',
+                       'duplicate_papers', 'ingested']
+
+    # The log is only compacted once it is larger than this (in bytes).
+    compact_size = 2**20
+
+    def _state_path(self):
+        return os.path.join(self.indexed_papers.index_path, 'corpus.pickle')
+
+    def _log_path(self):
+        return os.path.join(self.indexed_papers.index_path, 'corpus.log')
+
+    def _settings(self):
+        return dict((attr, pickle.loads(pickle.dumps(getattr(self, attr))))
+                    for attr in self._settings_state)
+
+    def _replay(self, entries):
+        for entry in entries:
+            if entry[0] == 'index':
+                self._add_index_values(*entry[1:])
+            elif entry[0] == 'feature':
+                self._add_feature(*entry[1:])
+            elif entry[0] == 'featureset':
+                self._init_featureset(*entry[1:])
+            elif entry[0] == 'settings':
+                self.__dict__.update(entry[1])
+
+    def _add_index_values(self, i, attr, values):
+        super(StreamingCorpus, self)._add_index_values(i, attr, values)
+        if self._journal is not None:
+            self._journal.append(('index', i, attr, values))
+
+    def _add_feature(self, i, feature_name, feature):
+        super(StreamingCorpus, self)._add_feature(i, feature_name, feature)
+        if self._journal is not None:
+            self._journal.append(('feature', i, feature_name, feature))
+
+    def _init_featureset(self, feature_name, structured=False,
+                         tokenized=False):
+        super(StreamingCorpus, self)._init_featureset(feature_name,
+                                                      structured=structured,
+                                                      tokenized=tokenized)
+        if self._journal is not None:
+            self._journal.append(('featureset', feature_name, structured,
+                                  tokenized))
+
+    def flush(self):
+        """
+        Writes pending :class:`.Paper`\s, indices, and features to disk, so
+        that this corpus can be reopened.
+
+        Only the changes since the last flush are written: they are appended
+        to a log (``corpus.log``), which is replayed when the corpus is
+        reopened. When the log grows larger than the last complete snapshot
+        (``corpus.pickle``), it is replaced by a new snapshot (see
+        :meth:`.compact`\).
+        """
+        self.indexed_papers.flush()
+        state_path, log_path = self._state_path(), self._log_path()
+        if not os.path.exists(state_path):
+            self.compact()
+            return
+
+        settings = self._settings()
+        if self._journal or settings != self._saved:
+            entries = self._journal + [('settings', settings)]
+            _append_log(log_path, [(self._generation, entries)])
+            self._journal = []
+            self._saved = settings
+
+        if os.path.exists(log_path) and os.path.getsize(log_path) > \
+                max(os.path.getsize(state_path), self.compact_size):
+            self.compact()
+
+    def compact(self):
+        """
+        Writes a complete snapshot of the indices and features to disk, and
+        discards the log of changes.
+
+        Changes that are made directly to :attr:`.indices` or
+        :attr:`.features` (rather than with :meth:`.add_papers`\,
+        :meth:`.index`\, etc) are only saved by :meth:`.compact`\.
+        """
+        self.indexed_papers.flush()
+        self._generation += 1
+        state = dict((attr, getattr(self, attr)) for attr in self._state)
+        state_path = self._state_path()
+        with open(state_path + '.tmp', 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(state_path + '.tmp', state_path)
+
+        # Entries from earlier generations are ignored, so the snapshot is
+        #  valid even if the log cannot be removed.
+        if os.path.exists(self._log_path()):
+            os.remove(self._log_path())
+        self._journal = []
+        self._saved = self._settings()
+
+    def add_papers(self, papers):
+        super(StreamingCorpus, self).add_papers(papers)
+        self.flush()
+
+    def index(self, attr):
+        self.index_batch(attrs=[attr])
+
+    def index_feature(self, feature_name, tokenize=None, structured=False):
+        self.index_batch(features=[feature_name], tokenize=tokenize,
+                         structured=structured)
+
+    def index_batch(self, attrs=[], features=[], tokenize=None,
+                    structured=False, workers=None):
+        """
+        Indexes several attributes, and creates several
+        :class:`.FeatureSet`\s, in a single sequential scan over the
+        :class:`.StreamingIndex`\.
+
+        See :meth:`.Corpus.index_batch`\.
+
+        Parameters
+        ----------
+        attrs : list
+        features : list
+        tokenize : callable
+            Must be picklable (e.g. a module-level function) if ``workers`` is
+            used.
+        structured : bool
+        workers : int
+            If greater than 1, segments are read in a pool of this many
+            processes. The serializer must be an importable module.
+        """
+        for feature_name in features:
+            self._init_featureset(feature_name, structured=structured,
+                                  tokenized=tokenize is not None)
+
+        store = self.indexed_papers
+        store.flush()
+        segments = sorted(store.segments().items())
+        if workers and workers > 1 and len(segments) > 1:
+            jobs = [(store._segment_path(segment), entries,
+                     store.serializer.__name__, attrs, features, tokenize,
+                     structured) for segment, entries in segments]
+            pool = Pool(min(workers, len(jobs)))
+            try:
+                # imap preserves the order of ``jobs``, so the result does not
+                #  depend on which worker finishes first.
+                for results in pool.imap(_index_segment, jobs):
+                    self._add_batch(results)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for key, paper in store.scan():
+                for attr in attrs:
+                    self.index_paper_by_attr(paper, attr)
+                for feature_name in features:
+                    self.index_paper_by_feature(paper, feature_name, tokenize,
+                                                structured)
+        self.flush()
 
-        super(StreamingCorpus, self).__init__(*args, **kwargs)
+    def _add_batch(self, results):
+        for key, values, fvalues in results:
+            for attr, v in values.items():
+                self._add_index_values(key, attr, v)
+            for feature_name, feature in fvalues.items():
+                self._add_feature(key, feature_name, feature)
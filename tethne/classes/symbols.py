@@ -0,0 +1,430 @@
+"""
+Integer IDs for the values that are repeated throughout a :class:`.Corpus`
+(author names, journals, citation keys, primary keys, etc).
+
+A :class:`.Corpus` keeps a single :class:`.SymbolTable`\, and its
+:attr:`.Corpus.indices` store IDs from that table in compact arrays. Values
+are only decoded when they are retrieved, so :attr:`.Corpus.indices` and
+:attr:`.Corpus.indices_lookup` behave like dicts of the original values.
+Retrieved values are tuples (or read-only mappings), since changing a
+decoded copy would not change the index.
+
+.. code-block:: python
+
+   >>> corpus.symbols.intern(('DOLE', 'R J'))
+   1042
+   >>> corpus.symbols[1042]
+   ('DOLE', 'R J')
+
+"""
+
+from array import array
+from itertools import chain
+from types import MappingProxyType
+import sys
+
+# Type code for arrays of IDs (C int; 32 bits).
+ID_TYPECODE = 'i'
+
+
+class SymbolTable(object):
+    """
+    Assigns a unique, sequential integer ID to each hashable value.
+
+    Strings are interned (see :func:`sys.intern`) as they are added, so that
+    equal strings elsewhere (e.g. in the :class:`.Paper`\s) can share the
+    same object.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value):
+        """
+        Get the ID of ``value``\, adding it to the table if necessary.
+
+        Parameters
+        ----------
+        value : object
+            Must be hashable.
+
+        Returns
+        -------
+        int
+        """
+        try:
+            return self.ids[value]
+        except KeyError:
+            if type(value) is str:
+                value = sys.intern(value)
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+            return i
+
+    def get(self, value, default=None):
+        """
+        Get the ID of ``value`` without adding it to the table.
+        """
+        return self.ids.get(value, default)
+
+    def decode(self, ids):
+        """
+        The values with IDs ``ids``\, as a tuple.
+        """
+        values = self.values
+        return tuple([values[i] for i in ids])
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def __contains__(self, value):
+        return value in self.ids
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _append(table, i, x):
+    """
+    Append the ID ``x`` to the entry for ``i`` in ``table``\. A single ID is
+    stored as a plain int, and only becomes an array when a second ID is
+    added.
+    """
+    try:
+        current = table[i]
+    except KeyError:
+        table[i] = x
+        return
+    if type(current) is int:
+        table[i] = array(ID_TYPECODE, [current, x])
+    else:
+        current.append(x)
+
+
+def _ids(entry):
+    """
+    The IDs in an entry made by :func:`._append`\.
+    """
+    if type(entry) is int:
+        return (entry,)
+    return entry
+
+
+def _unique(ids):
+    """
+    Sorted, unique copy of the numpy array ``ids``\. Faster than
+    :func:`numpy.unique` for the short integer arrays in posting lists.
+    """
+    import numpy as np    # Imported here; it is slow to import.
+    ids = np.sort(ids)
+    if len(ids) > 1:
+        ids = ids[np.concatenate(([True], ids[1:] != ids[:-1]))]
+    return ids
+
+
+def _gather(starts, ends, ids):
+    """
+    The sorted, unique IDs in the slices ``ids[starts[j]:ends[j]]``\.
+    """
+    import numpy as np
+    lengths = ends - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return _unique(ids[np.arange(lengths.sum()) + offsets])
+
+
+class SymbolIndex(object):
+    """
+    Dict-like mapping of the values of an indexed field onto tuples of primary
+    keys (see :attr:`.Corpus.indices`\). Use :meth:`.add`\, or assign a new
+    sequence of keys to a value, to change the index.
+
+    Both values and keys are stored as IDs in a shared :class:`.SymbolTable`\.
+    For each value, the IDs of the keys with that value are kept in an
+    :class:`array.array` (a "posting list"); the IDs of the values of each
+    key are kept in the same way, for :attr:`.Corpus.indices_lookup`\. Many
+    fields have a single value per key (e.g. ``date``), or a single key per
+    value (e.g. ``wosid``), so an entry with only one ID is stored as an int.
+    The values of a key are usually added all at once, so their array is
+    allocated at its final size.
+
+    :meth:`.ids_of` (used by :meth:`.Corpus.select`\) works on sorted numpy
+    copies of the posting lists, which are built when they are first needed
+    and discarded whenever the index changes.
+
+    Parameters
+    ----------
+    symbols : :class:`.SymbolTable`
+    data : dict
+        Optional. Maps values onto lists of keys.
+    """
+
+    def __init__(self, symbols, data={}):
+        self.symbols = symbols
+        self.postings = {}      # Value ID -> key ID(s).
+        self.key_values = {}    # Key ID -> value ID(s).
+        self._frozen = None     # See _posting_arrays.
+        self.version = 0        # Incremented whenever the index changes.
+        for value, keys in data.items():
+            self[value] = keys
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_frozen'] = None     # Rebuilt when needed.
+        return state
+
+    def _changed(self):
+        self._frozen = None
+        self.version += 1
+
+    def _posting_arrays(self):
+        """
+        All of the posting lists, as sorted numpy arrays: the value IDs, the
+        start and end of the postings of each value, and the key IDs. Built
+        the first time that they are needed after the index changes.
+        """
+        if self._frozen is None:
+            import numpy as np
+            postings = self.postings
+            lengths = np.fromiter((1 if type(entry) is int else len(entry)
+                                   for entry in postings.values()),
+                                  dtype=np.int64, count=len(postings))
+            value_ids = np.repeat(np.fromiter(postings, dtype=np.int64,
+                                              count=len(postings)), lengths)
+            key_ids = np.fromiter(chain.from_iterable(
+                                      _ids(entry) for entry in postings.values()),
+                                  dtype=np.int64, count=int(lengths.sum()))
+            order = np.lexsort((key_ids, value_ids))
+            value_ids, key_ids = value_ids[order], key_ids[order]
+            values = _unique(value_ids)
+            self._frozen = (values,
+                            np.searchsorted(value_ids, values, 'left'),
+                            np.searchsorted(value_ids, values, 'right'),
+                            key_ids)
+        return self._frozen
+
+    def ids_of(self, values):
+        """
+        The IDs of the keys that are indexed under any of ``values``\.
+
+        Parameters
+        ----------
+        values : list
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            Sorted and unique.
+        """
+        import numpy as np
+        get = self.symbols.get
+        query = [v for v in (get(value) for value in values) if v is not None]
+        if len(query) == 1:     # No need to (re)build the posting arrays.
+            entry = self.postings.get(query[0], ())
+            return _unique(np.array(_ids(entry), dtype=np.int64))
+
+        value_ids, starts, ends, key_ids = self._posting_arrays()
+        query = np.array(query, dtype=np.int64)
+        rows = np.searchsorted(value_ids, query)
+        found = rows < len(value_ids)
+        rows = rows[found]
+        rows = rows[value_ids[rows] == query[found]]
+        return _gather(starts[rows], ends[rows], key_ids)
+
+    def add(self, key, values):
+        """
+        Index ``key`` under each of ``values``\.
+
+        Parameters
+        ----------
+        key : object
+            A primary key.
+        values : list
+            Hashable values.
+        """
+        intern = self.symbols.intern
+        postings = self.postings
+        key_values = self.key_values
+        k = intern(key)
+        ids = [intern(value) for value in values]
+        for v in ids:
+            _append(postings, v, k)
+        if k in key_values:
+            for v in ids:
+                _append(key_values, k, v)
+        elif len(ids) == 1:
+            key_values[k] = ids[0]
+        elif ids:
+            key_values[k] = array(ID_TYPECODE, ids)
+        self._changed()
+
+    def values_of(self, key):
+        """
+        The values under which ``key`` is indexed, in the order in which they
+        were added, as a tuple.
+        """
+        k = self.symbols.get(key)
+        if k is None or k not in self.key_values:
+            return ()
+        return self.symbols.decode(_ids(self.key_values[k]))
+
+    def indexed_keys(self):
+        """
+        The keys that are indexed under at least one value.
+        """
+        return list(self.symbols.decode(self.key_values))
+
+    def __getitem__(self, value):
+        v = self.symbols.get(value)
+        if v is None or v not in self.postings:
+            raise KeyError(value)
+        return self.symbols.decode(_ids(self.postings[v]))
+
+    def __setitem__(self, value, keys):
+        if value in self:
+            del self[value]
+        for key in keys:
+            self.add(key, [value])
+        if not keys:
+            self.postings[self.symbols.intern(value)] = array(ID_TYPECODE)
+            self._changed()
+
+    def __delitem__(self, value):
+        v = self.symbols.get(value)
+        if v is None or v not in self.postings:
+            raise KeyError(value)
+        self._changed()
+        for k in set(_ids(self.postings.pop(v))):
+            remaining = [i for i in _ids(self.key_values[k]) if i != v]
+            if len(remaining) > 1:
+                self.key_values[k] = array(ID_TYPECODE, remaining)
+            elif remaining:
+                self.key_values[k] = remaining[0]
+            else:
+                del self.key_values[k]
+
+    def __contains__(self, value):
+        v = self.symbols.get(value)
+        return v is not None and v in self.postings
+
+    def __iter__(self):
+        values = self.symbols.values
+        for v in self.postings:
+            yield values[v]
+
+    def __len__(self):
+        return len(self.postings)
+
+    def keys(self):
+        return list(iter(self))
+
+    def values(self):
+        decode = self.symbols.decode
+        return [decode(_ids(keys)) for keys in self.postings.values()]
+
+    def items(self):
+        values = self.symbols.values
+        decode = self.symbols.decode
+        return [(values[v], decode(_ids(keys)))
+                for v, keys in self.postings.items()]
+
+    def get(self, value, default=None):
+        if value in self:
+            return self[value]
+        return default
+
+
+class _Indices(dict):
+    """
+    Maps field names onto :class:`.SymbolIndex`\es that share a
+    :class:`.SymbolTable`\, which are created the first time that they are
+    accessed. Plain dicts that are assigned to a field are converted.
+
+    ``version`` is incremented whenever an index is added or removed.
+    """
+
+    def __init__(self, symbols):
+        super(_Indices, self).__init__()
+        self.symbols = symbols
+        self.version = 0
+
+    def __missing__(self, attr):
+        index = self[attr] = SymbolIndex(self.symbols)
+        return index
+
+    def __setitem__(self, attr, index):
+        if isinstance(index, dict):
+            index = SymbolIndex(self.symbols, index)
+        super(_Indices, self).__setitem__(attr, index)
+        self.version += 1
+
+    def __delitem__(self, attr):
+        super(_Indices, self).__delitem__(attr)
+        self.version += 1
+
+    def __reduce__(self):
+        return (self.__class__, (self.symbols,), None, None,
+                iter(self.items()))
+
+
+class _IndicesLookup(object):
+    """
+    Maps primary keys onto read-only mappings of their indexed values (as
+    tuples), keyed by field (see :attr:`.Corpus.indices_lookup`\). Built from
+    ``indices`` as it is accessed, so it cannot be changed directly.
+
+    The mapping for the most recent key is kept until the next key is looked
+    up, or until any of the ``indices`` change (see ``version``\).
+    """
+
+    def __init__(self, indices):
+        self.indices = indices
+        self._last = (None, None, None)     # Key, versions, mapping.
+
+    def __reduce__(self):
+        return (self.__class__, (self.indices,))
+
+    def _versions(self):
+        return (self.indices.version,) + tuple([
+            getattr(index, 'version', 0) for index in self.indices.values()])
+
+    def __getitem__(self, key):
+        versions = self._versions()
+        last_key, last_versions, last = self._last
+        if last_versions == versions and last_key == key:
+            return last
+
+        lookup = {}
+        for attr, index in self.indices.items():
+            values = index.values_of(key)
+            if values:
+                lookup[attr] = values
+        lookup = MappingProxyType(lookup)
+        self._last = (key, versions, lookup)
+        return lookup
+
+    def __contains__(self, key):
+        return len(self[key]) > 0
+
+    def __iter__(self):
+        seen = set()
+        for index in list(self.indices.values()):
+            for key in index.indexed_keys():
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def keys(self):
+        return list(iter(self))
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def get(self, key, default=None):
+        lookup = self[key]
+        if lookup:
+            return lookup
+        return default
@@ -4,6 +4,7 @@ Methods for parsing bibliographic datasets.
 .. autosummary::
 
    merge
+   ingest
    dfr
    wos
    zotero
@@ -14,7 +15,11 @@ a :class:`.Corpus` instance.
 
 """
 
-from tethne import Paper, Corpus
+import hashlib
+import os
+
+from tethne import Paper, Corpus, StreamingCorpus
+from tethne.classes.paper import _fields
 
 class DataError(Exception):
     def __init__(self, value):
@@ -22,9 +27,117 @@ class DataError(Exception):
     def __str__(self):
         return repr(self.value)
 
-# TODO: merge FeatureSets.
+def _norm(value):
+    if type(value) in [str, str]:
+        return value.strip().lower()
+    return value
+
+
+_UNHASHABLE = object()
+
+
+def _block_key(value):
+    """
+    A hashable form of a normalized field value, for blocking. Lists are
+    converted to tuples; values that still can't be hashed are
+    ``_UNHASHABLE``.
+    """
+    if type(value) is list:
+        value = tuple(value)
+    try:
+        hash(value)
+    except TypeError:
+        return _UNHASHABLE
+    return value
+
+
+def _blocking_keys(paper, block_by):
+    """
+    The key(s) produced by ``block_by`` for ``paper``\, as a list. ``None`` is
+    not a key.
+    """
+    keys = block_by(paper)
+    if type(keys) not in [list, set]:
+        keys = [keys]
+    return [key for key in keys if key is not None]
+
+
+def _field_candidates(papers_1, papers_2, fields):
+    """
+    Yields pairs of positions in ``papers_1`` and ``papers_2`` that have the
+    same (normalized) value for at least one of ``fields``\.
+    """
+    blocks = {}     # (field, value) -> positions in papers_2.
+    always = []     # Positions with unhashable values; these can't be blocked.
+    for j, paper in enumerate(papers_2):
+        for field in fields:
+            if not hasattr(paper, field):
+                continue
+            key = _block_key(_norm(getattr(paper, field)))
+            if key is _UNHASHABLE:
+                always.append(j)
+            else:
+                blocks.setdefault((field, key), []).append(j)
+
+    for i, paper in enumerate(papers_1):
+        candidates = set(always)
+        for field in fields:
+            if not hasattr(paper, field):
+                continue
+            key = _block_key(_norm(getattr(paper, field)))
+            if key is _UNHASHABLE:      # Compare with everything.
+                candidates.update(range(len(papers_2)))
+            else:
+                candidates.update(blocks.get((field, key), []))
+        for j in sorted(candidates):
+            yield i, j
+
+
+def _key_candidates(papers_1, papers_2, block_by):
+    """
+    Yields pairs of positions in ``papers_1`` and ``papers_2`` that share at
+    least one key from ``block_by``\.
+    """
+    blocks = {}
+    for j, paper in enumerate(papers_2):
+        for key in _blocking_keys(paper, block_by):
+            blocks.setdefault(key, []).append(j)
+
+    for i, paper in enumerate(papers_1):
+        candidates = set()
+        for key in _blocking_keys(paper, block_by):
+            candidates.update(blocks.get(key, []))
+        for j in sorted(candidates):
+            yield i, j
+
+
+def _neighborhood_candidates(papers_1, papers_2, block_by, window):
+    """
+    Sorted-neighborhood blocking: the papers from both corpora are sorted by
+    their ``block_by`` key(s), and each paper in ``papers_1`` is paired with the
+    papers from ``papers_2`` that are within ``window`` places of it.
+    """
+    entries = []
+    for side, papers in enumerate([papers_1, papers_2]):
+        for position, paper in enumerate(papers):
+            for key in _blocking_keys(paper, block_by):
+                entries.append((key, side, position))
+
+    # Keys of different types (e.g. str and int) are not comparable.
+    entries.sort(key=lambda entry: (type(entry[0]).__name__, entry[0]))
+
+    pairs = set()
+    for k, (key, side, i) in enumerate(entries):
+        if side != 0:
+            continue
+        for _, other_side, j in entries[max(k - window, 0):k + window + 1]:
+            if other_side == 1:
+                pairs.add((i, j))
+    return sorted(pairs)
+
+
 def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
-          index_by='ayjid'):
+          index_by='ayjid', block_by=None, window=None):
     """
     Combines two :class:`.Corpus` instances.
 
@@ -39,6 +152,14 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
     Where two matched :class:`.Paper`\s have values for the same field, values
     from the :class:`.Paper` instance in ``corpus_1`` will always be  preferred.
 
+    Rather than comparing every :class:`.Paper` in ``corpus_1`` with every
+    :class:`.Paper` in ``corpus_2``\, only candidate pairs are compared. When
+    matching on fields, candidates are the pairs that have the same value for
+    at least one of the fields in ``match_by`` (found with a hash index), which
+    gives exactly the same result. When ``match_by`` is a callable, candidates
+    can be limited with ``block_by`` and/or ``window``\; otherwise all pairs are
+    compared.
+
     Parameters
     ----------
     corpus_1 : :class:`.Corpus`
@@ -57,6 +178,16 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
         The field to use as the primary indexing field in the new
         :class:`.Corpus`\. Default is `ayjid`, since this is virtually always
         available.
+    block_by : callable
+        Accepts a :class:`.Paper` and returns a blocking key (or a list of
+        keys, or None). Only :class:`.Paper`\s that share a key are compared.
+    window : int
+        If set, uses sorted-neighborhood blocking instead: the
+        :class:`.Paper`\s from both corpora are sorted by their ``block_by``
+        key (by default, the first field in ``match_by``\), and only those
+        within ``window`` places of each other are compared. This tolerates
+        small differences in the key (e.g. in spelling), but may miss matches.
+        If ``match_by`` is a callable, ``block_by`` is required.
 
     Returns
     -------
@@ -72,68 +203,105 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
        >>> dfr_corpus = dfr.read("/Path/to/DfR")
        >>> corpus = merge(wos_corpus, dfr_corpus)
 
-    """
+    Papers with similar titles, published in the same year:
 
-    def norm(value):
-        if type(value) in [str, str]:
-            return value.strip().lower()
-        return value
+    .. code-block:: python
 
+       >>> def similar(p1, p2):
+       ...     return p1.date == p2.date and \\
+       ...            p1.title.lower()[:40] == p2.title.lower()[:40]
+       >>> corpus = merge(wos_corpus, dfr_corpus, match_by=similar,
+       ...                block_by=lambda p: p.title.lower(), window=5)
+
+    """
+
+    if window and block_by is None and callable(match_by):
+        raise ValueError('block_by is required to use window with a callable'
+                         ' match_by')
+
+    # Iterating over a Corpus selects each Paper by position, which rebuilds
+    #  the list of Papers each time.
+    papers_1 = [corpus_1.indexed_papers[key]
+                for key in corpus_1.indexed_papers.keys()]
+    papers_2 = [corpus_2.indexed_papers[key]
+                for key in corpus_2.indexed_papers.keys()]
+
+    if window and block_by is None and not callable(match_by):
+        field = match_by[0]
+        block_by = lambda paper: _norm(getattr(paper, field, None))
+
+    if window:
+        candidates = _neighborhood_candidates(papers_1, papers_2, block_by,
+                                              window)
+    elif block_by is not None:
+        candidates = _key_candidates(papers_1, papers_2, block_by)
+    elif not callable(match_by) and match_threshold > 0:
+        # At least one field must match.
+        candidates = _field_candidates(papers_1, papers_2, match_by)
+    else:
+        candidates = ((i, j) for i in range(len(papers_1))
+                      for j in range(len(papers_2)))
 
     combined = []
-    exclude_1 = []
-    exclude_2 = []
+    exclude_1 = set()
+    exclude_2 = set()
 
     # Attempt to match Papers
-    for paper_1 in corpus_1:
-        for paper_2 in corpus_2:
-            # The user can provide their own matching logic. In this case,
-            #  match_threshold is ignored.
-            if callable(match_by):
-                match = match_by(paper_1, paper_2)
-
-            # Otherwise we match using the fields in ``match_by``.
-            else:
-                matches = 0.
-                for field in match_by:
-                    if hasattr(paper_1, field) and hasattr(paper_2, field):
-                        value_1 = norm(getattr(paper_1, field))
-                        value_2 = norm(getattr(paper_2, field))
-                        if value_1 == value_2:
-                            matches += 1.
-                match = matches/len(match_by) >= match_threshold
-
-            # Not every field needs to match precisely;
-            if match:
-                paper_new = Paper()
-                # We add values from paper_2 first, so that...
-                for key, value in list(paper_2.__dict__.items()):
-                    if value not in ['', [], None]:
-                        paper_new[key] = value
-
-                # ...values from paper_1 will override values from paper_2.
-                for key, value in list(paper_1.__dict__.items()):
-                    if value not in ['', [], None]:
-                        paper_new[key] = value
-
-                # We assemble all papers before creating a new Corpus, so that
-                #  indexing happens all in one shot.
-                combined.append(paper_new)
-
-                # Flag matched papers for exclusion.
-                exclude_1.append(corpus_1._generate_index(paper_1))
-                exclude_2.append(corpus_2._generate_index(paper_2))
+    for i, j in candidates:
+        paper_1, paper_2 = papers_1[i], papers_2[j]
+
+        # The user can provide their own matching logic. In this case,
+        #  match_threshold is ignored.
+        if callable(match_by):
+            match = match_by(paper_1, paper_2)
+
+        # Otherwise we match using the fields in ``match_by``.
+        else:
+            matches = 0.
+            for field in match_by:
+                if hasattr(paper_1, field) and hasattr(paper_2, field):
+                    value_1 = _norm(getattr(paper_1, field))
+                    value_2 = _norm(getattr(paper_2, field))
+                    if value_1 == value_2:
+                        matches += 1.
+            match = matches/len(match_by) >= match_threshold
+
+        # Not every field needs to match precisely;
+        if match:
+            paper_new = Paper()
+            # We add values from paper_2 first, so that...
+            for key, value in list(_fields(paper_2).items()):
+                if value not in ['', [], None]:
+                    paper_new[key] = value
+
+            # ...values from paper_1 will override values from paper_2.
+            for key, value in list(_fields(paper_1).items()):
+                if value not in ['', [], None]:
+                    paper_new[key] = value
+
+            # We assemble all papers before creating a new Corpus, so that
+            #  indexing happens all in one shot.
+            combined.append(paper_new)
+
+            # Flag matched papers for exclusion.
+            exclude_1.add(corpus_1._generate_index(paper_1))
+            exclude_2.add(corpus_2._generate_index(paper_2))
 
 
     # Include papers that were not matched.
-    combined += [paper for paper in corpus_1
+    combined += [paper for paper in papers_1
                  if corpus_1._generate_index(paper) not in exclude_1]
-    combined += [paper for paper in corpus_2
+    combined += [paper for paper in papers_2
                  if corpus_2._generate_index(paper) not in exclude_2]
 
     # Here indexing happens all at once, with the new ``index_by`` field.
     corpus = Corpus(combined, index_by=index_by)
 
+    def _new_ids(source, featureset):
+        return dict([(index, getattr(source[index], index_by))
+                     for index in featureset.features])
+
+    # Aggregate data are combined, rather than rebuilt from each Feature.
     featuresets = {}
     for featureset_name, featureset_1 in list(corpus_1.features.items()):
         # We avoid FeatureSets that were generated during the indexing process
@@ -141,20 +309,16 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
         if featureset_name in featuresets or featureset_name in corpus.features:
             continue
 
-        features = {}
-
-        # Can be FeatureSet or StructuredFeatureSet.
-        fclass = type(featureset_1)
+        ids_1 = _new_ids(corpus_1, featureset_1)
         if featureset_name in corpus_2.features:
+            # Features from corpus_1 will be preferred over those from
+            #  corpus_2.
             featureset_2 = corpus_2.features[featureset_name]
-            for index, feature in featureset_2.items():
-                features[getattr(corpus_2[index], index_by)] = feature
-
-        # Features from corpus_1 will be preferred over those from corpus_2.
-        for index, feature in featureset_1.items():
-            features[getattr(corpus_1[index], index_by)] = feature
-
-        featuresets[featureset_name] = fclass(features)
+            featuresets[featureset_name] = featureset_1.merge(
+                featureset_2, ids=ids_1,
+                other_ids=_new_ids(corpus_2, featureset_2))
+        else:
+            featuresets[featureset_name] = featureset_1.copy(ids_1)
 
     # FeatureSets unique to corpus_2.
     for featureset_name, featureset_2 in list(corpus_2.features.items()):
@@ -163,15 +327,178 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
         if featureset_name in featuresets or featureset_name in corpus.features:
             continue
 
-        features = {}
-
-        # Can be FeatureSet or StructuredFeatureSet.
-        fclass = type(featureset_2)
-        for index, feature in featureset_2.items():
-            features[getattr(corpus_2[index], index_by)] = feature
-
-        featuresets[featureset_name] = fclass(features)
+        featuresets[featureset_name] = featureset_2.copy(
+            _new_ids(corpus_2, featureset_2))
 
     corpus.features.update(featuresets)
 
     return corpus
+
+
+def _file_digest(path, chunk_size=65536):
+    """
+    SHA-1 hex digest of the contents of the file at ``path``\.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_ingested(corpus, path):
+    """
+    Whether the file at ``path`` has already been ingested into ``corpus``,
+    with the same content. The file is only hashed if its size or
+    modification time has changed. Returns the bool, and the record to store
+    in :attr:`.Corpus.ingested` once the file has been ingested.
+    """
+    stat = os.stat(path)
+    record = corpus.ingested.get(path)
+    if record and record[:2] == (stat.st_size, stat.st_mtime_ns):
+        return True, record
+
+    digest = _file_digest(path)
+    new_record = (stat.st_size, stat.st_mtime_ns, digest)
+    return bool(record) and record[2] == digest, new_record
+
+
+def ingest(corpus, path, reader='wos', tokenize=None, **kwargs):
+    """
+    Adds the records in new export files to ``corpus``\, in place.
+
+    Files that have already been ingested into ``corpus`` (with the same
+    content) are skipped, as are records whose :attr:`.Corpus.index_by` key is
+    already in ``corpus``\. :attr:`.Corpus.indices`\,
+    :attr:`.Corpus.indices_lookup` and :attr:`.Corpus.features` are updated
+    for the new records only, so the cost of a refresh is proportional to the
+    size of the new data.
+
+    Files are tracked by absolute path and by the SHA-1 hash of their contents
+    (in :attr:`.Corpus.ingested`\); a file that has changed is read again, but
+    only records that are new are added. For DfR datasets, each N-gram file is
+    tracked as well, so N-gram files that are added to a dataset that has
+    already been ingested are read.
+
+    Besides the :attr:`.Corpus.index_features`\, :class:`.FeatureSet`\s
+    built with :meth:`.Corpus.index_feature` are updated from the attribute of
+    the same name, in the same way (see :attr:`.Corpus.feature_settings`\).
+    The ``tokenize`` function that was used for a :class:`.FeatureSet` is not
+    stored with the corpus, so it must be passed again in ``tokenize``\.
+    N-gram :class:`.FeatureSet`\s from DfR datasets are merged in (see
+    :meth:`.BaseFeatureSet.merge`\).
+
+    Parameters
+    ----------
+    corpus : :class:`.Corpus`
+    path : str or list
+        Path(s) to WoS field-tagged data files, or to DfR datasets. Can be
+        directories that contain several files (or datasets).
+    reader : str
+        ``'wos'`` or ``'dfr'``\.
+    tokenize : dict
+        Maps the names of :class:`.FeatureSet`\s that were built with a
+        ``tokenize`` function onto that function.
+    kwargs : kwargs
+        Passed to the ``iter_papers`` function of the reader (e.g.
+        ``parse_only``\).
+
+    Returns
+    -------
+    list
+        Primary index keys of the :class:`.Paper`\s that were added.
+
+    Raises
+    ------
+    ValueError
+        If a :class:`.FeatureSet` was built with a ``tokenize`` function that
+        is not in ``tokenize``\.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+       >>> from tethne import Corpus
+       >>> from tethne.readers import ingest
+       >>> corpus = Corpus(index_by='wosid')
+       >>> added = ingest(corpus, "/path/to/exports")
+       >>> # A week later, new files are added to /path/to/exports...
+       >>> added = ingest(corpus, "/path/to/exports")
+
+    """
+    from tethne.readers import wos, dfr     # Avoids a circular import.
+
+    if reader not in ['wos', 'dfr']:
+        raise ValueError('reader must be "wos" or "dfr"')
+    module = wos if reader == 'wos' else dfr
+
+    paths = [path] if type(path) is str else path
+    sources = []    # (file to track, path to read, N-gram files by name).
+    for path in paths:
+        if not os.path.exists(path):
+            raise ValueError('No such file or directory: %s' % path)
+        if reader == 'wos':
+            if os.path.isdir(path):
+                sources += [(fpath, fpath, {})
+                            for fpath in wos._list_datafiles(path)]
+            else:
+                sources.append((path, path, {}))
+        else:
+            for dataset in dfr._dataset_paths(path):
+                citationfname = dfr._get_citation_filename(dataset)
+                sources.append((os.path.join(dataset, citationfname),
+                                dataset, dfr._ngram_files(dataset)))
+
+    # FeatureSets (other than N-grams) that are built from the papers, with
+    #  the function and FeatureSet class that they were built with.
+    tokenize = tokenize or {}
+    settings = getattr(corpus, 'feature_settings', {})
+    featuresets = {}
+    for name in corpus.features:
+        if name in corpus.index_features or name not in settings:
+            continue
+        structured, tokenized = settings[name]
+        if tokenized and name not in tokenize:
+            raise ValueError('FeatureSet %s was built with a tokenize'
+                             ' function; pass it in `tokenize`' % name)
+        featuresets[name] = (tokenize.get(name), structured)
+
+    added = []
+    for fpath, source, ngram_files in sources:
+        fpath = os.path.abspath(fpath)
+        ingested, record = _is_ingested(corpus, fpath)
+        if not ingested:
+            for paper in module.iter_papers(source, **kwargs):
+                key = corpus._generate_index(paper)
+                if key in corpus.indexed_papers:
+                    continue
+                corpus._index_paper(paper)
+                for name, (func, structured) in featuresets.items():
+                    if name not in ngram_files and hasattr(paper, name):
+                        corpus.index_paper_by_feature(paper, name, func,
+                                                      structured)
+                added.append(key)
+        corpus.ingested[fpath] = record
+
+        # Features for papers that are already in the corpus are kept.
+        for name, gram_paths in ngram_files.items():
+            new, records = [], []
+            for gram_path in gram_paths:
+                gram_path = os.path.abspath(gram_path)
+                gram_ingested, gram_record = _is_ingested(corpus, gram_path)
+                if not gram_ingested:
+                    new.append(gram_path)
+                records.append((gram_path, gram_record))
+            if new:
+                featureset = dfr._ngrams_from_files(new, name)
+                if name in corpus.features:
+                    corpus.features[name].merge(featureset, inplace=True)
+                else:
+                    corpus.features[name] = featureset
+            for gram_path, gram_record in records:
+                corpus.ingested[gram_path] = gram_record
+
+    if isinstance(corpus, StreamingCorpus):
+        corpus.flush()
+    return added
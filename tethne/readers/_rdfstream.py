@@ -0,0 +1,302 @@
+"""
+Streaming ingestion of RDF/XML, for :class:`.RDFParser`\.
+
+rdflib's RDF/XML handler is driven incrementally, so triples accumulate in a
+small working graph as the file is read. Each top-level element (i.e. each
+child of ``rdf:RDF``) describes one subject; entries are released in document
+order once the subjects that they refer to (e.g. a journal, or an attachment,
+which Zotero writes *after* the item) have been read, or after ``lookahead``
+more top-level elements, whichever comes first. Released entries are then
+dropped from the working graph, and other subjects are archived in a bounded
+LRU cache once no pending entry needs them, so memory use does not grow with
+the size of the file.
+
+rdflib's in-memory store does not release its index entries when triples are
+removed, so rather than removing triples one at a time, dropped subjects are
+marked as dead, and the working graph is periodically rebuilt without them.
+
+:class:`._TopLevelHandler` relies on internals of rdflib's RDF/XML handler
+(``stack``\, ``current`` and ``store``\); use :func:`.supported` to check
+that the installed rdflib still has them.
+"""
+
+import pathlib
+from collections import deque, OrderedDict, Counter
+from xml.sax import make_parser, handler
+from xml.sax.xmlreader import InputSource
+
+import rdflib
+from rdflib import BNode, URIRef
+from rdflib.namespace import RDF
+from rdflib.plugins.parsers.rdfxml import RDFXMLHandler, ErrorHandler
+
+
+_supported = None
+
+
+def supported():
+    """
+    Whether the RDF/XML handler of the installed rdflib has the internals that
+    :class:`._TopLevelHandler` relies on.
+
+    Returns
+    -------
+    bool
+    """
+    global _supported
+    if _supported is None:
+        try:
+            probe = RDFXMLHandler(rdflib.Graph())
+            _supported = (isinstance(probe.stack, list)
+                          and hasattr(probe, 'current')
+                          and probe.store is not None)
+        except Exception:   # E.g. the handler takes other arguments.
+            _supported = False
+    return _supported
+
+
+class _TopLevelHandler(RDFXMLHandler):
+    """
+    Records the subject of each top-level element as it is completed.
+    """
+
+    def __init__(self, store):
+        super(_TopLevelHandler, self).__init__(store)
+        self.completed = deque()
+        self.top_level = None
+
+    def startElementNS(self, name, qname, attrs):
+        if self.top_level is None:    # The document element.
+            is_rdf = (name[0] or '') + name[1] == str(RDF) + 'RDF'
+            self.top_level = 4 if is_rdf else 3
+        super(_TopLevelHandler, self).startElementNS(name, qname, attrs)
+
+    def endElementNS(self, name, qname):
+        subject = None
+        if len(self.stack) == self.top_level:
+            subject = getattr(self.current, 'subject', None)
+        super(_TopLevelHandler, self).endElementNS(name, qname)
+        if subject is not None:
+            self.completed.append(subject)
+
+
+def _iter_top_level(source, path, content_handler, chunk_size=65536):
+    """
+    Reads RDF/XML from the binary file-like ``source`` into the store of
+    ``content_handler`` (a :class:`._TopLevelHandler`\), and yields the subject
+    of each top-level element as soon as it is complete. ``source`` is closed
+    when it is exhausted.
+    """
+    parser = make_parser()
+    try:
+        # Workaround for a bug in expatreader (see rdflib.plugins.parsers).
+        parser.start_namespace_decl('xml',
+                                    'http://www.w3.org/XML/1998/namespace')
+    except AttributeError:
+        pass
+    parser.setFeature(handler.feature_namespaces, 1)
+    parser.setContentHandler(content_handler)
+    parser.setErrorHandler(ErrorHandler())
+
+    # Relative URIs are resolved against the file, as by rdflib.Graph.parse.
+    uri = pathlib.Path(path).absolute().as_uri()
+    input_source = InputSource(uri)
+    input_source.setPublicId(uri)
+    content_handler.setDocumentLocator(input_source)
+
+    completed = content_handler.completed
+    try:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            parser.feed(chunk)
+            while completed:
+                yield completed.popleft()
+        parser.close()
+        while completed:
+            yield completed.popleft()
+    finally:
+        source.close()
+
+
+def _closure(graph, subject):
+    """
+    All triples about ``subject``, including those about the blank nodes that
+    it refers to (e.g. an author list).
+    """
+    triples = []
+    subjects = [subject]
+    seen = set(subjects)
+    while subjects:
+        s = subjects.pop()
+        for triple in graph.triples((s, None, None)):
+            triples.append(triple)
+            o = triple[2]
+            if isinstance(o, BNode) and o not in seen:
+                seen.add(o)
+                subjects.append(o)
+    return triples
+
+
+class RDFXMLStream(object):
+    """
+    Iterates over the entries in an RDF/XML file, in document order, while
+    keeping only a window of the file in :attr:`.graph`\.
+
+    Parameters
+    ----------
+    source : file-like
+        Binary stream of RDF/XML.
+    path : str
+        Path to the file (used to resolve relative URIs).
+    entry_elements : list
+        Entry types, as prefixed names (e.g. ``'bib:Article'``).
+    lookahead : int
+        Maximum number of top-level elements to wait for the subjects that an
+        entry refers to.
+    archive_size : int
+        Maximum number of non-entry subjects (e.g. journals) to keep, once they
+        have fallen out of the window, in case a later entry refers to them.
+    compact_size : int
+        Minimum number of dead subjects (see above) to accumulate before the
+        working graph is rebuilt.
+
+    Attributes
+    ----------
+    graph : rdflib.Graph
+        The working graph. This is replaced when it is rebuilt, so it should be
+        looked up again after each entry.
+    """
+
+    def __init__(self, source, path, entry_elements, lookahead=100,
+                 archive_size=1000, compact_size=1000):
+        self.source = source
+        self.path = path
+        self.entry_elements = entry_elements
+        self.lookahead = lookahead
+        self.archive_size = archive_size
+        self.compact_size = compact_size
+        self.graph = rdflib.Graph()
+        self.handler = _TopLevelHandler(self.graph)
+        self.archive = OrderedDict()    # subject -> triples.
+        self.entry_types = None
+
+    def _resolve_entry_types(self):
+        namespaces = dict([(prefix, str(uri)) for prefix, uri
+                           in self.graph.namespaces()])
+        types = set()
+        for element in self.entry_elements:
+            prefix, name = element.split(':', 1)
+            if prefix in namespaces:
+                types.add(URIRef(namespaces[prefix] + name))
+        return types
+
+    def _is_entry(self, subject):
+        if self.entry_types is None:
+            self.entry_types = self._resolve_entry_types()
+        for rdf_type in self.graph.objects(subject, RDF.type):
+            if rdf_type in self.entry_types:
+                return True
+        return False
+
+    def _references(self, subject):
+        return set([o for p, o in self.graph.predicate_objects(subject)
+                    if isinstance(o, URIRef) and p != RDF.type])
+
+    def _available(self, subject):
+        """
+        Whether ``subject`` has been read (restoring it from the archive if
+        necessary).
+        """
+        if subject in self.in_graph:
+            return True
+
+        triples = self.archive.pop(subject, None)
+        if triples is None:
+            return False
+        for triple in triples:
+            self.graph.add(triple)
+            self.dead.discard(triple[0])
+        self.in_graph.add(subject)
+        self.recent.append((self.count, subject))
+        return True
+
+    def _remove(self, subject):
+        """
+        Marks ``subject`` (and its blank nodes) as dead, and returns its
+        triples.
+        """
+        triples = _closure(self.graph, subject)
+        self.dead.update([s for s, p, o in triples])
+        self.in_graph.discard(subject)
+        return triples
+
+    def _compact(self):
+        """
+        Rebuilds the working graph without the triples of dead subjects.
+        """
+        graph = rdflib.Graph()
+        for prefix, uri in self.graph.namespaces():
+            graph.bind(prefix, uri, override=True, replace=True)
+        for triple in self.graph:
+            if triple[0] not in self.dead:
+                graph.add(triple)
+        self.graph = self.handler.store = graph
+        self.dead = set()
+
+    def _archive_old(self):
+        """
+        Moves non-entry subjects that have fallen out of the window, and that
+        no pending entry refers to, into the archive.
+        """
+        while self.recent and self.recent[0][0] <= self.count - self.lookahead:
+            seen_at, subject = self.recent[0]
+            if self.needed[subject] > 0:
+                break
+            self.recent.popleft()
+            if subject in self.in_graph:
+                self.archive[subject] = self._remove(subject)
+                if len(self.archive) > self.archive_size:
+                    self.archive.popitem(last=False)
+
+    def __iter__(self):
+        pending = deque()           # (entry, references, release by).
+        self.needed = Counter()     # Subjects referred to by pending entries.
+        self.recent = deque()       # (seen at, subject) of non-entries.
+        self.in_graph = set()       # Top-level subjects in the graph.
+        self.dead = set()           # Subjects to drop from the graph.
+        self.count = 0
+
+        for subject in _iter_top_level(self.source, self.path, self.handler):
+            self.count += 1
+            if self._is_entry(subject):
+                references = self._references(subject) - set([subject])
+                pending.append((subject, references,
+                                self.count + self.lookahead))
+                self.needed.update(references)
+            elif subject not in self.in_graph:
+                self.recent.append((self.count, subject))
+            self.in_graph.add(subject)
+
+            # Release entries in document order.
+            while pending:
+                entry, references, release_by = pending[0]
+                ready = all([self._available(ref) for ref in references])
+                if not ready and release_by > self.count:
+                    break
+                pending.popleft()
+                yield entry
+                self._remove(entry)
+                for ref in references:
+                    self.needed[ref] -= 1
+                    if self.needed[ref] < 1:
+                        del self.needed[ref]
+
+            self._archive_old()
+            if len(self.dead) > max(self.compact_size, len(self.in_graph)):
+                self._compact()
+
+        while pending:      # End of the file; nothing else is coming.
+            entry, references, release_by = pending.popleft()
+            for ref in references:
+                self._available(ref)
+            yield entry
+            self._remove(entry)
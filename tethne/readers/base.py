@@ -1,26 +1,46 @@
 import os
 import re
 import xml.etree.ElementTree as ET
-import rdflib
 
 import codecs
-import chardet
-import copy
 import unicodedata
+from collections import deque
 
 import logging
+import warnings
 
 from io import BytesIO
 
+from tethne.classes.paper import _fields
+
 # rdflib complains a lot.
 logging.getLogger("rdflib").setLevel(logging.ERROR)
 
 
 def _fast_iter(context, func, tag):
+    """
+    Calls ``func`` on each completed element produced by ``context`` (an
+    ``iterparse`` iterator), and yields the element once it is handled.
+
+    Completed ``tag`` elements are cleared and, if ``context`` also reports
+    ``'start'`` events, detached from their parent, so that the tree does not
+    grow as the document is parsed. ``func`` must therefore extract whatever it
+    needs from an element before it returns.
+    """
+    parents = []
     for event, elem in context:
+        if event == 'start':
+            parents.append(elem)
+            continue
+        if parents and parents[-1] is elem:
+            parents.pop()
+
         func(elem)
         if elem.tag == tag:
             elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+        yield elem
     del context
 
 
@@ -28,12 +48,167 @@ class dobject(object):
     pass
 
 
+class _FixupStream(object):
+    """
+    Read-only, file-like wrapper that applies a regular-expression substitution
+    to a text stream on the fly, and returns UTF-8 encoded bytes. This lets us
+    repair malformed documents while feeding them incrementally to
+    ``ET.iterparse``, without reading the whole file into memory.
+
+    Text is read ``chunk_size`` characters at a time. The last ``holdback``
+    characters of each chunk are held over until the next chunk is available,
+    so ``holdback`` must be at least the longest span (including any
+    lookahead) that ``pattern`` can examine, minus one.
+
+    Parameters
+    ----------
+    f : file-like
+        A text stream (i.e. ``read`` returns str).
+    pattern : compiled regular expression
+    repl : str
+        Replacement, as for ``pattern.sub``\.
+    holdback : int
+    chunk_size : int
+    """
+
+    def __init__(self, f, pattern, repl, holdback, chunk_size=65536):
+        self.f = f
+        self.pattern = pattern
+        self.repl = repl
+        self.holdback = holdback
+        self.chunk_size = chunk_size
+
+        self.pending = ''       # Text that has not been substituted yet.
+        self.buffer = b''       # Substituted text, ready to read.
+        self.at_eof = False
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        text = self.pending + chunk
+        if not chunk:
+            self.at_eof = True
+            cut = len(text)
+        else:
+            cut = max(len(text) - self.holdback, 0)
+
+        # Matches that start in the held-over tail are left for next time,
+        #  when they can be seen in full.
+        out = []
+        last = 0
+        for match in self.pattern.finditer(text):
+            if match.start() >= cut:
+                break
+            out.append(text[last:match.start()])
+            out.append(match.expand(self.repl))
+            last = match.end()
+        cut = max(cut, last)
+        out.append(text[last:cut])
+
+        self.pending = text[cut:]
+        self.buffer += ''.join(out).encode('utf-8')
+
+    def read(self, size=-1):
+        while not self.at_eof and (size < 0 or len(self.buffer) < size):
+            self._fill()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+# Byte-order marks, longest first (the UTF-32 LE mark begins with the UTF-16 LE
+#  mark).
+_BOMS = [(codecs.BOM_UTF32_LE, 'utf-32'),
+         (codecs.BOM_UTF32_BE, 'utf-32'),
+         (codecs.BOM_UTF8, 'utf-8-sig'),
+         (codecs.BOM_UTF16_LE, 'utf-16'),
+         (codecs.BOM_UTF16_BE, 'utf-16')]
+
+
+def _detect_encoding(path, sample_size=65536, min_confidence=0.7):
+    """
+    Guess the character encoding of the file at ``path``.
+
+    A byte-order mark, if present, decides the encoding outright. Otherwise
+    ``chardet`` is run on the first ``sample_size`` bytes of the file. Only if
+    that guess is less confident than ``min_confidence``\, or is ASCII (which
+    says nothing about the rest of the file), is the rest of the file read
+    (in chunks) and fed to the detector.
+
+    Parameters
+    ----------
+    path : str
+    sample_size : int
+        Number of bytes to sniff before falling back to a full scan.
+    min_confidence : float
+        Minimum ``chardet`` confidence to accept a guess based on the sample.
+
+    Returns
+    -------
+    encoding : str
+    """
+
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+        for bom, encoding in _BOMS:
+            if sample.startswith(bom):
+                return encoding
+
+        import chardet      # Only needed here, and slow to import.
+        try:
+            from chardet import UniversalDetector
+        except ImportError:     # chardet < 5.
+            from chardet.universaldetector import UniversalDetector
+
+        result = chardet.detect(sample)
+        if len(sample) < sample_size:   # We have already seen the whole file.
+            encoding = result['encoding']
+        elif result['encoding'] and result['encoding'].lower() != 'ascii' \
+                and result['confidence'] >= min_confidence:
+            encoding = result['encoding']
+        else:
+            detector = UniversalDetector()
+            detector.feed(sample)
+            for chunk in iter(lambda: f.read(sample_size), b''):
+                detector.feed(chunk)
+                if detector.done:
+                    break
+            detector.close()
+            encoding = detector.result['encoding']
+
+    # UTF-8 is a superset of ASCII.
+    if encoding is None or encoding.lower() == 'ascii':
+        encoding = 'utf-8'
+    return encoding
+
+
+_FT_LINE = re.compile(r'([A-Z]{2}|[C][1])\W(.*)')
+"""Splits a field-tagged line into its tag and its data."""
+
+# ``int()`` and ``float()`` only accept strings that begin with one of these
+#  characters (or a digit, or whitespace); 'i' and 'n' cover 'inf' and 'nan'.
+_CASTABLE = frozenset('+-.iInN')
+
+_MISSING = object()
+
+
 def _cast(value):
     """
     Attempt to convert ``value`` to an ``int`` or ``float``. If unable, return
     the value unchanged.
     """
 
+    # Most values are plainly not numbers; don't pay for two exceptions.
+    if isinstance(value, str):
+        if not value:
+            return value
+        first = value[0]
+        if not (first in _CASTABLE or first.isdigit() or first.isspace()):
+            return value
+
     try:
         return int(value)
     except ValueError:
@@ -91,19 +266,20 @@ class IterParser(BaseParser):
 
     tags = {}
 
+    parse_only = None
+    """If set, only these tags are handled."""
+
     def __init__(self, *args, **kwargs):
         super(IterParser, self).__init__(*args, **kwargs)
 
         self.current_tag = None
         self.last_tag = None
+        self._dispatch = {}     # Tag -> result of _route.
 
         if kwargs.get('autostart', True) and getattr(self, 'autostart', True):
             self.start()
 
-    def parse(self, parse_only=None):
-        """
-
-        """
+    def _set_parse_only(self, parse_only):
         # The user should be able to limit parsing to specific fields.
         if parse_only:
             tag_lookup = {v: k for k, v in list(self.tags.items())}
@@ -111,6 +287,42 @@ class IterParser(BaseParser):
                                    for field in parse_only
                                    if field in tag_lookup])
 
+    def parse(self, parse_only=None):
+        """
+        Parse the whole data file.
+
+        Parameters
+        ----------
+        parse_only : list
+            If provided, only these fields will be parsed.
+
+        Returns
+        -------
+        list
+            All of the data entries in the file.
+        """
+        self.data = list(self.iter_parse(parse_only=parse_only))
+        return self.data
+
+    def iter_parse(self, parse_only=None):
+        """
+        Parse the data file, yielding each data entry as soon as it is complete
+        (i.e. after it has been post-processed).
+
+        Entries are not retained by the parser, so memory use does not grow
+        with the size of the file.
+
+        Parameters
+        ----------
+        parse_only : list
+            If provided, only these fields will be parsed.
+
+        Returns
+        -------
+        generator
+        """
+        self._set_parse_only(parse_only)
+
         while True:        # Main loop.
             tag, data = next(self)
             if self.is_eof(tag):
@@ -119,7 +331,13 @@ class IterParser(BaseParser):
 
             self.handle(tag, data)
             self.last_tag = tag
-        return self.data
+
+            # Only the last entry can still be receiving data.
+            while len(self.data) > 1:
+                yield self.data.pop(0)
+
+        while self.data:
+            yield self.data.pop(0)
 
     def start(self):
         """
@@ -149,34 +367,48 @@ class IterParser(BaseParser):
         if not data or not tag:
             return
 
-        if getattr(self, 'parse_only', None) and tag not in self.parse_only:
+        if self.parse_only and tag not in self.parse_only:
             return
 
-        # TODO: revisit encoding here.
-        if isinstance(data, str):
+        # TODO: revisit encoding here. NFKD leaves ASCII unchanged.
+        if isinstance(data, str) and not data.isascii():
             data = unicodedata.normalize('NFKD', data)#.encode('utf-8','ignore')
 
-        handler = self._get_handler(tag)
+        try:
+            handler, tag, concat = self._dispatch[tag]
+        except KeyError:
+            handler, tag, concat = self._dispatch[tag] = self._route(tag)
+
         if handler is not None:
             data = handler(data)
 
-        if tag in self.tags:    # Rename the field.
-            tag = self.tags[tag]
-
         # Multiline fields are represented as lists of values.
-        if hasattr(self.data[-1], tag):
-            value = getattr(self.data[-1], tag)
-            if tag in self.concat_fields:
-                value = ' '.join([value, str(data)])
-            elif type(value) is list:
-                value.append(data)
-            elif value not in [None, '']:
-                value = [value, data]
-        else:
+        entry = self.data[-1]
+        value = getattr(entry, tag, _MISSING)
+        if value is _MISSING:
             value = data
-        setattr(self.data[-1], tag, value)
+        elif concat:
+            value = ' '.join([value, str(data)])
+        elif type(value) is list:
+            value.append(data)
+        elif value not in [None, '']:
+            value = [value, data]
+        setattr(entry, tag, value)
         self.fields.add(tag)
 
+    def _route(self, tag):
+        """
+        Work out how lines tagged ``tag`` should be handled: the ``handle_``
+        method, if any, the name of the field in which to store the data, and
+        whether multi-line data should be concatenated. Uses the ``tags``\,
+        ``concat_fields`` and handlers of this instance (which may differ from
+        those of its class, e.g. if they are passed to the constructor). The
+        result is cached by :meth:`.handle` for the life of the instance.
+        """
+        handler = self._get_handler(tag)
+        field = self.tags.get(tag, tag)
+        return handler, field, field in self.concat_fields
+
 
 class FTParser(IterParser):
     """
@@ -189,6 +421,19 @@ class FTParser(IterParser):
     end_tag = 'ED'
     """Signals the end of a data entry."""
 
+    encoding = None
+    """
+    Character encoding of the data file. If None (default), the encoding is
+    detected when the file is opened. Pass ``encoding`` to the constructor to
+    skip detection entirely.
+    """
+
+    detect_sample_size = 65536
+    """
+    Number of bytes used to detect the encoding, before falling back to a scan
+    of the whole file.
+    """
+
     def is_start(self, tag):
         return tag == self.start_tag
 
@@ -207,11 +452,11 @@ class FTParser(IterParser):
             raise IOError("No such path: {0}".format(self.path))
 
 
-        with open(self.path, "rb") as f:
-            msg = f.read()
-        result = chardet.detect(msg)
+        if not self.encoding:
+            self.encoding = _detect_encoding(self.path,
+                                             sample_size=self.detect_sample_size)
 
-        self.buffer = codecs.open(self.path, "rb", encoding=result['encoding'])
+        self.buffer = codecs.open(self.path, "rb", encoding=self.encoding)
 
         self.at_eof = False
 
@@ -233,7 +478,7 @@ class FTParser(IterParser):
             self.at_eof = True
             return None, None
 
-        match = re.match('([A-Z]{2}|[C][1])\W(.*)', line)
+        match = _FT_LINE.match(line)
         if match is not None:
             self.current_tag, data = match.groups()
         else:
@@ -256,7 +501,7 @@ class XMLParser(IterParser):
         # pattern = './/{elem}'.format(elem=self.entry_element)
         # self.elements = self.root.findall(pattern)
         self.f = open(self.path, 'r')
-        self.iterator = ET.iterparse(self.f)
+        self.iterator = ET.iterparse(self.f, events=('start', 'end'))
 
         self.at_start = False
         self.at_end = False
@@ -283,7 +528,6 @@ class XMLParser(IterParser):
         self.new_entry()
 
     def __next__(self, child):
-        child = copy.deepcopy(child)
         tag, data = child.tag, child.text
         if data:
             data = data.strip()
@@ -291,10 +535,7 @@ class XMLParser(IterParser):
         self.handle(tag, data)
         self.last_tag = tag
 
-    def parse(self, parse_only=None):
-        """
-
-        """
+    def _set_parse_only(self, parse_only):
         # The user should be able to limit parsing to specific fields.
         if parse_only:
             tag_lookup = {v: k for k, v in list(self.tags.items())}
@@ -302,11 +543,20 @@ class XMLParser(IterParser):
                                    for field in parse_only
                                    if field in tag_lookup]) | set(parse_only)
 
-        _fast_iter(self.iterator, self.__next__, self.entry_element)
+    def iter_parse(self, parse_only=None):
+        self._set_parse_only(parse_only)
 
-        if len(self.data[-1].__dict__) == 0:
+        for elem in _fast_iter(self.iterator, self.__next__,
+                               self.entry_element):
+            # A new entry is started only once the previous one is complete.
+            while len(self.data) > 1:
+                yield self.data.pop(0)
+
+        # The end of the last element opens an entry that never gets any data.
+        if self.data and len(_fields(self.data[-1])) == 0:
             del self.data[-1]
-        return self.data
+        while self.data:
+            yield self.data.pop(0)
 
     def __del__(self):
         if hasattr(self, 'f'):
@@ -318,36 +568,104 @@ class RDFParser(BaseParser):
     meta_elements = []
     concat_fields = []
 
+    streaming = False
+    """
+    If True, the RDF/XML document is read incrementally (see
+    :class:`._rdfstream.RDFXMLStream`), rather than loaded into a single
+    in-memory graph. Entries are then parsed in document order.
+    """
+
+    lookahead = 100
+    """
+    When ``streaming``, the number of top-level elements to wait for the
+    resources that an entry refers to.
+    """
+
+    def _check_streaming(self):
+        """
+        Falls back to loading the whole graph (with a warning) if
+        ``streaming`` is set but is not supported by the installed rdflib
+        (see :func:`._rdfstream.supported`\).
+        """
+        if not self.streaming:
+            return
+        try:
+            from tethne.readers._rdfstream import supported
+        except ImportError:     # rdflib's RDF/XML parser has moved.
+            supported = lambda: False
+        if not supported():
+            warnings.warn('Streaming is not supported with this version of'
+                          ' rdflib; loading the whole graph instead.')
+            self.streaming = False
+
     def open(self):
+        import rdflib   # Only needed here, and slow to import.
+        self._check_streaming()
+        if self.streaming:
+            from tethne.readers._rdfstream import RDFXMLStream
+            self.stream = RDFXMLStream(self.open_source(), self.path,
+                                       self.entry_elements,
+                                       lookahead=self.lookahead)
+            self.graph = self.stream.graph
+            return
+
         self.graph = rdflib.Graph()
         self.graph.parse(self.path)
-        self.entries = []
+        self.entries = deque()
 
         for element in self.entry_elements:
             query = 'SELECT * WHERE { ?p a ' + element + ' }'
             self.entries += [r[0] for r in self.graph.query(query)]
 
+    def open_source(self):
+        """
+        Binary stream of the RDF/XML document, when ``streaming``.
+        """
+        return open(self.path, 'rb')
+
     def __next__(self):
         if len(self.entries) > 0:
-            return self.entries.pop(0)
+            return self.entries.popleft()
 
     def parse(self):
+        """
+        Parse the whole RDF document.
+
+        Returns
+        -------
+        list
+            All of the data entries in the document.
+        """
+        self.data = list(self.iter_parse())
+        return self.data
+
+    def iter_parse(self):
+        """
+        Parse the RDF document, yielding each data entry as soon as it is
+        complete (i.e. after it has been post-processed).
+
+        Returns
+        -------
+        generator
+        """
         meta_fields, meta_refs = list(zip(*self.meta_elements))
+        meta_tags = dict(zip(meta_refs, meta_fields))
 
-        while True:        # Main loop.
-            entry = next(self)
-            if entry is None:
-                break
+        if self.streaming:
+            entries = iter(self.stream)
+        else:
+            entries = iter(self.__next__, None)
 
+        for entry in entries:     # Main loop.
+            if self.streaming:    # The working graph is rebuilt periodically.
+                self.graph = self.stream.graph
             self.new_entry()
 
             for s, p, o in self.graph.triples((entry, None, None)):
-                if p in meta_refs:  # Look for metadata fields.
-                    tag = meta_fields[meta_refs.index(p)]
-                    self.handle(tag, o)
+                if p in meta_tags:  # Look for metadata fields.
+                    self.handle(meta_tags[p], o)
             self.postprocess_entry()
-
-        return self.data
+            yield self.data.pop()
 
     def handle(self, tag, data):
         handler = self._get_handler(tag)
@@ -9,17 +9,24 @@ Methods for parsing JSTOR Data-for-Research datasets.
 import os
 import xml.etree.ElementTree as ET
 import re
+from array import array
 from collections import Counter
-from tethne import Paper, Corpus, Feature, FeatureSet, StreamingCorpus
+from multiprocessing import Pool
+from tethne import Paper, Corpus, Feature, FeatureSet, LazyFeatureSet, \
+                   StreamingCorpus
+from tethne.classes.paper import CompactPaper
 from tethne.utilities import dict_from_node, strip_non_ascii, number
-from tethne.readers.base import XMLParser
+from tethne.readers.base import XMLParser, _FixupStream
 import iso8601
-from io import BytesIO
 
 from unidecode import unidecode
 import codecs
 
 
+# JSTOR hasn't always represented ampersands correctly.
+_BAD_AMPERSAND = re.compile('(&)(?!amp;)')
+
+
 class DfRParser(XMLParser):
     entry_class = Paper
 
@@ -31,13 +38,13 @@ class DfRParser(XMLParser):
     }
 
     def open(self):
-        with codecs.open(self.path, 'r', encoding="utf-8") as f:
-            # JSTOR hasn't always represented ampersands correctly.
-            contents = re.sub('(&)(?!amp;)', lambda match: '&amp;', f.read())
-            # self.root = ET.fromstring(contents)
-        # pattern = './/{elem}'.format(elem=self.entry_element)
-        # self.elements = self.root.findall(pattern)
-        self.iterator = ET.iterparse(BytesIO(contents.encode('utf-8')))
+        self.f = codecs.open(self.path, 'r', encoding="utf-8")
+
+        # JSTOR hasn't always represented ampersands correctly. They are
+        #  repaired as the file is read, so it is never held in memory.
+        self.iterator = ET.iterparse(_FixupStream(self.f, _BAD_AMPERSAND,
+                                                  '&amp;', holdback=4),
+                                     events=('start', 'end'))
 
         self.at_start = False
         self.at_end = False
@@ -116,8 +123,9 @@ class GramGenerator(object):
 
         self.ignore_hash = ignore_hash
 
-        self.files = os.listdir(os.path.join(path, elem))
-        self.N = len([ d for d in self.files if d.split('.')[-1] == 'XML' ])
+        self.files = sorted([d for d in os.listdir(os.path.join(path, elem))
+                             if d.split('.')[-1] == 'XML'])
+        self.N = len(self.files)
         self.i = 0
 
         self.V = values
@@ -168,42 +176,249 @@ class GramGenerator(object):
         """
         Retrieve data for the ith file in the dataset.
         """
-        with open(os.path.join(self.path, self.elem, self.files[i]), 'r') as f:
-            # JSTOR hasn't always produced valid XML.
-            contents = re.sub('(&)(?!amp;)', lambda match: '&amp;', f.read())
-            root = ET.fromstring(contents)
-        doi = root.attrib['id']
-
+        fpath = os.path.join(self.path, self.elem, self.files[i])
         if self.K:  # Keys only.
-            return doi
-
-        grams = []
-        for gram in root.findall(self.elem_xml):
-            text = unidecode(str(gram.text.strip()))
-            if ( not self.ignore_hash or '#' not in list(text) ):
-                c = ( text, number(gram.attrib['weight']) )
-                grams.append(c)
+            return _read_doi(fpath)
 
+        doi, grams = _read_grams((fpath, self.elem_xml, self.ignore_hash))
         if self.V:  # Values only.
             return grams
 
         return doi, grams   # Default behavior.
 
+
+def _read_grams(args):
+    """
+    Parses a single N-gram file.
+
+    Module-level (and with a single argument) so that it can be mapped over a
+    :class:`multiprocessing.Pool`\.
+
+    Parameters
+    ----------
+    args : tuple
+        (path, elem_xml, ignore_hash); see :class:`.GramGenerator`\.
+
+    Returns
+    -------
+    doi : str
+    grams : list
+        (N-gram, weight) tuples.
+    """
+    fpath, elem_xml, ignore_hash = args
+    with open(fpath, 'r') as f:
+        # JSTOR hasn't always produced valid XML.
+        contents = _BAD_AMPERSAND.sub('&amp;', f.read())
+        root = ET.fromstring(contents)
+
+    grams = []
+    for gram in root.findall(elem_xml):
+        text = gram.text.strip()
+        if not text.isascii():
+            text = unidecode(text)
+        if ( not ignore_hash or '#' not in text ):
+            c = ( text, number(gram.attrib['weight']) )
+            grams.append(c)
+    return root.attrib['id'], grams
+
+
+def _read_gram_feature(args):
+    """
+    Loads a single N-gram file as a :class:`.Feature` (for
+    :class:`.LazyFeatureSet`\).
+    """
+    return Feature(_read_grams(args)[1])
+
+
+def _read_doi(fpath):
+    """
+    Reads the DOI of an N-gram file from its root element, without parsing the
+    rest of the file.
+    """
+    with open(fpath, 'r') as f:
+        for event, elem in ET.iterparse(_FixupStream(f, _BAD_AMPERSAND,
+                                                     '&amp;', holdback=4),
+                                        events=('start',)):
+            return elem.attrib['id']
+
+
 def _get_citation_filename(basepath):
     for fname in ["citations.xml", "citations.XML"]:
         if os.path.exists(os.path.join(basepath, fname)):
             return fname
 
 
+def _dataset_paths(path):
+    """
+    Paths to the DfR datasets at ``path``: either ``path`` itself, or any
+    subdirectories that contain a citations file.
+    """
+    if _get_citation_filename(path):
+        return [path]
+
+    datasets = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        if _get_citation_filename(dirpath):
+            datasets.append(dirpath)
+    return datasets
+
+
+def iter_papers(path, parse_only=None, compact=False):
+    """
+    Yields :class:`.Paper`\s from a JSTOR DfR dataset (or a directory
+    containing several datasets), one record at a time.
+
+    Unlike :func:`.read`\, the parsed records are never collected in a list,
+    so this can be used to feed very large datasets into a
+    :class:`.StreamingCorpus` (or :meth:`.Corpus.add_papers`\). N-grams are
+    not loaded; see :func:`.ngrams`\.
+
+    Parameters
+    ----------
+    path : str
+        Path to an unzipped JSTOR DfR folder containing a citations.xml file,
+        or to a directory containing several such folders.
+    parse_only : list
+        If provided, only these fields will be parsed.
+    compact : bool
+        If True, yields :class:`.CompactPaper`\s (see :func:`.read`\).
+
+    Returns
+    -------
+    generator
+    """
+
+    datasets = _dataset_paths(path)
+    if len(datasets) == 0:
+        raise ValueError('No DfR datasets found at %s' % path)
+
+    for dataset in datasets:
+        fpath = os.path.join(dataset, _get_citation_filename(dataset))
+        parser = DfRParser(fpath, **_parser_kwargs(compact))
+        for paper in parser.iter_parse(parse_only=parse_only):
+            yield paper
+
+
+def _parser_kwargs(compact):
+    """
+    Keyword arguments for :class:`.DfRParser`\. If ``compact`` is True, records
+    are parsed into :class:`.CompactPaper`\s.
+    """
+    if compact:
+        return {'entry_class': CompactPaper}
+    return {}
+
+
+def _ngram_dirs(path):
+    """
+    Names of the subdirectories of the DfR dataset at ``path`` that contain
+    N-gram files.
+    """
+    names = []
+    for sname in os.listdir(path):
+        fpath = os.path.join(path, sname)   # Full path.
+        if os.path.isdir(fpath) and not sname.startswith('.'):
+            datafiles = [f for f in os.listdir(fpath)
+                         if f.lower().endswith('xml')]
+            if len(datafiles) > 0:
+                names.append(sname)
+    return names
+
+
+def _load_ngrams(path, **kwargs):
+    """
+    Loads all of the N-gram :class:`.FeatureSet`\s in the DfR dataset at
+    ``path``. ``kwargs`` are passed to :func:`.ngrams`\.
+    """
+    return {elem: ngrams(path, elem, **kwargs) for elem in _ngram_dirs(path)}
+
+
+def _ngram_files(path):
+    """
+    Maps the name of each N-gram subdirectory of the DfR dataset at ``path``
+    (see :func:`._ngram_dirs`\) onto the paths of the files in it that are
+    read by :func:`.ngrams`\.
+    """
+    files = {}
+    for elem in _ngram_dirs(path):
+        grams = GramGenerator(path, elem)
+        files[elem] = [os.path.join(path, elem, fname) for fname in grams.files]
+    return files
+
+
+def _ngrams_from_files(fpaths, elem, ignore_hash=True):
+    """
+    Loads the N-gram files ``fpaths``\, from the subdirectory ``elem`` of a DfR
+    dataset, into a :class:`.FeatureSet`\.
+    """
+    elem_xml = elem[:-1] if elem.endswith('s') else elem   # As GramGenerator.
+    grams = [_read_grams((fpath, elem_xml, ignore_hash)) for fpath in fpaths]
+    return FeatureSet({doi: Feature(f) for doi, f in grams})
+
+
+def _combine_ngrams(featuresets):
+    """
+    Combines the same N-gram :class:`.FeatureSet` from several datasets.
+    Where a paper is in more than one dataset, its N-grams from the last are
+    kept (whether or not the featuresets are lazy).
+    """
+    if len(featuresets) == 1:
+        return featuresets[0]
+
+    if all([isinstance(fs, LazyFeatureSet) for fs in featuresets]):
+        # Keep them lazy.
+        sources = {}
+        for featureset in featuresets:
+            sources.update(featureset.features.sources)
+        return LazyFeatureSet(sources, featuresets[0].features.loader)
+
+    # Aggregate data are combined, rather than rebuilt from each Feature.
+    #  merge() keeps the features that are already in ``combined``, so the
+    #  featuresets are folded in from last to first.
+    combined = featuresets[-1]
+    for featureset in featuresets[-2::-1]:
+        combined.merge(featureset, inplace=True)
+    return combined
+
+
 def streaming_read(path, corpus=True, index_by='doi', parse_only=None,
-                   **kwargs):
+                   load_ngrams=True, workers=None, lazy_ngrams=False,
+                   compact=False, **kwargs):
+    """
+    Read a JSTOR DfR dataset into a :class:`.StreamingCorpus`\.
 
-    return read(path, corpus=corpus, index_by=index_by, parse_only=parse_only,
-                corpus_class=StreamingCorpus)
+    Records are indexed as they are parsed (see :func:`.iter_papers`), so the
+    full list of :class:`.Paper`\s is never held in memory. ``workers`` and
+    ``lazy_ngrams`` are passed to :func:`.ngrams`\.
+    """
+
+    if not corpus:
+        return read(path, corpus=False, index_by=index_by,
+                    parse_only=parse_only, compact=compact)
+
+    # We need the primary index field in the parse results.
+    if parse_only and index_by not in parse_only:
+        parse_only.append(index_by)
+
+    papers = iter_papers(path, parse_only=parse_only, compact=compact)
+    corpus = StreamingCorpus(papers, index_by=index_by, **kwargs)
+
+    if load_ngrams:
+        features = {}
+        for dataset in _dataset_paths(path):
+            for featureset_name, featureset in _load_ngrams(dataset,
+                    workers=workers, lazy=lazy_ngrams).items():
+                features.setdefault(featureset_name, []).append(featureset)
+        for featureset_name, featuresets in features.items():
+            corpus.features[featureset_name] = _combine_ngrams(featuresets)
+        corpus.flush()
+    return corpus
 
 
 def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
-         corpus_class=Corpus, **kwargs):
+         corpus_class=Corpus, streaming=False, workers=None, lazy_ngrams=False,
+         compact=False, **kwargs):
     """
     Yields :class:`.Paper` s from JSTOR DfR package.
 
@@ -214,6 +429,20 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
     ----------
     filepath : string
         Filepath to unzipped JSTOR DfR folder containing a citations.xml file.
+    streaming : bool
+        If True, returns a :class:`.StreamingCorpus` (see
+        :func:`.streaming_read`\).
+    workers : int
+        If greater than 1, N-gram files are parsed in a pool of ``workers``
+        processes (see :func:`.ngrams`\).
+    lazy_ngrams : bool
+        If True, N-grams are loaded into :class:`.LazyFeatureSet`\s, and each
+        document's N-grams are only parsed when they are first accessed.
+    compact : bool
+        If True, records are parsed into :class:`.CompactPaper`\s, which store
+        the standard fields in ``__slots__`` and use less memory. These fields
+        are then not in ``paper.__dict__``\. Default is False
+        (:class:`.Paper`\).
 
     Returns
     -------
@@ -229,9 +458,14 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
        >>> papers = dfr.read("/Path/to/DfR")
     """
 
+    if streaming:
+        return streaming_read(path, corpus=corpus, index_by=index_by,
+                              parse_only=parse_only, load_ngrams=load_ngrams,
+                              workers=workers, lazy_ngrams=lazy_ngrams,
+                              compact=compact, **kwargs)
+
     citationfname = _get_citation_filename(path)
     features = {}
-    featureset_types = {}
 
     # We need the primary index field in the parse results.
     if parse_only:
@@ -239,7 +473,8 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
 
     papers = []
     if citationfname:   # Valid DfR dataset.
-        parser = DfRParser(os.path.join(path, citationfname))
+        parser = DfRParser(os.path.join(path, citationfname),
+                           **_parser_kwargs(compact))
         papers += parser.parse(parse_only=parse_only)
 
     else:   # Possibly a directory containing several DfR datasets?
@@ -250,13 +485,14 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
             citationfname = _get_citation_filename(dirpath)
             if citationfname:
                 subcorpus = read(dirpath, index_by=index_by,
-                                 parse_only=parse_only)
+                                 parse_only=parse_only,
+                                 load_ngrams=load_ngrams, workers=workers,
+                                 lazy_ngrams=lazy_ngrams, compact=compact)
                 papers += subcorpus.papers
                 for featureset_name, featureset in list(subcorpus.features.items()):
-                    if featureset_name not in features:
-                        features[featureset_name] = {}
-                    features[featureset_name].update(list(featureset.items()))
-                    featureset_types[featureset_name] = type(featureset)
+                    features.setdefault(featureset_name, []).append(featureset)
+        features = {featureset_name: _combine_ngrams(featuresets)
+                    for featureset_name, featuresets in features.items()}
         load_ngrams = False
 
     if len(papers) == 0:
@@ -266,24 +502,16 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
         corpus = corpus_class(papers, index_by=index_by, **kwargs)
 
         if load_ngrams:     # Find and read N-gram data.
-            for sname in os.listdir(path):
-                fpath = os.path.join(path, sname)   # Full path.
-                if os.path.isdir(fpath) and not sname.startswith('.'):
-                    datafiles = [f for f in os.listdir(fpath)
-                                 if f.lower().endswith('xml')]
-                    if len(datafiles) > 0:
-                        features[sname] = ngrams(path, sname)
-
-        for featureset_name, featureset_values in list(features.items()):
-            if type(featureset_values) is dict:
-                fclass = featureset_types[featureset_name]
-                featureset_values = fclass(featureset_values)
-            corpus.features[featureset_name] = featureset_values
+            features.update(_load_ngrams(path, workers=workers,
+                                         lazy=lazy_ngrams))
+
+        for featureset_name, featureset in list(features.items()):
+            corpus.features[featureset_name] = featureset
 
         return corpus
     return papers
 
-def ngrams(path, elem, ignore_hash=True):
+def ngrams(path, elem, ignore_hash=True, workers=None, lazy=False):
     """
     Yields N-grams from a JSTOR DfR dataset.
 
@@ -295,6 +523,13 @@ def ngrams(path, elem, ignore_hash=True):
         Name of subdirectory containing N-grams. (e.g. 'bigrams').
     ignore_hash : bool
         If True, will exclude all N-grams that contain the hash '#' character.
+    workers : int
+        If greater than 1, the N-gram files are parsed in a pool of ``workers``
+        processes.
+    lazy : bool
+        If True, returns a :class:`.LazyFeatureSet`\: only the DOI of each
+        file is read up front, and a document's N-grams are parsed the first
+        time that they are accessed. ``workers`` is ignored.
 
     Returns
     -------
@@ -303,25 +538,53 @@ def ngrams(path, elem, ignore_hash=True):
     """
 
     grams = GramGenerator(path, elem, ignore_hash=ignore_hash)
+    jobs = [(os.path.join(path, elem, fname), grams.elem_xml, ignore_hash)
+            for fname in grams.files]
+
+    if lazy:
+        return LazyFeatureSet({_read_doi(job[0]): job for job in jobs},
+                              _read_gram_feature)
+
+    if workers and workers > 1 and len(jobs) > 1:
+        pool = Pool(min(workers, len(jobs)))
+        try:
+            # Files are small; hand them out in batches to limit IPC overhead.
+            chunksize = max(1, len(jobs) // (workers * 4))
+            results = pool.imap(_read_grams, jobs, chunksize)
+            return FeatureSet({k: Feature(f) for k, f in results})
+        finally:
+            pool.close()
+            pool.join()
+
     return FeatureSet({k: Feature(f) for k, f in grams})
 
 
-def tokenize(ngrams, min_tf=2, min_df=2, min_len=3, apply_stoplist=False):
+def tokenize(ngrams, min_tf=2, min_df=2, min_len=3, apply_stoplist=False,
+             arrays=False):
     """
     Builds a vocabulary, and replaces words with vocab indices.
 
+    ``ngrams`` is read twice (once to count words, and once to tokenize), so
+    a :class:`.GramGenerator` can be passed directly without holding every
+    document in memory.
+
     Parameters
     ----------
     ngrams : dict
         Keys are paper DOIs, values are lists of (Ngram, frequency) tuples.
+        Can also be a :class:`.GramGenerator`\.
     apply_stoplist : bool
         If True, will exclude all N-grams that contain words in the NLTK
         stoplist.
+    arrays : bool
+        If True, each document is represented as a pair of :class:`array.array`
+        instances, (vocab indices, counts), rather than a list of tuples.
 
     Returns
     -------
     t_ngrams : dict
-        Tokenized ngrams, as doi:{i:count}.
+        Tokenized ngrams, as doi:[(i, count)], or doi:(indices, counts) if
+        ``arrays`` is True.
     vocab : dict
         Vocabulary as i:term.
     token_tf : :class:`.Counter`
@@ -337,50 +600,57 @@ def tokenize(ngrams, min_tf=2, min_df=2, min_len=3, apply_stoplist=False):
     t_ngrams = {}
 
     # Get global word counts, first.
-    for grams in list(ngrams.values()):
+    for grams in ngrams.values():
         for g,c in grams:
             word_tf[g] += c
             word_df[g] += 1
 
     if apply_stoplist:
-        stoplist = stopwords.words()
+        from nltk.corpus import stopwords
+        stoplist = set(stopwords.words())
+
+    # Decide which words to keep, and assign vocab indices in order of first
+    #  occurrence.
+    tokens = {}
+    for g in word_tf:
+        # Ignore extremely rare words (probably garbage).
+        if word_tf[g] < min_tf or word_df[g] < min_df or len(g) < min_len:
+            continue
+
+        # Stoplist.
+        if apply_stoplist and any([w in stoplist for w in g.split()]):
+            continue
+
+        g_ = g if g.isascii() else unidecode(g)
+        i = vocab_.get(g_)
+        if i is None:
+            i = len(vocab)
+            vocab[i] = g_
+            vocab_[g_] = i
+        tokens[g] = i
+    del word_tf, word_df
 
     # Now tokenize.
-    for doi, grams in list(ngrams.items()):
-        t_ngrams[doi] = []
+    for doi, grams in ngrams.items():
+        indices = []
+        counts = []
         for g,c in grams:
-            ignore = False
-
-            # Ignore extremely rare words (probably garbage).
-            if word_tf[g] < min_tf or word_df[g] < min_df or len(g) < min_len:
-                ignore = True
-
-            # Stoplist.
-            elif apply_stoplist:
-                for w in g.split():
-                    if w in stoplist:
-                        ignore = True
-
-            if not ignore:
-
-                # Coerce unicode to string.
-                if type(g) is str:
-                    g = str(g)
-                g = unidecode(g)
-
-                if g not in list(vocab.values()):
-                    i = len(vocab)
-                    vocab[i] = g
-                    vocab_[g] = i
-                else:
-                    i = vocab_[g]
-                token_tf[i] += c
-                token_df[i] += 1
-
-                t_ngrams[doi].append( (i,c) )
+            i = tokens.get(g)
+            if i is None:
+                continue
+            token_tf[i] += c
+            token_df[i] += 1
+            indices.append(i)
+            counts.append(c)
+
+        if arrays:
+            t_ngrams[doi] = (array('L', indices), array('d', counts))
+        else:
+            t_ngrams[doi] = list(zip(indices, counts))
 
     return t_ngrams, vocab, token_tf
 
+
 def _handle_paper(article):
     """
     Yields a :class:`.Paper` from an article ET node.
@@ -18,12 +18,40 @@ files.
 
 import re
 import os
+import sys
+from collections import OrderedDict
+from multiprocessing import Pool
 
 from tethne.readers.base import FTParser
 from tethne import Corpus, Paper, StreamingCorpus
+from tethne.classes.paper import CompactPaper, Citation, _fields
 from tethne.utilities import _strip_punctuation, _space_sep, strip_tags, is_number
 
 
+# Patterns for cited references (CR).
+_CR_NAME_DATE = re.compile(r'([\w\s\W]+),\s([0-9]{4}),\s([\w\s]+)', flags=re.U)
+_CR_NAME_JOURNAL = re.compile(r'([\w\s\W]+),\s([\w\s]+)', flags=re.U)
+_CR_DATE = re.compile(r'([0-9]{4})')
+_CR_VOLUME = re.compile(r'\,\s+V([0-9A-Za-z]+)')
+_CR_PAGE = re.compile(r'\,\s+[Pp]([0-9A-Za-z]+)')
+_CR_DOI = re.compile(r'DOI\s(.*)')
+_FU_GRANT = re.compile(r'(.*)?\s+\[(.+)\]')
+
+
+def _copy_citation(citation):
+    """
+    Returns a copy of a (cached) cited reference, with its own field lists.
+    """
+    copied = citation.__class__.__new__(citation.__class__)
+    for key, value in list(_fields(citation).items()):
+        if key == '_authors':     # Derived from the original's lists.
+            continue
+        if type(value) is list:
+            value = list(value)
+        setattr(copied, key, value)
+    return copied
+
+
 class WoSParser(FTParser):
     """
     Parser for Web of Science field-tagged data.
@@ -56,7 +84,22 @@ class WoSParser(FTParser):
     entry_class = Paper
     """
     The class that should be used to represent a single bibliographic record.
-    This can be changed to support more sophisticated data models.
+    This can be changed to support more sophisticated data models (e.g.
+    :class:`.CompactPaper`; see ``compact`` in :func:`.read`\).
+    """
+
+    citation_class = None
+    """
+    The class that should be used to represent a single cited reference. If
+    None (default), :attr:`.entry_class` is used.
+    """
+
+    citation_cache_size = 100000
+    """
+    Maximum number of parsed cited references kept in the parser's
+    ``citation_cache`` (least-recently used references are dropped first). Pass
+    an ``OrderedDict`` as ``citation_cache`` to the constructor to share a
+    cache among several parsers.
     """
 
     tags = {
@@ -104,9 +147,16 @@ class WoSParser(FTParser):
     Maps field-tags onto field names.
     """
 
+    def __init__(self, path, **kwargs):
+        self.citation_cache = OrderedDict()
+        super(WoSParser, self).__init__(path, **kwargs)
+
     def parse_author(self, value):
         """
         Attempts to split an author name into last and first parts.
+
+        Both parts are interned (see :func:`sys.intern`\), since the same
+        names recur in many records.
         """
         tokens = tuple([t.upper().strip() for t in value.split(',')])
         if len(tokens) == 1:
@@ -121,7 +171,7 @@ class WoSParser(FTParser):
             aulast, auinit = tokens[0], ''
         aulast = _strip_punctuation(aulast).upper()
         auinit = _strip_punctuation(auinit).upper()
-        return aulast, auinit
+        return sys.intern(aulast), sys.intern(auinit)
 
     def handle_AF(self, value):
         return self.parse_author(value)
@@ -135,7 +185,7 @@ class WoSParser(FTParser):
     def handle_AU(self, value):
         aulast, auinit = self.parse_author(value)
         auinit = _space_sep(auinit)   # Separate author initials with spaces.
-        return aulast, auinit
+        return aulast, sys.intern(auinit)
 
     def handle_TI(self, value):
         """
@@ -152,25 +202,49 @@ class WoSParser(FTParser):
     def handle_CR(self, value):
         """
         Parses cited references.
+
+        The same reference usually appears in many records, so parsed
+        references are memoized in ``citation_cache``\. A :class:`.Citation`
+        is frozen and shared by all of the records that cite it; any other
+        (mutable) :attr:`.citation_class` is copied for each record, so that
+        changing one record's reference does not change the others.
+        """
+        cache = self.citation_cache
+        try:
+            citation = cache[value]
+        except KeyError:
+            citation = cache[value] = self.parse_citation(value)
+            if isinstance(citation, Citation):
+                citation._freeze()
+            if len(cache) > self.citation_cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(value)
+        if citation is None or isinstance(citation, Citation):
+            return citation
+        return _copy_citation(citation)
+
+    def parse_citation(self, value):
+        """
+        Parses a single cited reference into a new :attr:`.citation_class`
+        instance. Returns None if the reference cannot be parsed.
         """
-        citation = self.entry_class()
+        citation = (self.citation_class or self.entry_class)()
 
         value = strip_tags(value)
 
         # First-author name and publication date.
-        ptn = '([\w\s\W]+),\s([0-9]{4}),\s([\w\s]+)'
-        ny_match = re.match(ptn, value, flags=re.U)
-        nj_match = re.match('([\w\s\W]+),\s([\w\s]+)',
-                            value, flags=re.U)
+        ny_match = _CR_NAME_DATE.match(value)
         if ny_match is not None:
             name_raw, date, journal = ny_match.groups()
-        elif nj_match is not None:
+        else:
+            nj_match = _CR_NAME_JOURNAL.match(value)
+            if nj_match is None:
+                return
             name_raw, journal = nj_match.groups()
             date = None
-        else:
-            return
 
-        datematch = re.match('([0-9]{4})', value)
+        datematch = _CR_DATE.match(value)
         if datematch:
             date = datematch.group(1)
             name_raw = None
@@ -189,15 +263,16 @@ class WoSParser(FTParser):
                 aulast = name_tokens[0].upper()
                 auinit = ''
 
-            setattr(citation, 'authors_init', [(aulast, auinit)])
+            setattr(citation, 'authors_init', [(sys.intern(aulast),
+                                                sys.intern(auinit))])
 
         if date:
             date = int(date)
         setattr(citation, 'date', date)
-        setattr(citation, 'journal', journal)
+        setattr(citation, 'journal', sys.intern(journal))
 
         # Volume.
-        v_match = re.search('\,\s+V([0-9A-Za-z]+)', value)
+        v_match = _CR_VOLUME.search(value)
         if v_match is not None:
             volume = v_match.group(1)
         else:
@@ -205,7 +280,7 @@ class WoSParser(FTParser):
         setattr(citation, 'volume', volume)
 
         # Start page.
-        p_match = re.search('\,\s+[Pp]([0-9A-Za-z]+)', value)
+        p_match = _CR_PAGE.search(value)
         if p_match is not None:
             page = p_match.group(1)
         else:
@@ -213,7 +288,7 @@ class WoSParser(FTParser):
         setattr(citation, 'pageStart', page)
 
         # DOI.
-        doi_match = re.search('DOI\s(.*)', value)
+        doi_match = _CR_DOI.search(value)
         if doi_match is not None:
             doi = doi_match.group(1)
         else:
@@ -221,6 +296,14 @@ class WoSParser(FTParser):
         setattr(citation, 'doi', doi)
         return citation
 
+    def postprocess_journal(self, entry):
+        """
+        Journal names recur in many records (and cited references), so they
+        are interned.
+        """
+        if type(entry.journal) is str:
+            entry.journal = sys.intern(entry.journal)
+
     def postprocess_WC(self, entry):
         """
         Parse WC keywords.
@@ -282,7 +365,7 @@ class WoSParser(FTParser):
         sources = [fu.strip() for fu in entry.funding.split(';')]
         sources_processed = []
         for source in sources:
-            m = re.search('(.*)?\s+\[(.+)\]', source)
+            m = _FU_GRANT.search(source)
             if m:
                 agency, grant = m.groups()
             else:
@@ -342,8 +425,43 @@ def read_corpus(path, **kwargs):
     return read(path, corpus=True, **kwargs)
 
 
+def _list_datafiles(path):
+    """
+    Returns the paths of WoS data files in the directory ``path``, in a stable
+    (sorted) order.
+    """
+    return [os.path.join(path, sname) for sname in sorted(os.listdir(path))
+            if sname.endswith('txt') and not sname.startswith('.')]
+
+
+def _parser_kwargs(encoding, compact):
+    """
+    Keyword arguments for :class:`.WoSParser`\. If ``compact`` is True, records
+    are parsed into :class:`.CompactPaper`\s and cited references into
+    :class:`.Citation`\s.
+    """
+    kwargs = {'encoding': encoding}
+    if compact:
+        kwargs.update({'entry_class': CompactPaper,
+                       'citation_class': Citation})
+    return kwargs
+
+
+def _parse_file(args, citation_cache=None):
+    """
+    Parses a single WoS data file. Used as the unit of work for
+    :func:`.read` when ``workers`` is greater than 1.
+    """
+    path, parse_only, encoding, compact = args
+    kwargs = _parser_kwargs(encoding, compact)
+    if citation_cache is not None:
+        kwargs['citation_cache'] = citation_cache
+    return WoSParser(path, **kwargs).parse(parse_only=parse_only)
+
+
 def read(path, corpus=True, index_by='wosid', streaming=False, parse_only=None,
-         corpus_class=Corpus, **kwargs):
+         corpus_class=Corpus, workers=None, encoding=None, compact=False,
+         **kwargs):
     """
     Parse one or more WoS field-tagged data files.
 
@@ -364,6 +482,16 @@ def read(path, corpus=True, index_by='wosid', streaming=False, parse_only=None,
     corpus : bool
         If True (default), returns a :class:`.Corpus`\. If False, will return
         only a list of :class:`.Paper`\s.
+    workers : int
+        If greater than 1 and ``path`` is a directory, data files are parsed in
+        a pool of ``workers`` processes. :class:`.Paper`\s are always returned
+        in the (sorted) order of their data files, regardless of the number of
+        workers.
+    compact : bool
+        If True, records are parsed into :class:`.CompactPaper`\s and cited
+        references into :class:`.Citation`\s, which store the standard WoS
+        fields in ``__slots__`` and use less memory. These fields are then not
+        in ``paper.__dict__``\. Default is False (:class:`.Paper`\).
 
     Returns
     -------
@@ -379,38 +507,105 @@ def read(path, corpus=True, index_by='wosid', streaming=False, parse_only=None,
 
     if streaming:
         return streaming_read(path, corpus=corpus, index_by=index_by,
-                              parse_only=parse_only, **kwargs)
+                              parse_only=parse_only, workers=workers,
+                              encoding=encoding, compact=compact, **kwargs)
 
     if os.path.isdir(path):    # Directory containing 1+ WoS data files.
         papers = []
-        for sname in os.listdir(path):
-            if sname.endswith('txt') and not sname.startswith('.'):
-                papers += read(os.path.join(path, sname),
-                               corpus=False,
-                               parse_only=parse_only)
+        jobs = [(fpath, parse_only, encoding, compact)
+                for fpath in _list_datafiles(path)]
+        if workers and workers > 1 and len(jobs) > 1:
+            pool = Pool(min(workers, len(jobs)))
+            try:
+                # imap preserves the order of ``jobs``, so the result does not
+                #  depend on which worker finishes first.
+                for result in pool.imap(_parse_file, jobs):
+                    papers += result
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            # Cited references recur across files, too.
+            citation_cache = OrderedDict()
+            for job in jobs:
+                papers += _parse_file(job, citation_cache)
     else:   # A single data file.
-        papers = WoSParser(path).parse(parse_only=parse_only)
+        parser = WoSParser(path, **_parser_kwargs(encoding, compact))
+        papers = parser.parse(parse_only=parse_only)
 
     if corpus:
         return corpus_class(papers, index_by=index_by, **kwargs)
     return papers
 
 
+def iter_papers(path, parse_only=None, encoding=None, compact=False):
+    """
+    Yields :class:`.Paper`\s from one or more WoS field-tagged data files, one
+    record at a time.
+
+    Unlike :func:`.read`\, the parsed records are never collected in a list,
+    so this can be used to feed very large datasets into a
+    :class:`.StreamingCorpus` (or :meth:`.Corpus.add_papers`\).
+
+    .. code-block:: python
+
+       >>> from tethne.readers import wos
+       >>> for paper in wos.iter_papers("/path/to/some/wos/data"):
+       ...     print(paper.ayjid)
+
+    Parameters
+    ----------
+    path : str
+        Path to WoS field-tagged data. Can be a path directly to a single data
+        file, or to a directory containing several data files.
+    parse_only : list
+        If provided, only these fields will be parsed.
+    encoding : str
+        Character encoding of the data file(s). Detected if not provided.
+    compact : bool
+        If True, yields :class:`.CompactPaper`\s (see :func:`.read`\).
+
+    Returns
+    -------
+    generator
+    """
+
+    if not os.path.exists(path):
+        raise ValueError('No such file or directory')
+
+    if os.path.isdir(path):
+        paths = _list_datafiles(path)
+    else:
+        paths = [path]
+
+    citation_cache = OrderedDict()
+    for fpath in paths:
+        parser = WoSParser(fpath, citation_cache=citation_cache,
+                           **_parser_kwargs(encoding, compact))
+        for paper in parser.iter_parse(parse_only=parse_only):
+            yield paper
+
+
 def streaming_read(path, corpus=True, index_by='wosid', parse_only=None,
-                   **kwargs):
-
-    return read(path, corpus=corpus, index_by=index_by, parse_only=parse_only,
-                corpus_class=StreamingCorpus, **kwargs)
-    # corpus = StreamingCorpus(index_by=index_by, **kwargs)
-
-    # if os.path.isdir(path):    # Directory containing 1+ WoS data files.
-    #     papers = []
-    #     for sname in os.listdir(path):
-    #         if sname.endswith('txt') and not sname.startswith('.'):
-    #             corpus.add_papers(read(os.path.join(path, sname),
-    #                                    corpus=False,
-    #                                    parse_only=parse_only))
-    # else:   # A single data file.
-    #     corpus.add_papers(WoSParser(path).parse(parse_only=parse_only))
-    #
-    # return corpus
+                   encoding=None, compact=False, **kwargs):
+    """
+    Parse one or more WoS field-tagged data files into a
+    :class:`.StreamingCorpus`\.
+
+    Records are indexed as they are parsed (see :func:`.iter_papers`), so the
+    full list of :class:`.Paper`\s is never held in memory. ``workers`` is
+    ignored.
+    """
+    kwargs.pop('workers', None)
+    if not corpus:
+        return read(path, corpus=False, index_by=index_by,
+                    parse_only=parse_only, encoding=encoding,
+                    compact=compact)
+
+    # We need the primary index field in the parse results.
+    if parse_only and index_by not in parse_only:
+        parse_only.append(index_by)
+
+    papers = iter_papers(path, parse_only=parse_only, encoding=encoding,
+                         compact=compact)
+    return StreamingCorpus(papers, index_by=index_by, **kwargs)
@@ -1,18 +1,19 @@
 import os
+import re
+import gzip
+import hashlib
+import pickle
 import iso8601
 import logging
 import rdflib
-import nltk
 import codecs
-import magic as magic   # To detect file mime-type.
+import time
+import queue
+from collections import deque
+from functools import partial
 from io import StringIO
-from pdfminer.converter import TextConverter
-from pdfminer.layout import LAParams
-from pdfminer.pdfdocument import PDFDocument
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.pdfpage import PDFPage
-from pdfminer.pdfparser import PDFParser
-import chardet  # Detect character encodings.
+from itertools import count
+import multiprocessing
 
 import warnings
 warnings.simplefilter('always', UserWarning)
@@ -23,11 +24,17 @@ logging.getLogger('iso8601').setLevel(40)
 
 from datetime import datetime
 
-from tethne import Paper, Corpus, StructuredFeature, StructuredFeatureSet
-from tethne.readers.base import RDFParser
+from tethne import Paper, Corpus, StructuredFeature, StructuredFeatureSet, \
+                   StreamingCorpus
+from tethne.readers import _rankedwords
+from tethne.readers.base import RDFParser, _FixupStream
 from tethne.utilities import _strip_punctuation, mean
 
 
+# Zotero uses ``rdf:resource`` as a child element of attachments; it should be
+#  an attribute of ``link:link``.
+_BAD_RESOURCE = re.compile('rdf:resource rdf:resource')
+
 # RDF terms.
 RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
 DC = 'http://purl.org/dc/elements/1.1/'
@@ -46,38 +53,73 @@ IDENT = rdflib.URIRef(DC + "identifier")
 TITLE = rdflib.term.URIRef(DC + 'title')
 
 
-# Build a cost dictionary, assuming Zipf's law and cost = -math.log(probability).
-from tethne.readers._rankedwords import WORDS
-WORDCOST = dict((k, log((i+1)*log(len(WORDS)))) for i, k in enumerate(WORDS))
-MAXWORD = max(len(x) for x in WORDS)
+_WORDCOST = None     # See _load_wordcost.
+
+
+def _load_wordcost():
+    """
+    Loads the word-cost table for :func:`._infer_spaces` (once), and the
+    (sorted) lengths of the words in it.
+
+    Assuming Zipf's law, the cost of a word is ``-log(probability)``, i.e.
+    ``log(rank * log(N))``. Only the lengths of the words that are in the
+    table are tried at each position in a string.
+    """
+    global _WORDCOST
+    if _WORDCOST is None:
+        words = _rankedwords._read_words()
+        N = log(len(words))
+        wordcost = {}
+        for i, word in enumerate(words):
+            wordcost[word] = log((i+1)*N)
+        lengths = sorted(set([len(word) for word in words]))
+        _WORDCOST = wordcost, lengths
+    return _WORDCOST
+
+
+def __getattr__(name):
+    # The word-cost table takes a while to build, so these are only built
+    #  when they are first used.
+    if name == 'WORDCOST':
+        return _load_wordcost()[0]
+    elif name == 'MAXWORD':
+        return _load_wordcost()[1][-1]
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
 
 def _infer_spaces(s):
     """
     Uses dynamic programming to infer the location of spaces in a string
     without spaces.
     """
+    wordcost, lengths = _load_wordcost()
     s = s.lower()
 
-    # Find the best match for the i first characters, assuming cost has
-    # been built for the i-1 first characters.
-    # Returns a pair (match_cost, match_length).
-    def best_match(i):
-        candidates = enumerate(reversed(cost[max(0, i - MAXWORD):i]))
-        return min((c + WORDCOST.get(s[i-k-1: i], 9e999), k + 1)
-                    for k, c in candidates)
-
-    # Build the cost array.
+    # cost[i] is the cost of the best segmentation of the first i characters,
+    #  and length[i] is the length of the last word in that segmentation.
     cost = [0]
+    length = [0]
     for i in range(1, len(s) + 1):
-        c, k = best_match(i)
-        cost.append(c)
+        # Unless a known word ends here, take one character (at infinite cost).
+        best_cost, best_length = 9e999, 1
+
+        for k in lengths:
+            if k > i:
+                break
+            c = wordcost.get(s[i-k:i])
+            if c is not None:
+                c += cost[i-k]
+                if c < best_cost:   # Shortest word wins a tie.
+                    best_cost, best_length = c, k
+
+        cost.append(best_cost)
+        length.append(best_length)
 
     # Backtrack to recover the minimal-cost string.
     out = []
     i = len(s)
     while i > 0:
-        c, k = best_match(i)
-        assert c == cost[i]
+        k = length[i]
         out.append(s[i-k:i])
         i -= k
 
@@ -98,6 +140,10 @@ def extract_text(fpath):
     :class:`.StructuredFeature`
         A :class:`.StructuredFeature` that contains sentence context.
     """
+    # These are slow to import, and only needed for full-text extraction.
+    import chardet  # Detect character encodings.
+    import nltk
+
     with codecs.open(fpath, 'r') as f:  # Determine the encoding of the file.
         document = f.read()
     encoding = chardet.detect(document)['encoding']
@@ -133,6 +179,15 @@ def extract_pdf(fpath):
         A :class:`.StructuredFeature` that contains page and sentence contexts.
     """
 
+    # These are slow to import, and only needed for full-text extraction.
+    import nltk
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
     tokens = []
     pages = []
     sentences = []
@@ -175,6 +230,111 @@ def extract_pdf(fpath):
     return StructuredFeature(tokens, contexts)
 
 
+def extract(fpath):
+    """
+    Extracts structured text content from the file at ``fpath``, if it is a
+    PDF or a plain-text file.
+
+    Parameters
+    ----------
+    fpath : str
+
+    Returns
+    -------
+    mime_type : str
+    structuredfeature : :class:`.StructuredFeature`
+        Or None, if the file type is not supported.
+    """
+    import magic    # To detect file mime-type.
+    mime_type = magic.from_file(fpath, mime=True)
+    if mime_type == 'application/pdf':
+        return mime_type, extract_pdf(fpath)
+    elif mime_type == 'text/plain':
+        return mime_type, extract_text(fpath)
+    return mime_type, None
+
+
+def _cache_key(fpath):
+    """
+    Full-text cache entries are keyed by the content hash and modification
+    time of the extracted file.
+    """
+    md5 = hashlib.md5()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            md5.update(chunk)
+    mtime = os.stat(fpath).st_mtime_ns
+    return '{0}_{1}'.format(md5.hexdigest(), mtime)
+
+
+def _cache_load(cache_dir, fpath, key=None):
+    """
+    Returns the cached result of :func:`.extract` for ``fpath``, or None.
+    ``key`` is the :func:`._cache_key` of ``fpath``\, if it is already known.
+    """
+    if key is None:
+        key = _cache_key(fpath)
+    cpath = os.path.join(cache_dir, key + '.pickle')
+    if not os.path.exists(cpath):
+        return
+    with open(cpath, 'rb') as f:
+        return pickle.load(f)
+
+
+def _cache_store(cache_dir, fpath, result, key=None):
+    """
+    Caches ``result`` (from :func:`.extract`) for ``fpath``\. ``key`` is the
+    :func:`._cache_key` of ``fpath``\, if it is already known.
+    """
+    if key is None:
+        key = _cache_key(fpath)
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    cpath = os.path.join(cache_dir, key + '.pickle')
+    with open(cpath + '.tmp', 'wb') as f:
+        pickle.dump(result, f)
+    os.rename(cpath + '.tmp', cpath)     # Never leave a partial entry.
+
+
+def _preload():
+    """
+    Imports the modules and loads the data that :func:`.extract` uses, so that
+    each worker process does so only once (or, if workers are forked from a
+    process that has already called this, not at all).
+    """
+    for name in ['magic', 'chardet', 'nltk', 'pdfminer.converter',
+                 'pdfminer.layout', 'pdfminer.pdfdocument',
+                 'pdfminer.pdfinterp', 'pdfminer.pdfpage',
+                 'pdfminer.pdfparser']:
+        try:
+            __import__(name)
+        except ImportError:     # Reported by extract, if it is needed.
+            pass
+    _load_wordcost()
+
+
+def _extract_job(fpath):
+    """
+    Runs :func:`.extract` on ``fpath`` in a worker process. Exceptions that
+    cannot be pickled are replaced with a :class:`RuntimeError`\.
+    """
+    try:
+        return extract(fpath)
+    except Exception as E:
+        try:
+            pickle.dumps(E)
+        except Exception:
+            raise RuntimeError(repr(E))
+        raise
+
+
+def _done(results, n, success, result):
+    """
+    Callback for :meth:`multiprocessing.pool.Pool.apply_async`\.
+    """
+    results.put((n, success, result))
+
+
 class ZoteroParser(RDFParser):
     """
     Reads Zotero RDF files.
@@ -203,6 +363,28 @@ class ZoteroParser(RDFParser):
         ('documentType',
          rdflib.URIRef("http://www.zotero.org/namespaces/export#itemType"))]
 
+    workers = None
+    """
+    If set, full-text content is extracted after parsing, in up to
+    ``workers`` processes at a time, rather than as each record is parsed.
+    """
+
+    timeout = None
+    """
+    Seconds to allow for the extraction of each file, when ``workers`` is
+    set.
+    """
+
+    maxtasksperchild = 100
+    """
+    Number of files that each worker process extracts before it is replaced
+    (see :class:`multiprocessing.pool.Pool`\), so that memory that is leaked
+    while extracting is returned.
+    """
+
+    cache_dir = None
+    """If set, extracted full-text content is cached in this directory."""
+
     def __init__(self, path, **kwargs):
         if os.path.isdir(path):    # Preserve the old behavior.
             name = os.path.split(path)[1]
@@ -211,6 +393,7 @@ class ZoteroParser(RDFParser):
         super(ZoteroParser, self).__init__(path, **kwargs)
 
         self.full_text = {}     # Collect StructuredFeatures until finished.
+        self.pending_links = []     # (ident, path) to extract, if `workers`.
         self.follow_links = kwargs.get('follow_links', False) # Boolean switch to follow links associated with a paper
 
     def open(self):
@@ -220,14 +403,21 @@ class ZoteroParser(RDFParser):
         as an attribute of ``link:link``.
         """
 
-        with open(self.path, 'r') as f:
-            corrected = f.read().replace('rdf:resource rdf:resource',
-                                         'link:link rdf:resource')
-        with open(self.path, 'w') as f:
-            f.write(corrected)
+        self._check_streaming()
+        if not self.streaming:  # Otherwise, corrected as it is read.
+            with open(self.path, 'r') as f:
+                corrected = f.read().replace('rdf:resource rdf:resource',
+                                             'link:link rdf:resource')
+            with open(self.path, 'w') as f:
+                f.write(corrected)
 
         super(ZoteroParser, self).open()
 
+    def open_source(self):
+        return _FixupStream(codecs.open(self.path, 'r', encoding='utf-8'),
+                            _BAD_RESOURCE, 'link:link rdf:resource',
+                            holdback=len('rdf:resource rdf:resource') - 1)
+
     def handle_identifier(self, value):
         """
 
@@ -371,21 +561,6 @@ class ZoteroParser(RDFParser):
             if not os.path.exists(link):
                 continue
 
-            mime_type = magic.from_file(link, mime=True)
-            if mime_type == 'application/pdf':
-                structuredfeature = extract_pdf(link)
-            elif mime_type == 'text/plain':
-                structuredfeature = extract_text(link)
-            else:
-                structuredfeature = None
-
-            if not structuredfeature:
-                continue
-
-            fset_name = mime_type.split('/')[-1] + '_text'
-            if not fset_name in self.full_text:
-                self.full_text[fset_name] = {}
-
             if hasattr(self, 'index_by'):
                 ident = getattr(entry, self.index_by)
                 if type(ident) is list:
@@ -393,10 +568,167 @@ class ZoteroParser(RDFParser):
             else:   # If `index_by` is not set, use `uri` by default.
                 ident = entry.uri
 
-            self.full_text[fset_name][ident] = structuredfeature
+            if self.workers:    # Extract them all at once, later.
+                self.pending_links.append((ident, link))
+                continue
+
+            key = self._cache_key(link)
+            result = self._load_cached(link, key)
+            if result is None:
+                result = extract(link)
+                self._store_cached(link, result, key)
+            self._add_full_text(ident, *result)
+
+    def _cache_key(self, link):
+        if self.cache_dir:
+            return _cache_key(link)
+
+    def _load_cached(self, link, key):
+        if self.cache_dir:
+            return _cache_load(self.cache_dir, link, key)
 
+    def _store_cached(self, link, result, key):
+        if self.cache_dir:
+            _cache_store(self.cache_dir, link, result, key)
+
+    def _add_full_text(self, ident, mime_type, structuredfeature):
+        if not structuredfeature:
+            return
+
+        fset_name = mime_type.split('/')[-1] + '_text'
+        if not fset_name in self.full_text:
+            self.full_text[fset_name] = {}
+        self.full_text[fset_name][ident] = structuredfeature
+
+    def _pool(self):
+        """
+        A pool of ``workers`` long-lived processes for :meth:`.extract_pending`\.
+        """
+        if multiprocessing.get_start_method() == 'fork':
+            _preload()      # Shared by the forked workers.
+        return multiprocessing.Pool(self.workers, initializer=_preload,
+                                    maxtasksperchild=self.maxtasksperchild)
 
-def read(path, corpus=True, index_by='uri', follow_links=False, **kwargs):
+    def extract_pending(self):
+        """
+        Extracts full-text content from the files collected during parsing
+        (when ``workers`` is set), in a pool of ``workers`` processes.
+
+        Only as many files as there are workers are submitted at a time, so
+        that each file starts as soon as it is submitted. A file that takes
+        longer than ``timeout`` seconds (counted from then) is skipped with a
+        warning. Since a single worker cannot be stopped, the pool is then
+        replaced, and the other files that were being extracted are started
+        again. Without a ``timeout``\, a worker that dies (rather than raising
+        an exception) leaves its file waiting indefinitely.
+        """
+        pending, self.pending_links = self.pending_links, []
+
+        jobs = deque()
+        for ident, link in pending:
+            key = self._cache_key(link)
+            result = self._load_cached(link, key)
+            if result is not None:
+                self._add_full_text(ident, *result)
+            else:
+                jobs.append((ident, link, key))
+        if not jobs:
+            return
+
+        results = queue.Queue()     # Filled by the pool's callbacks.
+        numbers = count()
+        pool = None
+        running = {}    # Job number -> (ident, link, key, deadline).
+        try:
+            while jobs or running:
+                if pool is None:
+                    pool = self._pool()
+                while jobs and len(running) < self.workers:
+                    ident, link, key = jobs.popleft()
+                    n = next(numbers)
+                    pool.apply_async(_extract_job, (link,),
+                                     callback=partial(_done, results, n, True),
+                                     error_callback=partial(_done, results, n,
+                                                            False))
+                    deadline = None
+                    if self.timeout is not None:
+                        deadline = time.monotonic() + self.timeout
+                    running[n] = (ident, link, key, deadline)
+
+                deadlines = [deadline for _, _, _, deadline
+                             in running.values() if deadline is not None]
+                wait_for = None
+                if deadlines:
+                    wait_for = max(0, min(deadlines) - time.monotonic())
+
+                try:
+                    n, success, result = results.get(timeout=wait_for)
+                except queue.Empty:
+                    pass
+                else:
+                    if n in running:    # Not from a pool that was replaced.
+                        ident, link, key, _ = running.pop(n)
+                        if not success:
+                            raise result
+                        self._store_cached(link, result, key)
+                        self._add_full_text(ident, *result)
+
+                now = time.monotonic()
+                expired = [n for n, (_, _, _, deadline) in running.items()
+                           if deadline is not None and deadline <= now]
+                if expired:
+                    pool.terminate()
+                    pool.join()
+                    pool = None
+                    for n in expired:
+                        link = running.pop(n)[1]
+                        warnings.warn('Timed out extracting full text from %s'
+                                      % link, UserWarning)
+                    for n in sorted(running, reverse=True):   # Start again.
+                        jobs.appendleft(running.pop(n)[:3])
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def parse(self):
+        data = super(ZoteroParser, self).parse()
+        if self.pending_links:
+            self.extract_pending()
+        return data
+
+
+def iter_papers(path, index_by='uri', **kwargs):
+    """
+    Yields :class:`.Paper`\s from a Zotero RDF export, one record at a time.
+
+    Unlike :func:`.read`\, the parsed records are never collected in a list.
+    Full-text content is not extracted.
+
+    Parameters
+    ----------
+    path : str
+        Path to the output directory created by Zotero, or to the RDF file
+        itself.
+    index_by : str
+        (default: ``'uri'``) :class:`.Paper` attribute name to use as the
+        primary indexing field.
+    kwargs : kwargs
+        Passed to :class:`.ZoteroParser`\. With ``streaming=True``, the RDF
+        is read incrementally, and records are yielded in document order.
+
+    Returns
+    -------
+    generator
+    """
+    parser = ZoteroParser(path, index_by=index_by, **kwargs)
+    for paper in parser.iter_parse():
+        yield paper
+
+
+def read(path, corpus=True, index_by='uri', follow_links=False, workers=None,
+         timeout=None, cache_dir=None, streaming=False, lookahead=100,
+         **kwargs):
     """
     Read bibliographic data from Zotero RDF.
 
@@ -431,6 +763,27 @@ def read(path, corpus=True, index_by='uri', follow_links=False, **kwargs):
     follow_links : bool
         If ``True``, attempts to load full-text content from attached files
         (e.g. PDFs with embedded text). Default: False.
+    workers : int
+        If set (and ``follow_links`` is True), attached files are collected
+        while parsing, and their content is then extracted in up to
+        ``workers`` processes at a time.
+    timeout : float
+        With ``workers``, the number of seconds to allow for the extraction
+        of each attached file (from when it starts); files that take longer
+        are skipped.
+    cache_dir : str
+        If set, extracted full-text content is cached in this directory, keyed
+        by the hash and modification time of each file, so that reading the
+        collection again does not re-extract files.
+    streaming : bool
+        If True, the RDF is read incrementally rather than loaded into a single
+        in-memory graph, so that memory use does not grow with the size of the
+        collection, and (if ``corpus`` is True) returns a
+        :class:`.StreamingCorpus`\. Papers are read in document order.
+    lookahead : int
+        With ``streaming``, the number of top-level RDF elements to wait for
+        the journal and attachments of each item, which Zotero writes after the
+        item itself.
     kwargs : kwargs
         Passed to the :class:`.Corpus` constructor.
 
@@ -440,15 +793,24 @@ def read(path, corpus=True, index_by='uri', follow_links=False, **kwargs):
     """
     # TODO: is there a case where `from_dir` would make sense?
 
-    parser = ZoteroParser(path, index_by=index_by, follow_links=follow_links)
-    papers = parser.parse()
-
-    if corpus:
-        c = Corpus(papers, index_by=index_by, **kwargs)
+    parser = ZoteroParser(path, index_by=index_by, follow_links=follow_links,
+                          workers=workers, timeout=timeout,
+                          cache_dir=cache_dir, streaming=streaming,
+                          lookahead=lookahead)
+    if not corpus:
+        return parser.parse()
+
+    if streaming:
+        c = StreamingCorpus(parser.iter_parse(), index_by=index_by, **kwargs)
+        if parser.pending_links:
+            parser.extract_pending()
+    else:
+        c = Corpus(parser.parse(), index_by=index_by, **kwargs)
         if c.duplicate_papers:
             warnings.warn("Duplicate papers detected. Use the 'duplicate_papers' attribute of the corpus to get the list", UserWarning)
 
-        for fset_name, fset_values in parser.full_text.items():
-            c.features[fset_name] = StructuredFeatureSet(fset_values)
-        return c
-    return papers
+    for fset_name, fset_values in parser.full_text.items():
+        c.features[fset_name] = StructuredFeatureSet(fset_values)
+    if streaming:
+        c.flush()
+    return c
@@ -0,0 +1,185 @@
+import sys
+sys.path.append('./')
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tethne.readers import wos, dfr
+from tethne import Corpus, Paper, FeatureSet
+from tethne.classes.columnar import ColumnarCorpus, write_columnar, _DERIVED
+from tethne.classes.paper import CompactPaper, _fields
+from tethne.networks import authors, papers
+
+datapath = './tethne/tests/data/wos2.txt'
+dfr_datapath = './tethne/tests/data/dfr'
+
+
+class TestColumnarCorpus(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.corpus = wos.read(datapath)
+        write_columnar(self.corpus, self.tmp)
+        self.columnar = ColumnarCorpus(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_papers(self):
+        """
+        Papers are rebuilt with the same fields.
+        """
+        self.assertEqual(len(self.columnar), len(self.corpus))
+        self.assertEqual(list(self.columnar.indexed_papers.keys()),
+                         list(self.corpus.indexed_papers.keys()))
+        for i in [0, 5, -1]:
+            paper, expected = self.columnar[i], self.corpus[i]
+            self.assertIs(type(paper), type(expected))
+            self.assertEqual(set(_fields(paper)),
+                             set(_fields(expected)) - _DERIVED)
+            self.assertEqual(paper.title, expected.title)
+            self.assertEqual(paper.date, expected.date)
+            self.assertEqual(paper.authors, expected.authors)
+            self.assertEqual(len(paper.citations), len(expected.citations))
+
+    def test_select(self):
+        key = list(self.corpus.indexed_papers.keys())[3]
+        self.assertEqual(self.columnar[key].wosid, key)
+        self.assertEqual(self.columnar.select(('date', 2012), index_only=True),
+                         self.corpus.select(('date', 2012), index_only=True))
+        self.assertEqual(
+            [p.wosid for p in self.columnar[('date', [2011, 2012])]],
+            [p.wosid for p in self.corpus[('date', [2011, 2012])]])
+        self.assertEqual([p.wosid for p in self.columnar[[1, 2, 3]]],
+                         [p.wosid for p in self.corpus[[1, 2, 3]]])
+        self.assertEqual(self.columnar[('date', 1066)], [])
+
+        # Keys that are also citations are interned before they are added.
+        corpus = wos.read(datapath, index_by='ayjid')
+        write_columnar(corpus, self.tmp)
+        columnar = ColumnarCorpus(self.tmp)
+        for selector in [('date', 2012), ('date', [2011, 2012])]:
+            self.assertEqual(columnar.select(selector, index_only=True),
+                             corpus.select(selector, index_only=True))
+            self.assertEqual(corpus.select(selector, index_only=True),
+                             [key for key in corpus.indexed_papers
+                              if key in corpus.select(selector,
+                                                      index_only=True)])
+
+        citation = list(self.corpus.indices['citations'].keys())[0]
+        for selector in [(('date', [2011, 2012]), ('citations', citation)),
+                         [('date', 2011), ('citations', citation)]]:
+            self.assertEqual(self.columnar.select(selector, index_only=True),
+                             self.corpus.select(selector, index_only=True))
+
+    def test_column(self):
+        self.assertEqual(self.columnar.column('date'),
+                         [p.date for p in self.corpus.papers])
+        self.assertRaises(KeyError, self.columnar.column, 'citedReferences')
+
+    def test_slice(self):
+        self.assertEqual(self.columnar.distribution(),
+                         self.corpus.distribution())
+        self.assertEqual(
+            [(key, len(sub)) for key, sub in self.columnar.slice(window_size=2)],
+            [(key, len(sub)) for key, sub in self.corpus.slice(window_size=2)])
+
+    def test_indices_lookup(self):
+        for key in list(self.corpus.indexed_papers.keys())[:5]:
+            self.assertEqual(self.columnar.indices_lookup[key],
+                             self.corpus.indices_lookup[key])
+
+    def test_features(self):
+        for name in ['authors', 'citations']:
+            featureset = self.columnar.features[name]
+            expected = self.corpus.features[name]
+            self.assertIsInstance(featureset, FeatureSet)
+            self.assertEqual(len(featureset.features), len(expected.features))
+            self.assertEqual(featureset.top(10), expected.top(10))
+            self.assertEqual(dict(featureset.with_feature),
+                             dict(expected.with_feature))
+            self.assertEqual(dict(featureset.documentCounts),
+                             dict(expected.documentCounts))
+
+    def test_networks(self):
+        expected = authors.coauthors(self.corpus)
+        graph = authors.coauthors(self.columnar)
+        self.assertEqual(graph.order(), expected.order())
+        self.assertEqual(graph.size(), expected.size())
+
+        expected = papers.cocitation(self.corpus, min_weight=2)
+        graph = papers.cocitation(self.columnar, min_weight=2)
+        self.assertEqual(sorted(graph.edges()), sorted(expected.edges()))
+
+    def test_subcorpus(self):
+        subcorpus = self.columnar.subcorpus(('date', 2012))
+        self.assertIs(type(subcorpus), Corpus)
+        self.assertEqual(len(subcorpus), len(self.corpus[('date', 2012)]))
+
+    def test_record_classes(self):
+        """
+        Each paper is rebuilt as its own class, without the cached values of
+        derived fields.
+        """
+        compact = wos.read(datapath, corpus=False, compact=True)[0]
+        self.assertIsInstance(compact, CompactPaper)
+        compact.authors      # Sets the cache.
+        paper = Paper()
+        paper['wosid'] = 'WOS:PLAIN'
+        paper['date'] = 2014
+        corpus = Corpus([compact, paper], index_by='wosid')
+        write_columnar(corpus, self.tmp)
+        columnar = ColumnarCorpus(self.tmp)
+
+        self.assertIs(type(columnar[0]), CompactPaper)
+        self.assertIs(type(columnar[1]), Paper)
+        self.assertEqual(columnar[1].date, 2014)
+        for paper in columnar.papers:
+            self.assertFalse(set(_fields(paper)) & _DERIVED)
+        self.assertEqual(columnar[0].authors, compact.authors)
+
+    def test_record_classes_checked(self):
+        """
+        Only :class:`.Paper` classes named in the manifest are used.
+        """
+        path = os.path.join(self.tmp, 'manifest.json')
+        with open(path) as f:
+            manifest = json.load(f)
+        for name, error in [('os:system', TypeError), ('os', ValueError)]:
+            manifest['record_classes'] = [name]
+            with open(path, 'w') as f:
+                json.dump(manifest, f)
+            self.assertRaises(error, ColumnarCorpus, self.tmp)
+
+    def test_readonly(self):
+        self.assertRaises(TypeError, self.columnar.add_papers, [Paper()])
+
+    def test_index(self):
+        self.columnar.index('journal')
+        self.corpus.index('journal')
+        self.assertEqual(dict(self.columnar.indices['journal']),
+                         dict(self.corpus.indices['journal']))
+
+    def test_index_len(self):
+        index = self.columnar.indices['date']
+        expected = self.corpus.indices['date']
+        self.assertEqual(len(index), len(expected))
+        self.assertIsNone(index._values)    # The values are not loaded.
+
+        index[1066] = [self.corpus.papers[0].wosid]
+        self.assertEqual(len(index), len(expected) + 1)
+        self.assertEqual(set(index.keys()), set(expected.keys()) | {1066})
+
+    def test_dfr(self):
+        corpus = dfr.read(dfr_datapath)
+        write_columnar(corpus, self.tmp)
+        columnar = ColumnarCorpus(self.tmp)
+        self.assertEqual(len(columnar), len(corpus))
+        self.assertEqual(columnar.features['wordcounts'].top(5),
+                         corpus.features['wordcounts'].top(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ sys.path.append('./')
 import unittest
 from tethne.readers.wos import read
 from tethne import Corpus, Paper, FeatureSet, Feature
+from tethne.classes.corpus import _intersection
 from tethne.utilities import _iterable
 
 datapath = './tethne/tests/data/wos.txt'
@@ -45,6 +46,43 @@ class TestCorpus(unittest.TestCase):
             self.assertEqual(len(corpus.indices[field]), expected,
                              'Index for {0} is the wrong size.'.format(field))
 
+    def test_index_frozen(self):
+        """
+        Index values are immutable, so later changes to a :class:`.Paper` do
+        not change the index.
+        """
+        paper = Paper()
+        paper['wosid'] = 'WOS:1'
+        paper['keywords'] = [['GENE', 'FLOW'], 'POLLEN']
+        corpus = Corpus([paper], index_by='wosid')
+        corpus.index('keywords')
+        self.assertIn(('GENE', 'FLOW'), corpus.indices['keywords'])
+
+        paper.keywords[0].append('RATE')
+        self.assertIn(('GENE', 'FLOW'), corpus.indices['keywords'])
+        self.assertEqual(corpus.indices_lookup['WOS:1']['keywords'],
+                         (('GENE', 'FLOW'), 'POLLEN'))
+
+    def test_index_batch(self):
+        """
+        Several attributes and featuresets can be indexed in one pass.
+        """
+        corpus = Corpus(self.papers, index_by='wosid')
+        corpus.index_batch(attrs=['journal', 'issue'],
+                           features=['keywordsPlus'])
+
+        expected = Corpus(self.papers, index_by='wosid')
+        expected.index('journal')
+        expected.index('issue')
+        expected.index_feature('keywordsPlus')
+        for attr in ['journal', 'issue']:
+            self.assertEqual(dict(corpus.indices[attr]),
+                             dict(expected.indices[attr]))
+        self.assertEqual(dict(corpus.features['keywordsPlus'].counts),
+                         dict(expected.features['keywordsPlus'].counts))
+        self.assertEqual(dict(corpus.indices_lookup),
+                         dict(expected.indices_lookup))
+
     def test_slice(self):
         corpus = Corpus(self.papers, index_by='wosid')
         for key, papers in corpus.slice():
@@ -107,6 +145,60 @@ class TestCorpus(unittest.TestCase):
         ikeys = list(corpus.indexed_papers.keys())[0:2]
         self.assertEqual(len(corpus[ikeys]), len(ikeys))
         self.assertIsInstance(corpus[ikeys][0], Paper)
+        self.assertEqual(corpus.select([-1, 1], index_only=True),
+                         [list(corpus.indexed_papers.keys())[i]
+                          for i in [-1, 1]])
+
+    def test_select_combined(self):
+        """
+        Selectors can be combined with AND (tuples) and OR (lists).
+        """
+        corpus = Corpus(self.papers, index_by='wosid')
+        keys = list(corpus.indexed_papers.keys())
+        citation, citing = max(corpus.indices['citations'].items(),
+                               key=lambda item: len(item[1]))
+        date = corpus.indexed_papers[citing[0]].date
+        dates = range(date - 1, date + 2)
+
+        in_dates = [key for key in keys
+                    if corpus.indexed_papers[key].date in dates]
+        self.assertEqual(corpus.select(('date', dates), index_only=True),
+                         in_dates)
+        self.assertEqual(corpus.select(('date', list(dates)), index_only=True),
+                         in_dates)
+
+        both = [key for key in in_dates if key in citing]
+        self.assertEqual(corpus.select((('date', dates),
+                                        ('citations', citation)),
+                                       index_only=True), both)
+        self.assertEqual(corpus[('date', dates), ('citations', citation)],
+                         [corpus.indexed_papers[key] for key in both])
+
+        either = [key for key in keys if key in in_dates or key in citing]
+        self.assertEqual(corpus.select([('date', dates),
+                                        ('citations', citation)],
+                                       index_only=True), either)
+
+        self.assertEqual(corpus[('date', 1066), ('citations', citation)], [])
+        self.assertEqual(corpus[('date', [1066, 1067])], [])
+        self.assertEqual(len(_intersection([])), 0)
+
+    def test_select_order(self):
+        """
+        Papers are selected in the order in which they were added, even if
+        their keys were first seen as values in another index.
+        """
+        papers = []
+        for i in range(3):
+            paper = Paper()
+            paper['wosid'] = 'WOS:%i' % i
+            paper['date'] = 2000
+            paper['keywords'] = ['WOS:2'] if i == 0 else ['OTHER']
+            papers.append(paper)
+        corpus = Corpus(papers, index_by='wosid', index_fields=['keywords'])
+        corpus.index('date')
+        self.assertEqual(corpus.select(('date', 2000), index_only=True),
+                         ['WOS:0', 'WOS:1', 'WOS:2'])
 
     def test_top_features(self):
         corpus = Corpus(self.papers, index_by='wosid')
@@ -3,7 +3,7 @@ sys.path.append('./')
 
 import unittest
 
-from tethne.classes.feature import Feature, FeatureSet
+from tethne.classes.feature import Feature, FeatureSet, LazyFeatureSet
 
 import logging
 logger = logging.getLogger('feature')
@@ -210,6 +210,102 @@ class TestFeatureSet(unittest.TestCase):
         self.assertEqual(featureset.documentCount('bob'), 1)
         self.assertEqual(featureset.count('bob'), 3)
 
+    def test_shared_elements(self):
+        """
+        Each element is stored once, and shared by all of the
+        :class:`.Feature`\s in a :class:`.FeatureSet`\.
+        """
+        # Built at runtime, so that they are distinct objects.
+        bob = lambda: ''.join(['b', 'o', 'b'])
+        smith = lambda: (''.join(['SMI', 'TH']), ''.join(['J']))
+        features = {'p1': Feature([(bob(), 3), (smith(), 1)]),
+                    'p2': Feature([(bob(), 1), (smith(), 2)])}
+        self.assertIsNot(features['p1'][0][0], features['p2'][0][0])
+
+        added = FeatureSet()
+        for paper_id, feature in features.items():
+            added.add(paper_id, Feature(list(feature)))
+
+        for featureset in [FeatureSet(features), added]:
+            p1, p2 = featureset.features['p1'], featureset.features['p2']
+            for (a, _), (b, _) in zip(p1, p2):
+                self.assertIs(a, b)
+                self.assertIs(featureset.index[featureset.lookup[a]], a)
+            self.assertIs(p1[0][0], sys.intern('bob'))
+            self.assertEqual(featureset.count('bob'), 4)
+            self.assertEqual(featureset.count(('SMITH', 'J')), 3)
+
+    def test_lazy(self):
+        """
+        :class:`.LazyFeatureSet` only loads features when they are needed.
+        """
+        sources = {'p1': [('bob', 3), ('joe', 1)],
+                   'p2': [('bob', 2), ('bobert', 1)]}
+        featureset = LazyFeatureSet(sources, Feature)
+
+        self.assertEqual(len(featureset), 2)
+        self.assertEqual(featureset.loaded, 0)
+        self.assertEqual(featureset['p1'], Feature(sources['p1']))
+        self.assertEqual(featureset.loaded, 1)
+
+        self.assertEqual(featureset.count('bob'), 5)
+        self.assertEqual(featureset.documentCount('bob'), 2)
+        self.assertEqual(featureset.loaded, 2)
+
+        featureset.add('p3', Feature([('bob', 1)]))
+        self.assertEqual(len(featureset), 3)
+        self.assertEqual(featureset.count('bob'), 6)
+        self.assertIn('p3', featureset.papers_containing('bob'))
+
+    def test_merge(self):
+        """
+        Merging two :class:`.FeatureSet`\s gives the same aggregates as
+        building one from all of their features.
+        """
+        features_1 = {'p1': Feature([('bob', 3), ('joe', 1)]),
+                      'p2': Feature([('bob', 2), ('bobert', 1)])}
+        features_2 = {'p2': Feature([('blob', 4)]),     # Ignored.
+                      'p3': Feature([('joe', 2), ('brobert', 1)])}
+        merged = FeatureSet(features_1).merge(FeatureSet(features_2))
+
+        expected = dict(features_2)
+        expected.update(features_1)
+        expected = FeatureSet(expected)
+
+        self.assertEqual(len(merged), 3)
+        self.assertEqual(merged['p2'], features_1['p2'])
+        self.assertSetEqual(merged.unique, expected.unique)
+        for elem in expected.unique:
+            self.assertEqual(merged.count(elem), expected.count(elem))
+            self.assertEqual(merged.documentCount(elem),
+                             expected.documentCount(elem))
+            self.assertSetEqual(set(merged.papers_containing(elem)),
+                                set(expected.papers_containing(elem)))
+
+    def test_merge_ids(self):
+        """
+        Papers can be given new IDs as they are merged.
+        """
+        featureset_1 = FeatureSet({'p1': Feature([('bob', 3)])})
+        featureset_2 = LazyFeatureSet({'q1': [('bob', 1), ('joe', 1)],
+                                       'q2': [('joe', 2)]}, Feature)
+        merged = featureset_1.merge(featureset_2, ids={'p1': 'x'},
+                                    other_ids={'q1': 'x', 'q2': 'y'})
+
+        self.assertIsInstance(merged, FeatureSet)
+        self.assertSetEqual(set(merged.features.keys()), set(['x', 'y']))
+        self.assertEqual(merged.count('bob'), 3)
+        self.assertEqual(merged.count('joe'), 2)
+        self.assertEqual(merged.papers_containing('joe'), ['y'])
+
+        # The originals are not modified.
+        self.assertEqual(list(featureset_1.features.keys()), ['p1'])
+        self.assertEqual(featureset_2.count('bob'), 1)
+
+        featureset_1.merge(featureset_2, inplace=True)
+        self.assertEqual(len(featureset_1), 3)
+        self.assertEqual(featureset_1.count('bob'), 4)
+
     def test_top(self):
         featureset = FeatureSet()
         feature = Feature([('bob', 3), ('joe', 1), ('bobert', 1)])
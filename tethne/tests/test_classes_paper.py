@@ -0,0 +1,112 @@
+import sys
+sys.path.append('./')
+
+import pickle
+import unittest
+from tethne import Paper, CompactPaper, Citation
+from tethne.classes.paper import _fields, feature_cache_info, \
+                                 reset_feature_cache_info
+from tethne.readers.wos import read
+
+datapath = './tethne/tests/data/wos.txt'
+
+
+class TestCompactPaper(unittest.TestCase):
+    def test_fields(self):
+        """
+        Known fields are stored in slots; others in ``__dict__``\.
+        """
+        paper = CompactPaper()
+        paper['date'] = 1995
+        paper['authors_full'] = [('SMITH', 'JOHN')]
+        paper['nonstandard'] = 'value'
+        self.assertIsInstance(paper, Paper)
+        self.assertEqual(paper['date'], 1995)
+        self.assertEqual(paper.nonstandard, 'value')
+        self.assertNotIn('date', paper.__dict__)
+        self.assertEqual(_fields(paper), {'date': 1995, 'nonstandard': 'value',
+                                          'authors_full': [('SMITH', 'JOHN')]})
+        self.assertEqual(paper.authors, [(('SMITH', 'JOHN'), 1)])
+        self.assertFalse(hasattr(paper, 'title'))
+
+        self.assertEqual(paper.ayjid, 'SMITH_J_1995')
+
+        copied = pickle.loads(pickle.dumps(paper))
+        self.assertEqual(_fields(copied), _fields(paper))
+
+    def test_read(self):
+        papers = read(datapath, corpus=False)
+        self.assertIs(type(papers[0]), Paper)
+        self.assertIs(type(papers[0].citedReferences[0]), Paper)
+        self.assertIn('date', papers[0].__dict__)
+
+        papers = read(datapath, corpus=False, compact=True)
+        self.assertIsInstance(papers[0], CompactPaper)
+        citation = papers[0].citedReferences[0]
+        self.assertIsInstance(citation, Citation)
+        self.assertIn(citation.ayjid, dict(papers[0].citations))
+
+
+class TestCitation(unittest.TestCase):
+    def test_fields(self):
+        citation = Citation()
+        citation['authors_init'] = [('DOLE', 'RJ')]
+        citation['date'] = 1952
+        citation['journal'] = 'CELL'
+        self.assertEqual(citation.ayjid, 'DOLE_RJ_1952_CELL')
+        self.assertEqual(citation['date'], 1952)
+        self.assertFalse(hasattr(citation, 'volume'))
+        self.assertFalse(hasattr(citation, '__dict__'))
+        self.assertRaises(AttributeError, citation.__setitem__, 'foo', 'bar')
+
+        copied = pickle.loads(pickle.dumps(citation))
+        self.assertEqual(_fields(copied), _fields(citation))
+
+    def test_frozen(self):
+        citation = Citation()
+        citation['date'] = 1952
+        citation._freeze()
+        self.assertRaises(AttributeError, citation.__setitem__, 'date', 1953)
+        self.assertRaises(AttributeError, delattr, citation, 'date')
+        citation.ayjid      # Derived fields are still cached.
+        citation.authors
+
+        copied = pickle.loads(pickle.dumps(citation))
+        self.assertEqual(_fields(copied), _fields(citation))
+        self.assertRaises(AttributeError, copied.__setitem__, 'date', 1953)
+
+
+class TestFeatureCache(unittest.TestCase):
+    def setUp(self):
+        reset_feature_cache_info()
+
+    def test_authors(self):
+        """
+        :attr:`.Paper.authors` is only rebuilt when its source fields are set.
+        """
+        for cls in [Paper, CompactPaper]:
+            reset_feature_cache_info()
+            paper = cls()
+            paper['authors_init'] = [('SMITH', 'J')]
+            authors = paper.authors
+            self.assertIs(paper.authors, authors)
+            self.assertEqual(feature_cache_info(), (1, 1))
+
+            paper['authors_full'] = [('SMITH', 'JOHN')]
+            self.assertEqual(paper.authors, [(('SMITH', 'JOHN'), 1)])
+            del paper.authors_full
+            self.assertEqual(paper.authors, [(('SMITH', 'J'), 1)])
+            self.assertEqual(feature_cache_info(), (1, 3))
+
+    def test_citations(self):
+        papers = read(datapath, corpus=False)
+        citations = [paper.citations for paper in papers]
+        self.assertEqual([paper.citations for paper in papers], citations)
+        self.assertEqual(feature_cache_info(), (len(papers), len(papers)))
+
+        papers[0].citedReferences = papers[0].citedReferences[:2]
+        self.assertEqual(len(papers[0].citations), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
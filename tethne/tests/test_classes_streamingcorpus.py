@@ -1,9 +1,13 @@
 import sys
 sys.path.append('./')
 
+import os
+import shutil
+import tempfile
 import unittest
 from tethne.readers.wos import read
 from tethne import StreamingCorpus, Paper
+from tethne.classes.streaming import StreamingIndex
 from tethne.utilities import _iterable
 
 datapath = './tethne/tests/data/wos.txt'
@@ -113,5 +117,234 @@ class TestStreamingCorpus(unittest.TestCase):
         self.assertEqual(len(subcorpus), 2)
 
 
+class TestStreamingIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.papers = read(datapath, corpus=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_batches(self):
+        """
+        Papers are written in batches to packed segment files.
+        """
+        index = StreamingIndex(base_path=self.tmp, batch_size=4,
+                               segment_size=4096)
+        for paper in self.papers:
+            index[paper.wosid] = paper
+        self.assertEqual(len(index.pending), len(self.papers) % 4)
+        self.assertEqual(len(index), len(self.papers))
+        self.assertEqual(index[self.papers[-1].wosid].title,
+                         self.papers[-1].title)
+
+        index.flush()
+        files = os.listdir(index.index_path)
+        self.assertIn('manifest.log', files)
+        self.assertGreater(len([f for f in files if f.startswith('segment')]),
+                           1)
+        self.assertLess(len(files), len(self.papers))
+        self.assertEqual(index.keys(), [paper.wosid for paper in self.papers])
+
+    def test_reopen(self):
+        index = StreamingIndex(base_path=self.tmp)
+        index.update(dict((paper.wosid, paper) for paper in self.papers))
+        index['replaced'] = self.papers[0]
+        index.close()
+
+        index = StreamingIndex(base_path=self.tmp)
+        index['replaced'] = self.papers[1]
+        index.close()
+
+        # An interrupted write to the manifest is ignored.
+        with open(os.path.join(index.index_path, 'manifest.log'), 'ab') as f:
+            f.write(b'\x80\x05\x95')
+
+        index = StreamingIndex(base_path=self.tmp)
+        self.assertEqual(len(index), len(self.papers) + 1)
+        self.assertEqual(index['replaced'].wosid, self.papers[1].wosid)
+        for paper in self.papers:
+            self.assertEqual(index[paper.wosid].title, paper.title)
+
+    def test_truncated_manifest(self):
+        """
+        A torn write at the end of the manifest is discarded when the store
+        is reopened, so that papers that are added later can be read.
+        """
+        first = dict((paper.wosid, paper) for paper in self.papers[:5])
+        second = dict((paper.wosid, paper) for paper in self.papers[5:8])
+        later = dict((paper.wosid, paper) for paper in self.papers[8:])
+        for cut in range(1, 40):
+            name = 'cut%i' % cut
+            index = StreamingIndex(base_path=self.tmp, name=name)
+            index.update(first)
+            index.flush()
+            index.update(second)
+            index.close()
+            path = os.path.join(index.index_path, 'manifest.log')
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - cut)
+
+            index = StreamingIndex(base_path=self.tmp, name=name)
+            self.assertEqual(len(index), len(first))
+            index.update(later)
+            index.close()
+
+            index = StreamingIndex(base_path=self.tmp, name=name)
+            self.assertEqual(index.keys(), list(first) + list(later))
+            for key, paper in later.items():
+                self.assertEqual(index[key].title, paper.title)
+
+    def test_cache(self):
+        """
+        Recently used papers are served from a bounded LRU cache.
+        """
+        index = StreamingIndex(base_path=self.tmp, cache_size=3)
+        for paper in self.papers:
+            index[paper.wosid] = paper
+        keys = index.keys()
+
+        for key in keys[:3] + keys[:3]:
+            index[key]
+        self.assertEqual(index.cache_info(), (3, 3, 3, 3))
+
+        index[keys[3]]                  # Evicts keys[0].
+        self.assertNotIn(keys[0], index.cache)
+        index[keys[1]]
+        self.assertEqual((index.hits, index.misses), (4, 4))
+
+        index[keys[1]] = self.papers[0]     # Replaced papers are not stale.
+        self.assertEqual(index[keys[1]].wosid, self.papers[0].wosid)
+
+        index.clear_cache()
+        self.assertEqual(index.cache_info(), (0, 0, 3, 0))
+
+        index = StreamingIndex(base_path=self.tmp, name='nocache',
+                               cache_size=0)
+        index.update({'a': self.papers[0]})
+        index['a']
+        self.assertEqual(len(index.cache), 0)
+
+    def test_key_at(self):
+        index = StreamingIndex(base_path=self.tmp, batch_size=3)
+        for paper in self.papers:
+            index[paper.wosid] = paper
+        for i, paper in enumerate(self.papers):
+            self.assertEqual(index.key_at(i), paper.wosid)
+        self.assertEqual(index.key_at(-1), self.papers[-1].wosid)
+
+
+class TestStreamingCorpusPersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.papers = read(datapath, corpus=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_reopen(self):
+        """
+        A named corpus can be reopened with its indices and features.
+        """
+        corpus = StreamingCorpus(self.papers, index_by='wosid',
+                                 base_path=self.tmp, name='corpus')
+        corpus.index('journal')
+
+        reopened = StreamingCorpus(base_path=self.tmp, name='corpus')
+        self.assertEqual(len(reopened), len(corpus))
+        self.assertEqual(reopened.index_by, 'wosid')
+        self.assertEqual(dict(reopened.indices['journal']),
+                         dict(corpus.indices['journal']))
+        self.assertEqual(reopened.features['authors'].top(3),
+                         corpus.features['authors'].top(3))
+        self.assertEqual(reopened[('date', 2012)][0].title,
+                         corpus[('date', 2012)][0].title)
+
+        paper = Paper()
+        paper['wosid'] = 'WOS:NEW'
+        paper['date'] = 2014
+        reopened.add_papers([paper])
+        self.assertEqual(len(StreamingCorpus(base_path=self.tmp,
+                                             name='corpus')),
+                         len(self.papers) + 1)
+
+    def test_log(self):
+        """
+        Adding papers appends to a log, rather than rewriting the indices and
+        features; the log is replayed when the corpus is reopened.
+        """
+        corpus = StreamingCorpus(self.papers[:5], index_by='wosid',
+                                 base_path=self.tmp, name='corpus')
+        path = os.path.join(self.tmp, 'corpus', 'corpus.pickle')
+        snapshot = os.path.getmtime(path), os.path.getsize(path)
+        corpus.add_papers(self.papers[5:])
+        corpus.index_feature('keywordsPlus')
+        self.assertEqual((os.path.getmtime(path), os.path.getsize(path)),
+                         snapshot)
+
+        reopened = StreamingCorpus(base_path=self.tmp, name='corpus')
+        self.assertEqual(len(reopened), len(self.papers))
+        self.assertEqual(dict(reopened.indices['citations']),
+                         dict(corpus.indices['citations']))
+        self.assertEqual(dict(reopened.features['keywordsPlus'].with_feature),
+                         dict(corpus.features['keywordsPlus'].with_feature))
+
+        reopened.compact()
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'corpus',
+                                                     'corpus.log')))
+        reopened = StreamingCorpus(base_path=self.tmp, name='corpus')
+        self.assertEqual(dict(reopened.indices['citations']),
+                         dict(corpus.indices['citations']))
+
+    def test_papers(self):
+        """
+        Positional access follows the order in which papers were added.
+        """
+        corpus = StreamingCorpus(self.papers, index_by='wosid',
+                                 base_path=self.tmp)
+        self.assertEqual(len(corpus.papers), len(self.papers))
+        self.assertEqual([paper.wosid for paper in corpus.papers],
+                         [paper.wosid for paper in self.papers])
+        self.assertEqual(corpus[3].wosid, self.papers[3].wosid)
+        self.assertEqual([paper.wosid for paper in corpus.papers[2:4]],
+                         [paper.wosid for paper in self.papers[2:4]])
+
+    def test_index_batch(self):
+        """
+        Indices and featuresets are built in one scan over the segments, in
+        a process pool if ``workers`` is given.
+        """
+        expected = StreamingCorpus(self.papers, index_by='wosid',
+                                   base_path=self.tmp)
+        expected.index('journal')
+        expected.index_feature('keywordsPlus')
+
+        corpus = StreamingCorpus(index_by='wosid', base_path=self.tmp)
+        corpus.indexed_papers.batch_size = 2
+        corpus.indexed_papers.segment_size = 4096
+        corpus.add_papers(self.papers)
+        self.assertGreater(len(corpus.indexed_papers.segments()), 1)
+        for workers in [None, 2]:
+            corpus.index_batch(attrs=['journal'], features=['keywordsPlus'],
+                               workers=workers)
+            self.assertEqual(dict(corpus.indices['journal']),
+                             dict(expected.indices['journal']))
+            self.assertEqual(
+                dict(corpus.features['keywordsPlus'].with_feature),
+                dict(expected.features['keywordsPlus'].with_feature))
+            corpus.indices['journal'] = {}
+
+    def test_unnamed(self):
+        """
+        Corpora without a name (e.g. subcorpora) do not share a store.
+        """
+        corpus = StreamingCorpus(self.papers, index_by='wosid',
+                                 base_path=self.tmp)
+        subcorpus = corpus.subcorpus(('date', 2012))
+        self.assertNotEqual(subcorpus.indexed_papers.index_path,
+                            corpus.indexed_papers.index_path)
+        self.assertEqual(len(corpus), len(self.papers))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,170 @@
+import sys
+sys.path.append('./')
+
+import pickle
+import unittest
+
+from tethne.classes.symbols import SymbolTable, SymbolIndex
+from tethne.readers.wos import read
+
+datapath = './tethne/tests/data/wos.txt'
+
+
+class TestSymbolTable(unittest.TestCase):
+    def test_intern(self):
+        symbols = SymbolTable()
+        self.assertEqual(symbols.intern(('SMITH', 'J')), 0)
+        self.assertEqual(symbols.intern('CELL'), 1)
+        self.assertEqual(symbols.intern(('SMITH', 'J')), 0)
+        self.assertEqual(len(symbols), 2)
+        self.assertEqual(symbols[1], 'CELL')
+        self.assertEqual(symbols.decode([1, 0]), ('CELL', ('SMITH', 'J')))
+        self.assertIsNone(symbols.get('NATURE'))
+        self.assertNotIn('NATURE', symbols)
+
+
+class TestSymbolIndex(unittest.TestCase):
+    def setUp(self):
+        self.symbols = SymbolTable()
+        self.index = SymbolIndex(self.symbols)
+        self.index.add('WOS:1', [('SMITH', 'J'), ('DOE', 'A')])
+        self.index.add('WOS:2', [('SMITH', 'J')])
+
+    def test_postings(self):
+        """
+        Values map onto keys, and keys onto values.
+        """
+        self.assertEqual(self.index[('SMITH', 'J')], ('WOS:1', 'WOS:2'))
+        self.assertEqual(dict(self.index), {('SMITH', 'J'): ('WOS:1', 'WOS:2'),
+                                            ('DOE', 'A'): ('WOS:1',)})
+        self.assertEqual(self.index.values_of('WOS:1'),
+                         (('SMITH', 'J'), ('DOE', 'A')))
+        self.assertEqual(self.index.values_of('WOS:3'), ())
+        self.assertEqual(self.index.indexed_keys(), ['WOS:1', 'WOS:2'])
+        self.assertRaises(KeyError, self.index.__getitem__, ('ROE', 'B'))
+        self.assertEqual(len(self.symbols), 4)     # Values and keys.
+
+    def test_ids_of(self):
+        """
+        Posting lists are merged into sorted arrays of key IDs.
+        """
+        self.index.add('WOS:3', [('DOE', 'A'), ('DOE', 'A')])
+        ids = self.index.ids_of([('DOE', 'A'), ('SMITH', 'J'), ('ROE', 'B')])
+        self.assertEqual(self.symbols.decode(ids.tolist()),
+                         ('WOS:1', 'WOS:2', 'WOS:3'))
+        self.assertEqual(self.symbols.decode(
+                             self.index.ids_of([('DOE', 'A')]).tolist()),
+                         ('WOS:1', 'WOS:3'))
+        self.assertEqual(len(self.index.ids_of([('ROE', 'B')])), 0)
+
+        self.index.add('WOS:4', [('ROE', 'B')])     # Arrays are rebuilt.
+        self.assertEqual(len(self.index.ids_of([('ROE', 'B'), ('DOE', 'A')])),
+                         3)
+
+    def test_setitem(self):
+        self.index[('DOE', 'A')] = ['WOS:2']
+        self.assertEqual(self.index.values_of('WOS:1'), (('SMITH', 'J'),))
+        self.assertEqual(self.index.values_of('WOS:2'),
+                         (('SMITH', 'J'), ('DOE', 'A')))
+
+        del self.index[('SMITH', 'J')]
+        self.assertNotIn(('SMITH', 'J'), self.index)
+        self.assertEqual(self.index.indexed_keys(), ['WOS:2'])
+
+    def test_readonly(self):
+        """
+        Retrieved values are copies, so changing them raises rather than
+        silently doing nothing.
+        """
+        self.assertRaises(AttributeError,
+                          lambda: self.index[('SMITH', 'J')].append('WOS:3'))
+        self.index[('SMITH', 'J')] += ('WOS:3',)    # Assignment works.
+        self.assertEqual(self.index[('SMITH', 'J')],
+                         ('WOS:1', 'WOS:2', 'WOS:3'))
+        self.assertEqual(self.index.values_of('WOS:3'), (('SMITH', 'J'),))
+
+    def test_pickle(self):
+        index = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(dict(index), dict(self.index))
+
+
+class TestCorpusSymbols(unittest.TestCase):
+    def setUp(self):
+        self.corpus = read(datapath)
+
+    def test_shared(self):
+        """
+        All of the indices in a :class:`.Corpus` share its symbol table.
+        """
+        for index in self.corpus.indices.values():
+            self.assertIs(index.symbols, self.corpus.symbols)
+        key, paper = next(iter(self.corpus.indexed_papers.items()))
+        self.assertEqual(self.corpus.indices_lookup[key]['date'], (paper.date,))
+        self.assertEqual(self.corpus.indices_lookup['nope'], {})
+
+        corpus = pickle.loads(pickle.dumps(self.corpus))
+        self.assertIs(corpus.indices['authors'].symbols, corpus.symbols)
+        self.assertEqual(dict(corpus.indices['citations']),
+                         dict(self.corpus.indices['citations']))
+
+    def test_lookup_readonly(self):
+        """
+        :attr:`.Corpus.indices_lookup` is built from the indices, so it cannot
+        be changed directly.
+        """
+        key = next(iter(self.corpus.indexed_papers.keys()))
+        lookup = self.corpus.indices_lookup
+        with self.assertRaises(TypeError):
+            lookup[key]['date'] = (1066,)
+        with self.assertRaises(TypeError):
+            lookup[key] = {}
+
+        self.corpus.indices['date'][1066] = [key]
+        self.assertIn(1066, self.corpus.indices_lookup[key]['date'])
+
+    def test_lookup_cached(self):
+        """
+        :attr:`.Corpus.indices_lookup` is only rebuilt when the indices
+        change.
+        """
+        key = next(iter(self.corpus.indexed_papers.keys()))
+        lookup = self.corpus.indices_lookup
+        self.assertIs(self.corpus.indices_lookup, lookup)
+        values = lookup[key]
+        self.assertIs(lookup[key], values)
+
+        self.corpus.indices['date'].add(key, [1066])
+        self.assertIsNot(lookup[key], values)
+        self.assertIn(1066, lookup[key]['date'])
+
+        self.corpus.index('journal')
+        self.assertIn('journal', lookup[key])
+        del self.corpus.indices['journal']
+        self.assertNotIn('journal', lookup[key])
+
+        corpus = pickle.loads(pickle.dumps(self.corpus))
+        self.assertEqual(dict(corpus.indices_lookup[key]), dict(lookup[key]))
+
+    def test_assign(self):
+        """
+        Plain dicts that are assigned to :attr:`.Corpus.indices` are
+        converted.
+        """
+        self.corpus.indices['journal'] = {}
+        self.corpus.index('journal')
+        self.assertIsInstance(self.corpus.indices['journal'], SymbolIndex)
+        self.assertEqual(sum(map(len, self.corpus.indices['journal'].values())),
+                         len(self.corpus))
+
+    def test_interned(self):
+        """
+        Author names are interned by the WoS parser.
+        """
+        papers = read(datapath, corpus=False)
+        names = [name for paper in papers for name, _ in paper.authors_init]
+        for name in names:
+            self.assertIs(name, sys.intern(name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+sys.path.append('./')
+
+import json
+import os
+import subprocess
+import unittest
+
+import tethne
+
+HEAVY = ['networkx', 'numpy', 'rdflib', 'nltk', 'pdfminer', 'magic']
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(tethne.__file__)))
+
+SCRIPT = """
+import json, sys
+import {module}
+{after}
+print(json.dumps(list(sys.modules.keys())))
+"""
+
+
+def _import(module, after=''):
+    """
+    Imports ``module`` in a fresh interpreter, and returns the names of all of
+    the modules that were loaded.
+    """
+    output = subprocess.check_output([sys.executable, '-c',
+                                      SCRIPT.format(module=module,
+                                                    after=after)],
+                                     cwd=ROOT)
+    return set(json.loads(output.decode('utf-8').strip().split('\n')[-1]))
+
+
+def _loaded(modules, name):
+    return name in modules or any([m.startswith(name + '.') for m in modules])
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_tethne(self):
+        modules = _import('tethne')
+        for name in HEAVY:
+            self.assertFalse(_loaded(modules, name),
+                             '%s should not be imported by tethne' % name)
+
+    def test_import_readers(self):
+        modules = _import('tethne.readers.wos, tethne.readers.dfr')
+        for name in HEAVY:
+            self.assertFalse(_loaded(modules, name),
+                             '%s should not be imported by readers' % name)
+
+    def test_import_zotero(self):
+        modules = _import('tethne.readers.zotero')
+        for name in ['nltk', 'pdfminer', 'magic', 'networkx']:
+            self.assertFalse(_loaded(modules, name),
+                             '%s should not be imported by zotero' % name)
+
+    def test_lazy_attributes(self):
+        """
+        Lazily-imported members are still available from the top level.
+        """
+        modules = _import('tethne', after='tethne.GraphCollection')
+        self.assertTrue(_loaded(modules, 'networkx'))
+
+        from tethne import GraphCollection, coauthors, LDAModel
+        from tethne.classes.graphcollection import GraphCollection as GC
+        self.assertIs(GraphCollection, GC)
+        self.assertTrue(callable(coauthors))
+        self.assertIn('cocitation', dir(tethne))
+        self.assertIsNotNone(tethne.networks)
+
+        with self.assertRaises(AttributeError):
+            tethne.not_a_member
+
+
+if __name__ == '__main__':
+    unittest.main()
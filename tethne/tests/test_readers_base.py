@@ -2,10 +2,17 @@ import sys
 sys.path.append('../tethne')
 
 import unittest
-from tethne.readers.base import FTParser, XMLParser
+import os
+import re
+import tempfile
+import unicodedata
+from io import StringIO
+from tethne.readers.base import FTParser, XMLParser, _detect_encoding, \
+                               _FixupStream
 import xml.etree.ElementTree as ET
 
 datapath = './tethne/tests/data/test.ft'
+wosdatapath = './tethne/tests/data/wos.txt'
 xmldatapath = './tethne/tests/data/dfr/citations.XML'
 
 
@@ -115,5 +122,154 @@ class TestFTParser(unittest.TestCase):
         self.assertEqual(N, 2, 'Expected 2 data entries, found {0}'.format(N))
 
 
+class TestDispatch(unittest.TestCase):
+    """
+    Tags are routed using the configuration of each parser instance, not of
+    the first instance of its class.
+    """
+
+    def test_default(self):
+        data = FTParser(datapath).parse()
+        self.assertEqual(data[0].FI, 'Some data')
+        self.assertIsInstance(data[0].TH, list)
+
+    def test_tags(self):
+        FTParser(datapath).parse()    # Routes of an earlier instance.
+        data = FTParser(datapath, tags={'FI': 'first'}).parse()
+        self.assertEqual(data[0].first, 'Some data')
+        self.assertFalse(hasattr(data[0], 'FI'))
+        self.assertEqual(FTParser(datapath).parse()[0].FI, 'Some data')
+
+    def test_concat_fields(self):
+        FTParser(datapath).parse()
+        data = FTParser(datapath, concat_fields=['TH']).parse()
+        self.assertEqual(data[0].TH.strip(), 'First of multiple lines '
+                                             'Second of multiple lines. '
+                                             'The last lines.')
+        self.assertIsInstance(FTParser(datapath).parse()[0].TH, list)
+
+    def test_handler(self):
+        FTParser(datapath).parse()
+        parser = FTParser(datapath)
+        parser.handle_FI = lambda value: value.upper()
+        data = parser.parse()
+        self.assertEqual(data[0].FI, 'SOME DATA')
+        self.assertEqual(FTParser(datapath).parse()[0].FI, 'Some data')
+
+        class UpperParser(FTParser):
+            def handle_FI(self, value):
+                return value.upper()
+
+        self.assertEqual(UpperParser(datapath).parse()[1].FI,
+                         'SOME ADDITIONAL DATA')
+        self.assertEqual(FTParser(datapath).parse()[1].FI,
+                         'Some additional data')
+
+
+class TestEncodingDetection(unittest.TestCase):
+    def test_bom(self):
+        """
+        A UTF-8 byte-order mark should decide the encoding without sniffing.
+        """
+        self.assertEqual(_detect_encoding(wosdatapath), 'utf-8-sig')
+
+    def test_override(self):
+        """
+        A user-supplied ``encoding`` should be used as-is.
+        """
+        parser = FTParser(datapath, encoding='latin-1')
+        self.assertEqual(parser.encoding, 'latin-1')
+        parser.parse()
+        self.assertEqual(len(parser.data), 2)
+
+    def test_ascii_prefix(self):
+        """
+        A file that is ASCII only within the sample should still be readable
+        if non-ASCII UTF-8 content appears later.
+        """
+        handle, path = tempfile.mkstemp(suffix='.ft')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(b'A' * 200 + b'\n')
+                f.write(u'Z\u00fcrich\n'.encode('utf-8'))
+            encoding = _detect_encoding(path, sample_size=64)
+            with open(path, 'rb') as f:
+                f.read().decode(encoding)
+        finally:
+            os.remove(path)
+
+    def test_latin1_after_sample(self):
+        """
+        A Latin-1 record after an ASCII-only sample should not be decoded as
+        UTF-8.
+        """
+        from tethne.readers.wos import read
+        with open(wosdatapath, 'rb') as f:
+            data = f.read()[3:]     # Without the byte-order mark.
+        header, records = data.split(b'\nPT ', 1)
+        records = b'PT ' + records.rsplit(b'\nEF', 1)[0] + b'\n'
+        records = records.replace(u'\u00e9'.encode('utf-8'), b'e')
+        records = records.replace(u'\u00fc'.encode('utf-8'), b'u')
+        first = records.split(b'\nER\n', 1)[0] + b'\nER\n'
+        first = first.replace(b'UT WOS:', b'UT WOS:LATIN1', 1)
+        first = first.replace(b'AU ', u'AU M\u00fcller, Hans\nAU '.encode(
+            'latin-1'), 1)
+        first = first.replace(b'TI ', u'TI caf\u00e9 '.encode('latin-1'), 1)
+
+        ascii = records.decode('utf-8').encode('ascii', 'ignore')
+        handle, path = tempfile.mkstemp(suffix='.txt')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(header + b'\n')
+                size = 0
+                while size < 65536:
+                    f.write(ascii)
+                    size += len(ascii)
+                f.write(first)
+                f.write(b'EF\n')
+            papers = read(path, corpus=False)
+        finally:
+            os.remove(path)
+        latin = [paper for paper in papers
+                 if paper.wosid.startswith('WOS:LATIN1')]
+        self.assertEqual(len(latin), 1)
+        title = unicodedata.normalize('NFC', latin[0].title)
+        self.assertIn(u'caf\u00e9', title.lower())
+
+
+class TestFixupStream(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        """
+        Substitution should give the same result as a whole-document
+        ``re.sub``, wherever the chunk boundaries fall.
+        """
+        pattern = re.compile('(&)(?!amp;)')
+        text = u'a&b&amp;c&&amp;&am\u00e9&amp;d&' * 7
+        expected = pattern.sub('&amp;', text).encode('utf-8')
+
+        for chunk_size in range(1, 12):
+            for read_size in [1, 3, 1024, -1]:
+                stream = _FixupStream(StringIO(text), pattern, '&amp;',
+                                      holdback=4, chunk_size=chunk_size)
+                out = b''
+                while True:
+                    data = stream.read(read_size)
+                    if not data:
+                        break
+                    out += data
+                self.assertEqual(out, expected)
+
+    def test_long_pattern(self):
+        pattern = re.compile('rdf:resource rdf:resource')
+        text = u'<rdf:resource rdf:resource="x"/>' * 5
+        expected = text.replace('rdf:resource rdf:resource',
+                                'link:link rdf:resource').encode('utf-8')
+        for chunk_size in [1, 7, 24, 100]:
+            stream = _FixupStream(StringIO(text), pattern,
+                                  'link:link rdf:resource', holdback=24,
+                                  chunk_size=chunk_size)
+            self.assertEqual(stream.read(), expected)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,8 +3,9 @@ sys.path.append('../tethne')
 
 import unittest
 from tethne.readers import merge
-from tethne.readers.dfr import read, ngrams, _handle_author,_dfr2paper_map,_create_ayjid,_handle_pagerange,tokenize,_handle_authors,_handle_paper
-from tethne import Corpus, Paper, FeatureSet
+from tethne.readers.dfr import read, iter_papers, ngrams, _handle_author,_dfr2paper_map,_create_ayjid,_handle_pagerange,tokenize,_handle_authors,_handle_paper, GramGenerator, _combine_ngrams
+from tethne import Corpus, Paper, Feature, FeatureSet, LazyFeatureSet, \
+                   StreamingCorpus, CompactPaper
 import xml.etree.ElementTree as ET
 
 datapath = './tethne/tests/data/dfr'
@@ -51,6 +52,25 @@ class TestDFRReaderStreaming(unittest.TestCase):
 
 
 
+class TestIterPapers(unittest.TestCase):
+    def test_iter_papers(self):
+        expected = [p.doi for p in read(datapath, corpus=False)]
+        self.assertEqual([p.doi for p in iter_papers(datapath)], expected)
+
+    def test_compact(self):
+        self.assertIs(type(next(iter_papers(datapath))), Paper)
+        papers = read(datapath, corpus=False, compact=True)
+        self.assertIsInstance(papers[0], CompactPaper)
+        self.assertEqual([p.doi for p in papers],
+                         [p.doi for p in iter_papers(datapath, compact=True)])
+
+    def test_streaming_read(self):
+        corpus = read(datapath, streaming=True)
+        self.assertIsInstance(corpus, StreamingCorpus)
+        self.assertEqual(len(corpus), 398)
+        self.assertIn('wordcounts', corpus.features)
+
+
 class TestDFRReader(unittest.TestCase):
     def test_read(self):
         corpus = read(datapath)
@@ -123,6 +143,109 @@ class TestNGrams(unittest.TestCase):
         self.assertEqual(len(grams), 2)
         self.assertEqual(len(grams.index), 43)
 
+    def test_ngrams_workers(self):
+        serial = ngrams(datapath, 'wordcounts')
+        parallel = ngrams(datapath, 'wordcounts', workers=2)
+
+        self.assertIsInstance(parallel, FeatureSet)
+        self.assertEqual(len(parallel), len(serial))
+        self.assertEqual(len(parallel.index), len(serial.index))
+        for doi, feature in serial.items():
+            self.assertEqual(parallel.features[doi], feature)
+
+    def test_ngrams_lazy(self):
+        serial = ngrams(datapath, 'wordcounts')
+        grams = ngrams(datapath, 'wordcounts', lazy=True)
+
+        self.assertIsInstance(grams, LazyFeatureSet)
+        self.assertEqual(len(grams), 398)
+        self.assertEqual(grams.loaded, 0)
+        self.assertIn('10.2307/1141712', grams.features)
+
+        # Only the accessed document is parsed.
+        self.assertEqual(grams['10.2307/1141712'],
+                         serial['10.2307/1141712'])
+        self.assertEqual(grams.loaded, 1)
+
+        # Aggregates are built from every document.
+        self.assertEqual(len(grams.index), 105156)
+        self.assertEqual(grams.count('social'), serial.count('social'))
+        self.assertEqual(grams.loaded, 398)
+
+    def test_read_lazy(self):
+        corpus = read(datapath, lazy_ngrams=True)
+        self.assertIsInstance(corpus.features['wordcounts'], LazyFeatureSet)
+        self.assertEqual(len(corpus.features['wordcounts']), 398)
+
+class TestCombineNGrams(unittest.TestCase):
+    datasets = {
+        'first': {'a': [('gene', 1)], 'b': [('flow', 2)]},
+        'second': {'b': [('pollen', 3)], 'c': [('gene', 4)]},
+    }
+
+    @classmethod
+    def load(cls, source):
+        dataset, doi = source
+        return Feature(cls.datasets[dataset][doi])
+
+    def test_duplicates(self):
+        """
+        Where a paper is in several datasets, its N-grams from the last are
+        kept, whether or not the featuresets are lazy.
+        """
+        eager = _combine_ngrams([
+            FeatureSet(dict((doi, Feature(feature)) for doi, feature
+                            in self.datasets[dataset].items()))
+            for dataset in ['first', 'second']])
+        lazy = _combine_ngrams([
+            LazyFeatureSet(dict((doi, (dataset, doi))
+                                for doi in self.datasets[dataset]), self.load)
+            for dataset in ['first', 'second']])
+
+        for combined in [eager, lazy]:
+            self.assertEqual(sorted(combined.features.keys()), ['a', 'b', 'c'])
+            self.assertEqual(list(combined.features['b']), [('pollen', 3)])
+            self.assertEqual(combined.count('flow'), 0)
+            self.assertEqual(combined.count('gene'), 5)
+            self.assertEqual(sorted(combined.papers_containing('pollen')),
+                             ['b'])
+
+
+class TestTokenize(unittest.TestCase):
+    def setUp(self):
+        self.grams = dict(list(GramGenerator(datapath, 'wordcounts'))[:20])
+
+    def test_tokenize(self):
+        t_ngrams, vocab, token_tf = tokenize(self.grams)
+
+        self.assertEqual(set(t_ngrams.keys()), set(self.grams.keys()))
+        self.assertEqual(len(set(vocab.values())), len(vocab))
+        for doi, tokens in t_ngrams.items():
+            counts = dict(self.grams[doi])
+            for i, c in tokens:
+                self.assertEqual(counts[vocab[i]], c)
+        for i, term in vocab.items():
+            self.assertEqual(token_tf[i], sum([dict(grams).get(term, 0)
+                                               for grams
+                                               in self.grams.values()]))
+
+    def test_tokenize_generator(self):
+        """
+        A :class:`.GramGenerator` can be tokenized without loading it first.
+        """
+        expected = tokenize(dict(list(GramGenerator(datapath, 'wordcounts'))))
+        result = tokenize(GramGenerator(datapath, 'wordcounts'))
+        self.assertEqual(result, expected)
+
+    def test_tokenize_arrays(self):
+        t_ngrams, vocab, token_tf = tokenize(self.grams)
+        t_arrays, vocab_, token_tf_ = tokenize(self.grams, arrays=True)
+
+        self.assertEqual(vocab, vocab_)
+        for doi, (indices, counts) in t_arrays.items():
+            self.assertEqual(list(zip(indices, counts)), t_ngrams[doi])
+
+
 class TestCitationFile(unittest.TestCase):
     def test_citations_file(self):
         datapath2 = './tethne/tests/data/dfr2'
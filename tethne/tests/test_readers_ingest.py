@@ -0,0 +1,122 @@
+import sys
+sys.path.append('../tethne')
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tethne.readers import dfr, wos, ingest
+from tethne import Corpus, StructuredFeatureSet
+
+wos_datapath = './tethne/tests/data/wos.txt'
+wos_datapath2 = './tethne/tests/data/wos2.txt'
+dfr_datapath = './tethne/tests/data/dfr'
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        shutil.copy(wos_datapath, self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_ingest(self):
+        """
+        New files are added to the corpus; files that have already been
+        ingested are skipped.
+        """
+        corpus = Corpus(index_by='wosid')
+        added = ingest(corpus, self.tmp)
+        self.assertEqual(len(added), 10)
+        self.assertEqual(len(corpus), 10)
+        self.assertEqual(ingest(corpus, self.tmp), [])
+
+        shutil.copy(wos_datapath2, self.tmp)
+        added = ingest(corpus, self.tmp)
+        self.assertEqual(len(added), 100)
+        self.assertEqual(len(corpus.ingested), 2)
+
+        expected = wos.read(self.tmp)
+        self.assertEqual(len(corpus), len(expected))
+        for field, index in expected.indices.items():
+            self.assertEqual(set(corpus.indices[field].keys()),
+                             set(index.keys()))
+        for name, featureset in expected.features.items():
+            self.assertEqual(len(corpus.features[name]), len(featureset))
+            self.assertSetEqual(corpus.features[name].unique,
+                                featureset.unique)
+
+    def test_ingest_changed(self):
+        """
+        A file that has changed is read again, but records that are already in
+        the corpus are not added twice.
+        """
+        corpus = Corpus(index_by='wosid')
+        ingest(corpus, self.tmp)
+        citations = dict(corpus.indices['citations'].items())
+
+        fpath = os.path.join(self.tmp, os.path.basename(wos_datapath))
+        with open(fpath, 'a') as f:
+            f.write('\n')
+        self.assertEqual(ingest(corpus, fpath), [])
+        self.assertEqual(len(corpus), 10)
+        self.assertEqual(dict(corpus.indices['citations']), citations)
+
+    def test_ingest_dfr(self):
+        corpus = Corpus(index_by='doi')
+        added = ingest(corpus, dfr_datapath, reader='dfr')
+        expected = dfr.read(dfr_datapath)
+        self.assertEqual(len(added), len(expected))
+        self.assertIn('wordcounts', corpus.features)
+        self.assertEqual(len(corpus.features['wordcounts']),
+                         len(expected.features['wordcounts']))
+        self.assertEqual(ingest(corpus, dfr_datapath, reader='dfr'), [])
+
+    def test_ingest_settings(self):
+        """
+        FeatureSets built with :meth:`.Corpus.index_feature` are extended in
+        the same way that they were built.
+        """
+        corpus = Corpus(index_by='wosid')
+        ingest(corpus, self.tmp)
+        corpus.index_feature('title', tokenize=lambda t: t.lower().split())
+        corpus.index_feature('authors', structured=True)
+        shutil.copy(wos_datapath2, self.tmp)
+        self.assertRaises(ValueError, ingest, corpus, self.tmp)
+
+        added = ingest(corpus, self.tmp,
+                       tokenize={'title': lambda t: t.lower().split()})
+        self.assertEqual(len(added), 100)
+        self.assertIsInstance(corpus.features['authors'],
+                              StructuredFeatureSet)
+        for title in corpus.features['title'].unique:
+            self.assertEqual(title, title.lower())
+
+    def test_ingest_dfr_ngrams(self):
+        """
+        N-gram files that are added to a dataset that has been ingested are
+        read.
+        """
+        dataset = os.path.join(self.tmp, 'dfr')
+        shutil.copytree(dfr_datapath, dataset)
+        wordcounts = os.path.join(dataset, 'wordcounts')
+        fname = sorted(os.listdir(wordcounts))[0]
+        shutil.move(os.path.join(wordcounts, fname), self.tmp)
+
+        corpus = Corpus(index_by='doi')
+        ingest(corpus, dataset, reader='dfr')
+        expected = dfr.read(dfr_datapath)
+        n = len(expected.features['wordcounts'])
+        self.assertEqual(len(corpus.features['wordcounts']), n - 1)
+
+        shutil.move(os.path.join(self.tmp, fname), wordcounts)
+        self.assertEqual(ingest(corpus, dataset, reader='dfr'), [])
+        self.assertEqual(len(corpus.features['wordcounts']), n)
+        self.assertEqual(corpus.features['wordcounts'].unique,
+                         expected.features['wordcounts'].unique)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,45 @@ class TestMerge(unittest.TestCase):
         combined = merge(self.dfr_corpus, self.wos_corpus, match_by=comparator)
         self.assertEqual(len(combined), 472)
 
+    def test_merge_block_by(self):
+        """
+        Only :class:`.Paper`\s that share a blocking key are compared.
+        """
+        comparator = lambda p1, p2: p1.ayjid == p2.ayjid
+        combined = merge(self.dfr_corpus, self.wos_corpus, match_by=comparator,
+                         block_by=lambda paper: paper.ayjid)
+        self.assertEqual(len(combined), 472)
+
+    def test_merge_window(self):
+        """
+        Sorted-neighborhood blocking finds near-matches.
+        """
+        combined = merge(self.dfr_corpus, self.wos_corpus, window=1)
+        self.assertEqual(len(combined), 472)
+
+        def _corpus(titles):
+            papers = []
+            for title in titles:
+                paper = Paper()
+                paper['title'] = title
+                papers.append(paper)
+            return Corpus(papers, index_by='title')
+
+        corpus_1 = _corpus(['Aardvarks', 'Bile salts in reptiles',
+                            'Zebrafish'])
+        corpus_2 = _corpus(['Bile salts in reptile', 'Marmots'])
+        comparator = lambda p1, p2: p1.title[:10] == p2.title[:10]
+        combined = merge(corpus_1, corpus_2, match_by=comparator,
+                         block_by=lambda paper: paper.title, window=1,
+                         index_by='title')
+        self.assertEqual(len(combined), 4)
+        self.assertIn('Bile salts in reptiles', combined.indexed_papers)
+        self.assertNotIn('Bile salts in reptile', combined.indexed_papers)
+
+        # There is no field to sort by.
+        self.assertRaises(ValueError, merge, corpus_1, corpus_2,
+                          match_by=comparator, window=1)
+
     def test_merge_both_empty(self):
         """
         Testing the functionality of merge when both lists passed are empty
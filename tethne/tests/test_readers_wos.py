@@ -4,11 +4,13 @@ sys.path.append('../tethne')
 import re
 
 import unittest
-from tethne.readers.wos import WoSParser, read
-from tethne import Corpus, Paper, StreamingCorpus
+import types
+from tethne.readers.wos import WoSParser, read, iter_papers
+from tethne import Corpus, Paper, StreamingCorpus, CompactPaper, Citation
 
 datapath = './tethne/tests/data/wos2.txt'
 datapath_v = './tethne/tests/data/valentin.txt'
+datapath_dir = './tethne/tests/data'
 
 import sys
 PYTHON_3 = sys.version_info[0] == 3
@@ -194,6 +196,113 @@ class TestWoSParser(unittest.TestCase):
                 self.assertIsInstance(cr.date, int)
             self.assertTrue(hasattr(cr, 'journal'))
 
+class TestIterPapers(unittest.TestCase):
+    def test_iter_papers(self):
+        papers = iter_papers(datapath)
+        self.assertIsInstance(papers, types.GeneratorType)
+
+        expected = [p.wosid for p in read(datapath, corpus=False)]
+        self.assertEqual([p.wosid for p in papers], expected)
+
+    def test_iter_papers_dir(self):
+        expected = [p.wosid for p in read(datapath_dir, corpus=False)]
+        self.assertEqual([p.wosid for p in iter_papers(datapath_dir)],
+                         expected)
+
+    def test_corpus_from_generator(self):
+        corpus = Corpus(iter_papers(datapath), index_by='wosid')
+        self.assertEqual(len(corpus), 100)
+
+        corpus = Corpus([], index_by='wosid')
+        corpus.add_papers(iter_papers(datapath))
+        self.assertEqual(len(corpus), 100)
+
+    def test_streaming_read(self):
+        corpus = read(datapath, streaming=True)
+        self.assertIsInstance(corpus, StreamingCorpus)
+        self.assertEqual(len(corpus), 100)
+
+
+class TestWoSParserParallel(unittest.TestCase):
+    def test_read_workers(self):
+        """
+        Parsing a directory in a process pool should yield the same papers, in
+        the same order, as parsing it serially.
+        """
+        serial = read(datapath_dir, corpus=False)
+        parallel = read(datapath_dir, corpus=False, workers=2)
+
+        self.assertEqual(len(serial), len(parallel))
+        self.assertEqual([p.wosid for p in serial],
+                         [p.wosid for p in parallel])
+
+    def test_read_workers_corpus(self):
+        corpus = read(datapath_dir, workers=2)
+        self.assertIsInstance(corpus, Corpus)
+        self.assertEqual(len(corpus), len(read(datapath_dir)))
+
+
+class TestCitationCache(unittest.TestCase):
+    def test_shared_citations(self):
+        """
+        Identical cited references should resolve to the same (frozen)
+        :class:`.Citation`\.
+        """
+        parser = WoSParser(datapath, entry_class=CompactPaper,
+                           citation_class=Citation)
+        value = 'Dole RJ, 1952, CELL, V3, P10'
+        citation = parser.handle_CR(value)
+        self.assertIs(parser.handle_CR(value), citation)
+        self.assertEqual(citation.date, 1952)
+        self.assertEqual(citation.volume, '3')
+        with self.assertRaises(AttributeError):
+            citation.volume = '4'
+        with self.assertRaises(AttributeError):
+            citation['date'] = 1953
+        with self.assertRaises(AttributeError):
+            del citation.journal
+        self.assertEqual(parser.handle_CR(value).volume, '3')
+
+    def test_copied_citations(self):
+        """
+        Mutable citations are copied for each record, so changing one record's
+        cited reference does not change the others.
+        """
+        parser = WoSParser(datapath)
+        value = 'Dole RJ, 1952, CELL, V3, P10'
+        citation = parser.handle_CR(value)
+        other = parser.handle_CR(value)
+        self.assertIsNot(other, citation)
+        self.assertEqual(other.ayjid, citation.ayjid)
+
+        citation.volume = '4'
+        citation.authors_init.append(('SMITH', 'J'))
+        self.assertEqual(other.volume, '3')
+        self.assertEqual(len(other.authors_init), 1)
+        self.assertEqual(parser.handle_CR(value).volume, '3')
+
+    def test_cache_bounded(self):
+        parser = WoSParser(datapath, citation_cache_size=10)
+        for i in range(20):
+            parser.handle_CR('Dole RJ, {0}, CELL'.format(1900 + i))
+        self.assertEqual(len(parser.citation_cache), 10)
+        self.assertNotIn('Dole RJ, 1900, CELL', parser.citation_cache)
+        self.assertIn('Dole RJ, 1919, CELL', parser.citation_cache)
+
+    def test_parse_unchanged(self):
+        """
+        Memoization should not change the parsed cited references.
+        """
+        parser = WoSParser(datapath, citation_cache_size=0)
+        uncached = parser.parse()
+        cached = WoSParser(datapath).parse()
+        for a, b in zip(uncached, cached):
+            refs_a = getattr(a, 'citedReferences', [])
+            refs_b = getattr(b, 'citedReferences', [])
+            self.assertEqual([r.ayjid for r in refs_a if r is not None],
+                             [r.ayjid for r in refs_b if r is not None])
+
+
 class TestWithStarCR(unittest.TestCase):
     def setUp(self):
         class TestParser(WoSParser):
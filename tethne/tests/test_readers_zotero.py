@@ -1,11 +1,19 @@
 import sys
 sys.path.append('../tethne')
 
+import os
 import re
+import shutil
+import tempfile
+import time
+import warnings
 
 import unittest
-from tethne.readers.zotero import read, ZoteroParser, _infer_spaces
-from tethne import Corpus, Paper, StructuredFeatureSet
+from tethne.readers import zotero
+from tethne.readers.zotero import read, iter_papers, ZoteroParser, \
+                                  _infer_spaces, _cache_load, _cache_store
+from tethne import Corpus, Paper, StructuredFeature, StructuredFeatureSet, \
+                   StreamingCorpus
 
 import sys
 PYTHON_3 = sys.version_info[0] == 3
@@ -23,6 +31,88 @@ class TestInferSpaces(unittest.TestCase):
         s = "Thisisastringwithnospaces."
         self.assertEqual(_infer_spaces(s), 'this is a string with no spaces .')
 
+    def test_infer_unknown(self):
+        """
+        Characters that are not part of any known word are split off.
+        """
+        self.assertEqual(_infer_spaces(''), '')
+        self.assertEqual(_infer_spaces('qqzx'), 'qq zx')
+        self.assertEqual(_infer_spaces('thermodynamics\u00df'),
+                         'thermodynamics \u00df')
+
+    def test_wordcost(self):
+        """
+        The word-cost table and ranked words are still available.
+        """
+        from tethne.readers._rankedwords import WORDS
+        self.assertEqual(WORDS[0], 'the')
+        self.assertEqual(zotero.MAXWORD, max([len(word) for word in WORDS]))
+        self.assertLess(zotero.WORDCOST['the'], zotero.WORDCOST['string'])
+        self.assertNotIn('ermodynamics', zotero.WORDCOST)
+        self.assertRaises(AttributeError, getattr, zotero, 'NOPE')
+
+
+class TestIterPapers(unittest.TestCase):
+    def test_iter_papers(self):
+        expected = [p.title for p in read(datapath, corpus=False)]
+        papers = list(iter_papers(datapath))
+        self.assertEqual([p.title for p in papers], expected)
+        for paper in papers:
+            self.assertIsInstance(paper, Paper)
+
+
+class TestZoteroStreaming(unittest.TestCase):
+    """
+    Reading the RDF incrementally yields the same :class:`.Paper`\s as loading
+    it into a single graph.
+    """
+
+    def _compare(self, path, **kwargs):
+        def _fields(paper):
+            return sorted([(k, repr(v)) for k, v in paper.__dict__.items()])
+
+        expected = [_fields(p) for p in ZoteroParser(path).parse()]
+        papers = ZoteroParser(path, streaming=True, **kwargs).parse()
+        self.assertEqual(sorted([_fields(p) for p in papers]),
+                         sorted(expected))
+        return papers
+
+    def test_parse(self):
+        for path in [datapath, datapath2, datapath3]:
+            self._compare(path)
+
+    def test_lookahead(self):
+        """
+        Journals and attachments follow the item that refers to them.
+        """
+        papers = self._compare(datapath3, lookahead=1)
+        for paper in papers:
+            self.assertTrue(os.path.exists(paper.link))
+
+    def test_unsupported(self):
+        """
+        Falls back to loading the whole graph if the installed rdflib is not
+        supported.
+        """
+        from tethne.readers import _rdfstream
+        supported = _rdfstream._supported
+        _rdfstream._supported = False
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                parser = ZoteroParser(datapath, streaming=True)
+            self.assertFalse(parser.streaming)
+            self.assertTrue(any(['Streaming' in str(w.message)
+                                 for w in caught]))
+            self.assertEqual(len(parser.parse()),
+                             len(ZoteroParser(datapath).parse()))
+        finally:
+            _rdfstream._supported = supported
+
+    def test_read(self):
+        corpus = read(datapath, streaming=True)
+        self.assertIsInstance(corpus, StreamingCorpus)
+        self.assertEqual(len(corpus), len(read(datapath)))
+
 
 class TestZoteroParserWithFiles(unittest.TestCase):
     """
@@ -54,6 +144,125 @@ class TestZoteroParserWithFiles(unittest.TestCase):
         """)
 
 
+class TestZoteroFullTextCache(unittest.TestCase):
+    """
+    Full-text content that has already been extracted should be loaded from
+    the cache, rather than extracted again.
+    """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.feature = StructuredFeature(['bile', 'salts'],
+                                         [('sentence', [0])])
+        for paper in read(datapath3, corpus=False):
+            links = getattr(paper, 'link', [])
+            if type(links) is not list:
+                links = [links]
+            for link in links:
+                if link.endswith('.pdf') and os.path.exists(link):
+                    _cache_store(self.cache_dir, link,
+                                 ('application/pdf', self.feature))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_read_cached(self):
+        corpus = read(datapath3, follow_links=True, cache_dir=self.cache_dir)
+        self.assertEqual(len(corpus.features['pdf_text']), 7)
+        for feature in corpus.features['pdf_text'].features.values():
+            self.assertEqual(list(feature), list(self.feature))
+
+    def test_read_cached_workers(self):
+        corpus = read(datapath3, follow_links=True, cache_dir=self.cache_dir,
+                      workers=2, timeout=60)
+        self.assertIsInstance(corpus.features['pdf_text'],
+                              StructuredFeatureSet)
+        self.assertEqual(len(corpus.features['pdf_text']), 7)
+
+    def test_cache_key(self):
+        """
+        Modifying a file invalidates its cache entry.
+        """
+        fpath = os.path.join(self.cache_dir, 'test.txt')
+        with open(fpath, 'w') as f:
+            f.write('bile salts')
+        _cache_store(self.cache_dir, fpath, ('text/plain', self.feature))
+        self.assertEqual(_cache_load(self.cache_dir, fpath)[0], 'text/plain')
+
+        stat = os.stat(fpath)
+        os.utime(fpath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(_cache_load(self.cache_dir, fpath))
+
+
+def _hanging_extract(fpath):
+    if fpath.endswith('hang.txt'):
+        time.sleep(60)
+    return 'text/plain', StructuredFeature([os.path.basename(fpath),
+                                            str(os.getpid())],
+                                           [('sentence', [0])])
+
+
+class TestZoteroExtractPending(unittest.TestCase):
+    """
+    The ``timeout`` applies to each file from when its extraction starts, so a
+    file that hangs does not hold up the others.
+    """
+
+    def setUp(self):
+        self.extract = zotero.extract
+        zotero.extract = _hanging_extract   # Inherited by forked workers.
+
+    def tearDown(self):
+        zotero.extract = self.extract
+
+    def test_hanging_file(self):
+        parser = ZoteroParser(datapath, workers=1, timeout=2)
+        names = ['hang.txt', 'a.txt', 'b.txt', 'c.txt']
+        parser.pending_links = [(name, name) for name in names]
+        start = time.time()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            parser.extract_pending()
+        self.assertLess(time.time() - start, 30)
+        self.assertEqual(sorted(parser.full_text['plain_text']),
+                         ['a.txt', 'b.txt', 'c.txt'])
+        self.assertEqual(len([w for w in caught
+                              if 'Timed out' in str(w.message)]), 1)
+
+    def test_workers_reused(self):
+        """
+        Files are extracted by long-lived workers, and each file is hashed
+        only once.
+        """
+        cache_dir = tempfile.mkdtemp()
+        names = ['a.txt', 'b.txt', 'c.txt', 'd.txt']
+        for name in names:
+            with open(os.path.join(cache_dir, name), 'w') as f:
+                f.write(name)
+        hashed = []
+        cache_key = zotero._cache_key
+        def _counted_key(fpath):
+            hashed.append(fpath)
+            return cache_key(fpath)
+        zotero._cache_key = _counted_key
+        try:
+            parser = ZoteroParser(datapath, workers=2, cache_dir=cache_dir)
+            parser.pending_links = [(name, os.path.join(cache_dir, name))
+                                    for name in names]
+            parser.extract_pending()
+        finally:
+            zotero._cache_key = cache_key
+            shutil.rmtree(cache_dir)
+
+        features = parser.full_text['plain_text']
+        self.assertEqual(sorted(features), names)
+        pids = set([feature[1] for feature in features.values()])
+        self.assertLessEqual(len(pids), 2)
+        self.assertNotIn(str(os.getpid()), pids)
+        self.assertEqual(sorted(hashed),
+                         [os.path.join(cache_dir, name) for name in names])
+
+
 class TestZoteroDuplicates(unittest.TestCase):
     def test_duplicate_Papers_length(self):
         """
@@ -106,12 +106,14 @@ def _iterable(o):
         return [o]
 
 
+_PUNCTUATION_TABLE = dict((ord(char), '') for char in '!"#%\'()*+,-./:;<=>?@[\]^_`{|}~')
+
+
 def _strip_punctuation(s):
     """
     Removes all punctuation characters from a string.
     """
-    translate_table = dict((ord(char), '') for char in '!"#%\'()*+,-./:;<=>?@[\]^_`{|}~')
-    return s.translate(translate_table)
+    return s.translate(_PUNCTUATION_TABLE)
 
 def _strip_numbers(s):
     """